@@ -15,10 +15,14 @@
 # FEDataset and OpDataset intentionally not imported here to reduce user confusion with auto-complete
 from fastestimator.dataset import data
 from fastestimator.dataset.batch_dataset import BatchDataset
+from fastestimator.dataset.cached_dataset import CachedDataset
 from fastestimator.dataset.csv_dataset import CSVDataset
 from fastestimator.dataset.dir_dataset import DirDataset
 from fastestimator.dataset.generator_dataset import GeneratorDataset
 from fastestimator.dataset.labeled_dir_dataset import LabeledDirDataset
 from fastestimator.dataset.numpy_dataset import NumpyDataset
 from fastestimator.dataset.pickle_dataset import PickleDataset
-from fastestimator.dataset.siamese_dir_dataset import SiameseDirDataset
\ No newline at end of file
+from fastestimator.dataset.record_dataset import RecordDataset
+from fastestimator.dataset.sampler import LengthBucketSampler
+from fastestimator.dataset.siamese_dir_dataset import SiameseDirDataset
+from fastestimator.dataset.streaming_dataset import StreamingDataset
\ No newline at end of file
@@ -13,7 +13,6 @@
 # limitations under the License.
 # ==============================================================================
 import math
-import random
 from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
 
 import numpy as np
@@ -169,15 +168,28 @@ class BatchDataset(FEDataset):
     def __getstate__(self) -> Dict[str, List[Dict[Any, Any]]]:
         return {'datasets': [ds.__getstate__() if hasattr(ds, '__getstate__') else {} for ds in self.datasets]}
 
-    def summary(self) -> DatasetSummary:
+    def summary(self,
+                approximate: Optional[bool] = None,
+                sample_size: int = 100,
+                time_budget: float = 10.0) -> DatasetSummary:
         """Generate a summary representation of this dataset.
+
+        Args:
+            approximate: Whether to compute an approximate summary. If None, an approximate summary will be computed
+                only if the dataset is very large. See InMemoryDataset.summary() for details.
+            sample_size: How many randomly selected elements to inspect when computing an approximate summary.
+            time_budget: Roughly how many seconds an approximate summary of each of the underlying datasets may take.
+
         Returns:
             A summary representation of this dataset.
         """
         if not self.all_fe_datasets:
             print("FastEstimator-Warn: BatchDataset summary will be incomplete since non-FEDatasets were used.")
             return DatasetSummary(num_instances=len(self), keys={})
-        summaries = [ds.summary() for ds in self.datasets]
+        summaries = [
+            ds.summary(approximate=approximate, sample_size=sample_size, time_budget=time_budget)
+            for ds in self.datasets
+        ]
         keys = {k: v for summary in summaries for k, v in summary.keys.items()}
         return DatasetSummary(num_instances=len(self), keys=keys)
 
@@ -202,39 +214,44 @@ class BatchDataset(FEDataset):
         Returns:
             A list of data instance dictionaries corresponding to the current `batch_idx`.
         """
-        items = []
         if self.same_feature:
             if self.probability:
-                index = list(np.random.choice(range(len(self.datasets)), size=self.num_samples, p=self.probability))
-                num_samples = [index.count(i) for i in range(len(self.datasets))]
+                choices = np.random.choice(len(self.datasets), size=self.num_samples[0], p=self.probability)
+                num_samples = np.bincount(choices, minlength=len(self.datasets)).tolist()
             else:
                 num_samples = self.num_samples
+            items = []
             for dataset, num_sample, index_map in zip(self.datasets, num_samples, self.index_maps):
-                for idx in range(num_sample):
-                    items.append(dataset[index_map[batch_idx * num_sample + idx]])
+                indices = index_map[batch_idx * num_sample:(batch_idx + 1) * num_sample]
+                items.extend(dataset[idx] for idx in indices.tolist())
         else:
             num_sample = self.num_samples[0]
-            for idx in range(num_sample):
-                paired_items = [
-                    dataset[index_map[batch_idx * num_sample + idx]] for dataset,
-                    index_map in zip(self.datasets, self.index_maps)
-                ]
-                items.append({k: v for d in paired_items for k, v in d.items()})
-        random.shuffle(items)
-        return items
-
-    def reset_index_maps(self) -> None:
+            indices = [index_map[batch_idx * num_sample:(batch_idx + 1) * num_sample] for index_map in self.index_maps]
+            items = []
+            for row in zip(*[idx.tolist() for idx in indices]):
+                items.append({k: v for dataset, idx in zip(self.datasets, row) for k, v in dataset[idx].items()})
+        return [items[idx] for idx in np.random.permutation(len(items))]
+
+    def reset_index_maps(self, seed: Optional[int] = None) -> None:
         """Rearrange the index maps of this BatchDataset.
 
         This method is invoked every epoch by OpDataset which allows each epoch to have different random pairings of the
         basis datasets.
+
+        Args:
+            seed: A seed for the rearrangement, or None to use the global random state. Processes which use the same
+                seed will produce the same index maps, which is necessary for sharding the batches between them.
         """
+        if seed is None:
+            seed = np.random.randint(2**31 - 1)  # Respect the global random state (ex. from fe.enable_deterministic)
+        rng = np.random.default_rng(seed)
         num_samples = self.num_samples
         if self.probability:
             num_samples = num_samples * len(self.datasets)
         self.index_maps = []
         for dataset, num_sample in zip(self.datasets, num_samples):
-            index_map = [list(range(len(dataset))) for _ in range(math.ceil(len(self) * num_sample / len(dataset)))]
-            for mapping in index_map:
-                random.shuffle(mapping)
-            self.index_maps.append([item for sublist in index_map for item in sublist])
+            num_repeats = math.ceil(len(self) * num_sample / len(dataset))
+            # Every repetition is an independent permutation of the dataset indices. Generator.permuted would be more
+            # direct, but requires numpy >= 1.20
+            index_map = np.argsort(rng.random((num_repeats, len(dataset))), axis=1)
+            self.index_maps.append(index_map.ravel())
@@ -0,0 +1,157 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+from fastestimator.dataset.dataset import DatasetSummary, FEDataset
+from fastestimator.util.cache_util import SharedCache
+from fastestimator.util.traceability_util import traceable
+from fastestimator.util.util import CopyOnWriteDict, to_list
+
+
+@traceable(blacklist='cache')
+class CachedDataset(FEDataset):
+    """A wrapper which caches the outputs of another dataset's `__getitem__` method.
+
+    This is useful for datasets whose elements are expensive to compute but identical every epoch. Entries are held in
+    a SharedCache, which has a bounded memory tier (in shared memory), an optional memory-mapped disk tier which the
+    least recently used entries spill into, and hit/miss/eviction counters. Since the cache lives in shared memory, all
+    of the forked Pipeline workers benefit from each other's work. Every lookup (whether cached or not) returns a
+    CopyOnWriteDict, so callers may modify the results without corrupting either the cache or the wrapped dataset.
+
+    Unlike the `cache` argument of the Pipeline, which stores the outputs of the leading Pipeline ops, this caches the
+    dataset itself, and so works regardless of which ops are used.
+
+    ```python
+    ds = fe.dataset.CachedDataset(fe.dataset.LabeledDirDataset(...), memory_limit=2**32, disk_limit=2**36)
+    ds.stats()  # {"hits": 0, "misses": 0, "evictions": 0, "memory_bytes": 0, "disk_bytes": 0}
+    ```
+
+    Args:
+        dataset: The dataset to be cached. It must return the same data every time a given index is requested.
+        memory_limit: The maximum number of bytes to keep in memory. If None, the smaller of 1GB and half of the space
+            currently free in /dev/shm will be used.
+        disk_limit: The maximum number of bytes to spill onto disk. If 0, entries evicted from memory are discarded.
+        disk_dir: Where to store the disk tier. If None, the system temporary directory will be used.
+        cache: An existing cache to store the entries in. If provided, the limits above are ignored.
+    """
+    def __init__(self,
+                 dataset: FEDataset,
+                 memory_limit: Optional[int] = None,
+                 disk_limit: int = 0,
+                 disk_dir: Optional[str] = None,
+                 cache: Optional[SharedCache] = None) -> None:
+        self.dataset = dataset
+        self.cache = cache or SharedCache(memory_limit=memory_limit, disk_limit=disk_limit, disk_dir=disk_dir)
+        self.prefix = self._new_prefix()
+
+    @staticmethod
+    def _new_prefix() -> str:
+        """Generate a new cache key prefix, which is necessary whenever the dataset indices change.
+
+        Returns:
+            A unique prefix.
+        """
+        return "ds_{}_".format(uuid.uuid4().hex)
+
+    def __len__(self) -> int:
+        return len(self.dataset)
+
+    def __getitem__(self, index: Union[int, str]) -> Any:
+        """Look up data from the dataset, using the cache if possible.
+
+        Args:
+            index: Which datapoint to retrieve. Non-integer indices (like column lookups) bypass the cache.
+
+        Returns:
+            The data dictionary from the specified index, wrapped in a CopyOnWriteDict.
+        """
+        if not isinstance(index, (int, np.integer)):
+            return self.dataset[index]
+        key = self.prefix + str(index)
+        data = self.cache.get(key)
+        if data is None:
+            data = self.dataset[index]
+            self.cache.put(key, data)
+        return CopyOnWriteDict(data)
+
+    def __getattr__(self, name: str) -> Any:
+        # Expose attributes of the wrapped dataset (ex. parent_path) so that this can be used as a drop-in replacement
+        if name == 'dataset':
+            raise AttributeError(name)
+        return getattr(self.dataset, name)
+
+    def stats(self) -> Dict[str, int]:
+        """Get usage statistics for the cache.
+
+        Returns:
+            A dictionary containing the number of hits, misses, and evictions, as well as the approximate number of
+            bytes used in memory and on disk.
+        """
+        return self.cache.stats()
+
+    def _do_split(self, splits: Sequence[Iterable[int]]) -> List['CachedDataset']:
+        """This class overwrites the .split() method instead of _do_split().
+
+        Args:
+            splits: Which indices to remove from the current dataset in order to create new dataset(s).
+
+        Raises:
+            AssertionError: This method should never by invoked.
+        """
+        raise AssertionError("This method should not have been invoked. Please file a bug report")
+
+    def split(self, *fractions: Union[float, int, Iterable[int]]) -> Union['CachedDataset', List['CachedDataset']]:
+        """Split this dataset into multiple smaller datasets.
+
+        The wrapped dataset is split, and each of the resulting datasets is wrapped in a new CachedDataset which shares
+        this dataset's cache. See FEDataset.split() for details about the `fractions`.
+
+        Args:
+            *fractions: Floating point values will be interpreted as percentages, integers as an absolute number of
+                datapoints, and an iterable of integers as the exact indices of the data that should be removed in order
+                to create the new dataset.
+
+        Returns:
+            One or more new datasets which are created by removing elements from the current dataset. The number of
+            datasets returned will be equal to the number of `fractions` provided. If only a single value is provided
+            then the return will be a single dataset rather than a list of datasets.
+        """
+        results = [CachedDataset(ds, cache=self.cache) for ds in to_list(self.dataset.split(*fractions))]
+        # The remaining indices have shifted, so the existing entries can no longer be used
+        self.prefix = self._new_prefix()
+        FEDataset.fix_split_traceabilty(self, results, fractions)
+        if len(results) == 1:
+            return results[0]
+        return results
+
+    def summary(self,
+                approximate: Optional[bool] = None,
+                sample_size: int = 100,
+                time_budget: float = 10.0) -> DatasetSummary:
+        """Generate a summary representation of this dataset.
+
+        Args:
+            approximate: Whether to compute an approximate summary of the wrapped dataset. If None, the wrapped dataset
+                will decide. See InMemoryDataset.summary() for details.
+            sample_size: How many randomly selected elements to inspect when computing an approximate summary.
+            time_budget: Roughly how many seconds an approximate summary may take.
+
+        Returns:
+            The summary of the wrapped dataset.
+        """
+        return self.dataset.summary(approximate=approximate, sample_size=sample_size, time_budget=time_budget)
@@ -12,14 +12,296 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ==============================================================================
+import csv
+import mmap
 import os
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Union
 
+import numpy as np
 import pandas as pd
 
 from fastestimator.dataset.dataset import InMemoryDataset
 from fastestimator.util.traceability_util import traceable
 
 
+class LazyCSVData(Mapping[int, Dict[str, Any]]):
+    """A read-only mapping from row indices to the rows of a CSV file, which are parsed on demand.
+
+    This class is intentionally not @traceable.
+
+    The file is indexed with a single streaming pass which records the byte range of every row, after which only the
+    index (16 bytes per row) is held in memory. Rows are read from a memory map of the file, so the OS page cache is
+    shared between all of the processes reading the data. The type of each column is inferred from the first
+    `probe_rows` rows: integer, floating point, and boolean columns are returned as numpy scalars, while anything else
+    is returned as a string. Empty fields are returned as NaN, matching pandas. Newlines within quoted fields are
+    supported.
+
+    Columns may be replaced using `set_column`, in which case the new values are held in memory.
+
+    Args:
+        file_path: The path to the CSV file.
+        delimiter: What delimiter is used by the file.
+        quotechar: What character is used to quote fields which contain special characters.
+        encoding: The text encoding of the file.
+        columns: Which columns to read. If None, all of the columns will be read.
+        probe_rows: How many rows to inspect in order to infer the type of each column.
+
+    Raises:
+        AssertionError: If any of the requested `columns` are not present in the file.
+    """
+    index: np.ndarray  # An Nx2 array of (start, end) byte offsets for each row
+
+    def __init__(self,
+                 file_path: str,
+                 delimiter: str = ",",
+                 quotechar: str = '"',
+                 encoding: str = "utf-8",
+                 columns: Optional[Iterable[str]] = None,
+                 probe_rows: int = 1000) -> None:
+        self.file_path = file_path
+        self.delimiter = delimiter
+        self.quotechar = quotechar
+        self.encoding = encoding
+        self.buffer = None  # The (pid, mmap) of the process which is currently reading
+        index = self._build_index()
+        self.header = self._parse(*index[0]) if len(index) else []
+        self.index = index[1:]
+        keys = self.header if columns is None else list(columns)
+        missing = set(keys) - set(self.header)
+        assert not missing, "CSV file {} is missing column(s): {}".format(file_path, missing)
+        self.positions = {key: self.header.index(key) for key in keys}
+        probe = [self._parse(*span) for span in self.index[:probe_rows]]
+        self.dtypes = {
+            key: self._infer_type([row[pos] for row in probe if pos < len(row)])
+            for key, pos in self.positions.items()
+        }
+        self.overrides = {}  # Columns which have been replaced by the user
+
+    def _get_buffer(self) -> mmap.mmap:
+        """Get a memory map of the file which is valid in the current process.
+
+        Returns:
+            The memory map.
+        """
+        if self.buffer is None or self.buffer[0] != os.getpid():
+            with open(self.file_path, 'rb') as file:
+                self.buffer = (os.getpid(), mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+        return self.buffer[1]
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Memory maps cannot be pickled, so the receiving process will open its own
+        return {k: (None if k == 'buffer' else v) for k, v in self.__dict__.items()}
+
+    def _build_index(self, chunk_size: int = 2**22) -> np.ndarray:
+        """Find the byte range of every row in the file, including the header.
+
+        Args:
+            chunk_size: How many bytes of the file to process at a time.
+
+        Returns:
+            An Nx2 array of (start, end) offsets for each non-blank row, where the end offset excludes the line break.
+        """
+        quote = ord(self.quotechar)
+        line_ends = []
+        in_quote = 0
+        offset = 0
+        with open(self.file_path, 'rb') as file:
+            for chunk in iter(lambda: file.read(chunk_size), b''):
+                arr = np.frombuffer(chunk, dtype=np.uint8)
+                newlines = np.flatnonzero(arr == ord('\n'))
+                quotes = arr == quote
+                num_quotes = int(np.count_nonzero(quotes))
+                if in_quote or num_quotes:
+                    # A newline only ends a row if an even number of quote characters precede it
+                    parity = (np.cumsum(quotes, dtype=np.int64)[newlines] + in_quote) % 2
+                    newlines = newlines[parity == 0]
+                    in_quote = (in_quote + num_quotes) % 2
+                line_ends.append(newlines + offset)
+                offset += len(chunk)
+        line_ends = np.concatenate(line_ends) if line_ends else np.zeros((0, ), dtype=np.int64)
+        starts = np.concatenate([[0], line_ends + 1])
+        ends = np.concatenate([line_ends, [offset]])
+        index = np.stack([starts, ends], axis=1).astype(np.int64)
+        # Drop blank lines (including the one after a trailing newline), as pandas does
+        short = np.flatnonzero(index[:, 1] - index[:, 0] <= 1)
+        if len(short):
+            blank = [idx for idx in short if index[idx, 1] == index[idx, 0] or self._read(*index[idx]) == b'\r']
+            index = np.delete(index, blank, axis=0)
+        return index
+
+    def _read(self, start: int, end: int) -> bytes:
+        """Read a range of bytes from the file.
+
+        Args:
+            start: The first byte to read.
+            end: The byte after the last one to read.
+
+        Returns:
+            The requested bytes.
+        """
+        return self._get_buffer()[start:end]
+
+    def _parse(self, start: int, end: int) -> List[str]:
+        """Split a row of the file into its fields.
+
+        Args:
+            start: The offset of the row.
+            end: The offset of the line break at the end of the row.
+
+        Returns:
+            The (unconverted) fields of the row.
+        """
+        line = self._read(start, end).decode(self.encoding)
+        return next(csv.reader([line.rstrip('\r')], delimiter=self.delimiter, quotechar=self.quotechar), [])
+
+    @staticmethod
+    def _infer_type(values: Sequence[str]) -> str:
+        """Determine the type of a column.
+
+        Args:
+            values: Sample values from the column.
+
+        Returns:
+            The most specific type ('int', 'float', 'bool', or 'str') which all of the `values` are compatible with.
+        """
+        values = [val for val in values if val != '']
+        if not values:
+            return 'float'  # Entirely empty columns are NaN
+        for dtype, name in ((np.int64, 'int'), (np.float64, 'float')):
+            try:
+                for val in values:
+                    dtype(val)
+            except (ValueError, OverflowError):
+                continue
+            return name
+        if all(val in ('True', 'False') for val in values):
+            return 'bool'
+        return 'str'
+
+    @staticmethod
+    def _convert(val: str, dtype: str) -> Any:
+        """Convert a field of the file into its inferred type.
+
+        Args:
+            val: The field to convert.
+            dtype: The inferred type of the field's column. If the `val` is not compatible with this type then it will
+                be converted to a float if possible, or else left as a string.
+
+        Returns:
+            The converted value, or NaN if the field was empty.
+        """
+        if val == '':
+            return np.nan
+        if dtype == 'int':
+            try:
+                return np.int64(val)
+            except (ValueError, OverflowError):
+                dtype = 'float'
+        if dtype == 'float':
+            try:
+                return np.float64(val)
+            except ValueError:
+                return val
+        if dtype == 'bool' and val in ('True', 'False'):
+            return np.bool_(val == 'True')
+        return val
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(len(self)))
+
+    def __contains__(self, index: Any) -> bool:
+        return isinstance(index, (int, np.integer)) and 0 <= index < len(self)
+
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        if index not in self:
+            raise KeyError(index)
+        return self._get_row(index, self.positions)
+
+    def _get_row(self, index: int, positions: Mapping[str, int]) -> Dict[str, Any]:
+        """Read and convert some of the fields of a row.
+
+        Args:
+            index: Which row to read.
+            positions: Which keys to read, along with their position within the row.
+
+        Returns:
+            The data dictionary for the row.
+        """
+        fields = self._parse(*self.index[index])
+        row = {
+            key: self._convert(fields[pos], self.dtypes[key]) if pos < len(fields) else np.nan
+            for key, pos in positions.items() if key not in self.overrides
+        }
+        for key, column in self.overrides.items():
+            row[key] = column[index]
+        return row
+
+    def column(self, key: str) -> Union[np.ndarray, List[Any]]:
+        """Read all of the values of a given column.
+
+        Args:
+            key: The column to read.
+
+        Returns:
+            The values of the column, as an array if they are all numeric, or as a list otherwise.
+        """
+        if key in self.overrides:
+            return self.overrides[key]
+        values = [self._get_row(idx, {key: self.positions[key]})[key] for idx in range(len(self))]
+        if values and all(isinstance(val, (np.number, np.bool_)) for val in values):
+            return np.array(values)
+        return values
+
+    def set_column(self, key: str, value: Sequence[Any]) -> None:
+        """Replace (or add) a column of data.
+
+        Args:
+            key: The column to set.
+            value: The new values for the column.
+
+        Raises:
+            AssertionError: If the `value` has the wrong length.
+        """
+        assert len(value) == len(self), \
+            "input value must be of length {}, but had length {}".format(len(self), len(value))
+        self.overrides[key] = value if isinstance(value, np.ndarray) else list(value)
+
+    def take(self, indices: Sequence[int]) -> 'LazyCSVData':
+        """Create a new LazyCSVData object containing a subset of the rows of this one.
+
+        Args:
+            indices: Which rows to include in the new object.
+
+        Returns:
+            A new LazyCSVData which reads from the same file.
+        """
+        obj = self.__class__.__new__(self.__class__)
+        obj.__dict__.update(self.__dict__)
+        obj.buffer = None
+        obj.index = self.index[indices]
+        obj.overrides = {
+            key: column[indices] if isinstance(column, np.ndarray) else [column[idx] for idx in indices]
+            for key, column in self.overrides.items()
+        }
+        return obj
+
+    def delete(self, indices: Sequence[int]) -> None:
+        """Remove rows from this object.
+
+        Args:
+            indices: Which rows to remove.
+        """
+        keep = np.ones(len(self), dtype=bool)
+        keep[np.asarray(indices, dtype=np.int64)] = False
+        self.index = self.index[keep]
+        kept = np.flatnonzero(keep)
+        for key, column in self.overrides.items():
+            self.overrides[key] = column[keep] if isinstance(column, np.ndarray) else [column[idx] for idx in kept]
+
+
 @traceable()
 class CSVDataset(InMemoryDataset):
     """A dataset from a CSV file.
@@ -28,13 +310,93 @@ class CSVDataset(InMemoryDataset):
     may be accessed using dataset.parent_path. This may be useful if the csv contains relative path information
     that you want to feed into, say, an ImageReader Op.
 
+    By default the entire file is parsed by pandas and held in memory. For files which are too large for that, `lazy`
+    mode instead indexes the file in a single streaming pass and then parses rows on demand (see LazyCSVData for
+    details). Lazy datasets support splitting, summaries, and column replacement, but individual rows cannot be
+    modified.
+
+    ```python
+    ds = fe.dataset.CSVDataset("/data/metadata.csv", lazy=True, columns=["image", "label"])
+    ds[0]  # {"image": "img/0.png", "label": 3}
+    ```
+
     Args:
         file_path: The (absolute) path to the CSV file.
         delimiter: What delimiter is used by the file.
+        lazy: Whether to read rows from the file on demand rather than loading the entire file into memory.
+        columns: Which columns to read. If None, all of the columns will be read.
         kwargs: Other arguments to be passed through to pandas csv reader function. See the pandas docs for details:
-            https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.read_csv.html.
+            https://pandas.pydata.org/pandas-docs/stable/reference/api/pandas.read_csv.html. When `lazy` is True, only
+            the `quotechar` and `encoding` arguments are supported, along with `probe_rows` to control how many rows
+            are used to infer the type of each column.
+
+    Raises:
+        AssertionError: If unsupported `kwargs` are provided in `lazy` mode.
     """
-    def __init__(self, file_path: str, delimiter: str = ",", **kwargs) -> None:
-        df = pd.read_csv(file_path, delimiter=delimiter, **kwargs)
+    data: Union[Dict[int, Dict[str, Any]], LazyCSVData]
+
+    def __init__(self,
+                 file_path: str,
+                 delimiter: str = ",",
+                 lazy: bool = False,
+                 columns: Optional[Iterable[str]] = None,
+                 **kwargs) -> None:
         self.parent_path = os.path.dirname(file_path)
-        super().__init__(df.to_dict(orient='index'))
+        if lazy:
+            unsupported = kwargs.keys() - {'quotechar', 'encoding', 'probe_rows'}
+            assert not unsupported, "Unsupported argument(s) for a lazy CSVDataset: {}".format(unsupported)
+            super().__init__(LazyCSVData(file_path, delimiter=delimiter, columns=columns, **kwargs))
+        else:
+            df = pd.read_csv(file_path, delimiter=delimiter, usecols=columns, **kwargs)
+            super().__init__(df.to_dict(orient='index'))
+
+    def __getitem__(self, index: Union[int, str]) -> Union[Dict[str, Any], np.ndarray, List[Any]]:
+        if isinstance(self.data, LazyCSVData) and isinstance(index, str):
+            column = self.data.column(index)
+            return np.array(column) if isinstance(column, np.ndarray) else list(column)
+        return super().__getitem__(index)
+
+    def __setitem__(self, key: Union[int, str], value: Union[Dict[str, Any], Sequence[Any]]) -> None:
+        if isinstance(self.data, LazyCSVData):
+            assert isinstance(key, str), "individual rows of a lazy CSVDataset cannot be modified"
+            self.data.set_column(key, value)
+            self.summary.cache_clear()
+            return
+        super().__setitem__(key, value)
+
+    def _do_split(self, splits: Sequence[Iterable[int]]) -> List['CSVDataset']:
+        """Split the current dataset apart into several smaller datasets.
+
+        Args:
+            splits: Which indices to remove from the current dataset in order to create new dataset(s). One dataset will
+                be generated for every iterable within the `splits` sequence.
+
+        Returns:
+            New Datasets generated by removing data at the indices specified by `splits` from the current dataset.
+        """
+        if not isinstance(self.data, LazyCSVData):
+            return super()._do_split(splits)
+        splits = [np.fromiter(split, dtype=np.int64) for split in splits]
+        results = [
+            self._skip_init(self.data.take(split), **{k: v for k, v in self.__dict__.items() if k != 'data'})
+            for split in splits
+        ]
+        self.data.delete(np.concatenate(splits) if splits else [])
+        self.summary.cache_clear()
+        return results
+
+    def _count_unique(self, key: str) -> int:
+        """Count how many unique values are stored under a given `key` of the data.
+
+        Args:
+            key: The key to inspect. Its values must be hashable.
+
+        Returns:
+            The number of unique values.
+        """
+        if not isinstance(self.data, LazyCSVData):
+            return super()._count_unique(key)
+        column = self.data.column(key)
+        if isinstance(column, np.ndarray):
+            return len(np.unique(column))
+        return len(set(column))
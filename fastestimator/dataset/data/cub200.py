@@ -14,67 +14,21 @@
 # ==============================================================================
 import os
 import random
-import tarfile
 from pathlib import Path
-from typing import Optional, TypeVar
+from typing import Optional
 
 import pandas as pd
-import requests
-from tqdm import tqdm
 
 from fastestimator.dataset.csv_dataset import CSVDataset
+from fastestimator.util.download_util import download_files, extract_archives
 
-Response = TypeVar('Response', bound=requests.models.Response)
+# 'confirm=t' skips Google Drive's virus scan warning page, which would otherwise be downloaded in place of large files
+_DRIVE_URL = "https://drive.google.com/uc?export=download&confirm=t&id={}"
 
 
-def _download_file_from_google_drive(id: str, destination: str) -> None:
-    """Download the data from the Google drive public URL.
-
-    This method will create a session instance to persist the requests and reuse TCP connection for the large files.
-
-    Args:
-        id: File ID of Google drive URL.
-        destination: Destination path where the data needs to be stored.
-    """
-    URL = "https://drive.google.com/uc?export=download"
-    CHUNK_SIZE = 128
-    session = requests.Session()
-
-    response = session.get(URL, params={'id': id}, stream=True)
-    token = _get_confirm_token(response)
-
-    if token:
-        params = {'id': id, 'confirm': token}
-        response = session.get(URL, params=params, stream=True)
-
-    total_size = int(response.headers.get('content-length', 0))
-    progress = tqdm(total=total_size, unit='B', unit_scale=True)
-    with open(destination, "wb") as f:
-        for chunk in response.iter_content(CHUNK_SIZE):
-            if chunk:  # filter out keep-alive new chunks
-                progress.update(len(chunk))
-                f.write(chunk)
-    progress.close()
-
-
-def _get_confirm_token(response: Response) -> str:
-    """Retrieve the token from the cookie jar of HTTP request to keep the session alive.
-
-    Args:
-        response: Response object of the HTTP request.
-
-    Returns"
-        The value of cookie in the response object.
-
-    """
-    for key, value in response.cookies.items():
-        if key.startswith('download_warning'):
-            return value
-
-    return None
-
-
-def load_data(root_dir: Optional[str] = None) -> CSVDataset:
+def load_data(root_dir: Optional[str] = None,
+              num_threads: int = 2,
+              max_bytes_per_sec: Optional[float] = None) -> CSVDataset:
     """Load and return the Caltech-UCSD Birds 200 (CUB200) dataset.
 
     Sourced from http://www.vision.caltech.edu/visipedia/CUB-200.html. This method will download the data to local
@@ -83,6 +37,8 @@ def load_data(root_dir: Optional[str] = None) -> CSVDataset:
     Args:
         root_dir: The path to store the downloaded data. When `path` is not provided, the data will be saved into
             `fastestimator_data` under the user's home directory.
+        num_threads: How many files to download at the same time.
+        max_bytes_per_sec: The maximum combined download speed, or None for no limit.
 
     Returns:
         train_data
@@ -105,15 +61,13 @@ def load_data(root_dir: Optional[str] = None) -> CSVDataset:
         # download
         if not (os.path.exists(image_compressed_path) and os.path.exists(annotation_compressed_path)):
             print("Downloading data to {}".format(root_dir))
-            _download_file_from_google_drive('1GDr1OkoXdhaXWGA8S3MAq3a522Tak-nx', image_compressed_path)
-            _download_file_from_google_drive('16NsbTpMs5L6hT4hUJAmpW2u7wH326WTR', annotation_compressed_path)
+            download_files([_DRIVE_URL.format('1GDr1OkoXdhaXWGA8S3MAq3a522Tak-nx'),
+                            _DRIVE_URL.format('16NsbTpMs5L6hT4hUJAmpW2u7wH326WTR')],
+                           [image_compressed_path, annotation_compressed_path],
+                           num_threads=num_threads,
+                           max_bytes_per_sec=max_bytes_per_sec)
 
-        # extract
-        print("\nExtracting files ...")
-        with tarfile.open(image_compressed_path) as img_tar:
-            img_tar.extractall(root_dir)
-        with tarfile.open(annotation_compressed_path) as anno_tar:
-            anno_tar.extractall(root_dir)
+        extract_archives([image_compressed_path, annotation_compressed_path], root_dir)
 
     # glob and generate csv
     if not os.path.exists(csv_path):
@@ -14,17 +14,13 @@
 # ==============================================================================
 import os
 import random
-import tarfile
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
 import pandas as pd
-import wget
 
 from fastestimator.dataset.csv_dataset import CSVDataset
-from fastestimator.util.wget_util import bar_custom, callback_progress
-
-wget.callback_progress = callback_progress
+from fastestimator.util.download_util import download_file, extract_archives
 
 
 def _create_csv(images: List[str], label_dict: Dict[str, int], csv_path: str) -> None:
@@ -43,7 +39,8 @@ def _create_csv(images: List[str], label_dict: Dict[str, int], csv_path: str) ->
     return None
 
 
-def load_data(root_dir: Optional[str] = None) -> Tuple[CSVDataset, CSVDataset]:
+def load_data(root_dir: Optional[str] = None,
+              max_bytes_per_sec: Optional[float] = None) -> Tuple[CSVDataset, CSVDataset]:
     """Load and return the Food-101 dataset.
 
     Food-101 dataset is a collection of images from 101 food categories.
@@ -52,6 +49,7 @@ def load_data(root_dir: Optional[str] = None) -> Tuple[CSVDataset, CSVDataset]:
     Args:
         root_dir: The path to store the downloaded data. When `path` is not provided, the data will be saved into
             `fastestimator_data` under the user's home directory.
+        max_bytes_per_sec: The maximum download speed, or None for no limit.
 
     Returns:
         (train_data, test_data)
@@ -71,15 +69,11 @@ def load_data(root_dir: Optional[str] = None) -> Tuple[CSVDataset, CSVDataset]:
     test_csv_path = os.path.join(root_dir, 'test.csv')
 
     if not os.path.exists(image_extracted_path):
-        # download
-        if not os.path.exists(image_compressed_path):
-            print("Downloading data to {}".format(root_dir))
-            wget.download('http://data.vision.ee.ethz.ch/cvl/food-101.tar.gz', root_dir, bar=bar_custom)
-
-        # extract
-        print("\nExtracting files ...")
-        with tarfile.open(image_compressed_path) as img_tar:
-            img_tar.extractall(root_dir)
+        download_file('http://data.vision.ee.ethz.ch/cvl/food-101.tar.gz',
+                      image_compressed_path,
+                      checksum='md5:85eeb15f3717b99a5da872d97d918f87',
+                      max_bytes_per_sec=max_bytes_per_sec)
+        extract_archives([image_compressed_path], root_dir)
 
     labels = open(os.path.join(root_dir, "food-101/meta/classes.txt"), "r").read().split()
     label_dict = {labels[i]: i for i in range(len(labels))}
@@ -13,20 +13,17 @@
 # limitations under the License.
 # ==============================================================================
 import os
-import zipfile
 from pathlib import Path
 from typing import Optional, Tuple
 
-import wget
-
 from fastestimator.dataset.batch_dataset import BatchDataset
 from fastestimator.dataset.dir_dataset import DirDataset
-from fastestimator.util.wget_util import bar_custom, callback_progress
-
-wget.callback_progress = callback_progress
+from fastestimator.util.download_util import download_file, extract_archives
 
 
-def load_data(batch_size: int, root_dir: Optional[str] = None) -> Tuple[BatchDataset, BatchDataset]:
+def load_data(batch_size: int,
+              root_dir: Optional[str] = None,
+              max_bytes_per_sec: Optional[float] = None) -> Tuple[BatchDataset, BatchDataset]:
     """Load and return the horse2zebra dataset.
 
     Sourced from https://people.eecs.berkeley.edu/~taesung_park/CycleGAN/datasets/horse2zebra.zip. This method will
@@ -36,6 +33,7 @@ def load_data(batch_size: int, root_dir: Optional[str] = None) -> Tuple[BatchDat
         batch_size: The desired batch size.
         root_dir: The path to store the downloaded data. When `path` is not provided, the data will be saved into
             `fastestimator_data` under the user's home directory.
+        max_bytes_per_sec: The maximum download speed, or None for no limit.
 
     Returns:
         (train_data, eval_data)
@@ -52,17 +50,10 @@ def load_data(batch_size: int, root_dir: Optional[str] = None) -> Tuple[BatchDat
     data_folder_path = os.path.join(root_dir, 'images')
 
     if not os.path.exists(data_folder_path):
-        # download
-        if not os.path.exists(data_compressed_path):
-            print("Downloading data to {}".format(root_dir))
-            wget.download('https://people.eecs.berkeley.edu/~taesung_park/CycleGAN/datasets/horse2zebra.zip',
-                          root_dir,
-                          bar=bar_custom)
-
-        # extract
-        print("\nExtracting files ...")
-        with zipfile.ZipFile(data_compressed_path, 'r') as zip_file:
-            zip_file.extractall(root_dir)
+        download_file('https://people.eecs.berkeley.edu/~taesung_park/CycleGAN/datasets/horse2zebra.zip',
+                      data_compressed_path,
+                      max_bytes_per_sec=max_bytes_per_sec)
+        extract_archives([data_compressed_path], root_dir)
         os.rename(os.path.join(root_dir, 'horse2zebra'), data_folder_path)
 
     test_a = DirDataset(root_dir=os.path.join(data_folder_path, 'testA'),
@@ -12,30 +12,279 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ==============================================================================
+import hashlib
+import json
 import os
-import zipfile
-from copy import deepcopy
+import shutil
+import tempfile
+import uuid
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
 
 import numpy as np
-import wget
+from pycocotools import mask as mask_util
 from pycocotools.coco import COCO
 
 from fastestimator.dataset.dir_dataset import DirDataset
+from fastestimator.util.download_util import download_files, extract_archives
 from fastestimator.util.traceability_util import traceable
-from fastestimator.util.util import Suppressor
-from fastestimator.util.wget_util import bar_custom, callback_progress
+from fastestimator.util.util import CopyOnWriteDict, Suppressor
 
-wget.callback_progress = callback_progress
+_INDEX_VERSION = 2
+_INDEX_META = "meta.json"
 
 
-@traceable()
+def _fingerprint(path: str) -> List[int]:
+    """Identify a particular version of a file.
+
+    Args:
+        path: The file to fingerprint.
+
+    Returns:
+        The [size, mtime_ns] of the file.
+    """
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def _is_writable(path: str) -> bool:
+    """Determine whether a directory could be created (or written into) at a given `path`.
+
+    Args:
+        path: The directory to check.
+
+    Returns:
+        True iff the `path`, or its nearest existing ancestor, is writable by the current user.
+    """
+    path = os.path.abspath(path)
+    while not os.path.exists(path):
+        parent = os.path.dirname(path)
+        if parent == path:
+            return False
+        path = parent
+    return os.path.isdir(path) and os.access(path, os.W_OK | os.X_OK)
+
+
+def _fallback_index_dir(annotation_file: str) -> str:
+    """Choose a user-writable location for the index of a given annotation file.
+
+    Args:
+        annotation_file: The instance annotation file which the index belongs to.
+
+    Returns:
+        A directory under `fastestimator_data` in the user's home directory which is unique to the `annotation_file`.
+    """
+    annotation_file = os.path.abspath(annotation_file)
+    digest = hashlib.sha1(annotation_file.encode('utf-8')).hexdigest()[:16]
+    name = "{}_{}".format(os.path.splitext(os.path.basename(annotation_file))[0], digest)
+    return os.path.join(str(Path.home()), 'fastestimator_data', 'MSCOCO_index', name)
+
+
+def _read_meta(index_dir: str) -> Dict[str, Any]:
+    """Read the metadata of an index.
+
+    Args:
+        index_dir: Where the index is stored.
+
+    Returns:
+        The metadata, or an empty dictionary if there is no (compatible) index in the `index_dir`.
+    """
+    try:
+        with open(os.path.join(index_dir, _INDEX_META), 'r') as file:
+            meta = json.load(file)
+    except (OSError, ValueError):
+        return {}
+    return meta if meta.get("version") == _INDEX_VERSION else {}
+
+
+def _is_stale(meta: Dict[str, Any],
+              annotation_file: str,
+              caption_file: str,
+              include_bboxes: bool,
+              include_masks: bool,
+              include_captions: bool) -> bool:
+    """Determine whether an index is missing any required annotations, or was built from outdated files.
+
+    Args:
+        meta: The metadata of the index.
+        annotation_file: The instance annotation file.
+        caption_file: The caption annotation file.
+        include_bboxes: Whether bboxes are required.
+        include_masks: Whether masks are required.
+        include_captions: Whether captions are required.
+
+    Returns:
+        Whether the index needs to be rebuilt.
+    """
+    return (include_bboxes and meta.get("instances") != _fingerprint(annotation_file)) or \
+        (include_masks and not meta.get("masks")) or \
+        (include_captions and meta.get("captions") != _fingerprint(caption_file))
+
+
+def _offsets(lengths: Iterable[int]) -> np.ndarray:
+    """Convert a sequence of segment lengths into the offsets at which each segment starts (plus the total length).
+
+    Args:
+        lengths: The length of each segment.
+
+    Returns:
+        An array of len(`lengths`) + 1 offsets.
+    """
+    return np.concatenate([[0], np.cumsum(np.fromiter(lengths, dtype=np.int64))]).astype(np.int64)
+
+
+def _build_index(index_dir: str, annotation_file: Optional[str], caption_file: Optional[str],
+                 include_masks: bool) -> None:
+    """Parse MSCOCO annotation files into a compact binary index.
+
+    The index consists of flat numpy arrays, where the annotations of each image are stored contiguously and located
+    via offset arrays. Masks are stored in their compressed RLE form, which is much cheaper to decode than polygons.
+
+    The arrays are written into a private temporary directory which is then renamed into place, after which the
+    metadata file pointing at it is atomically replaced. Several processes (ex. distributed training ranks) may
+    therefore build the same index concurrently without corrupting each other's files.
+
+    Args:
+        index_dir: Where to save the index.
+        annotation_file: The instance annotation file to index, or None to skip bboxes and masks.
+        caption_file: The caption annotation file to index, or None to skip captions.
+        include_masks: Whether to index masks (in addition to bboxes) from the `annotation_file`.
+    """
+    print("FastEstimator: Building MSCOCO annotation index in {}".format(index_dir))
+    os.makedirs(index_dir, exist_ok=True)
+    with Suppressor():
+        instances = None if annotation_file is None else COCO(annotation_file)
+        captions = None if caption_file is None else COCO(caption_file)
+    image_ids = set()
+    for coco in (instances, captions):
+        if coco is not None:
+            image_ids.update(coco.getImgIds())
+    image_ids = sorted(image_ids)
+    arrays = {"image_ids": np.array(image_ids, dtype=np.int64)}
+    meta = {"version": _INDEX_VERSION, "instances": None, "masks": False, "captions": None}
+    if instances is not None:
+        annotations = [[ann for ann in instances.imgToAnns[image_id] if not ann['iscrowd']] for image_id in image_ids]
+        flat = [ann for anns in annotations for ann in anns]
+        arrays["box_offsets"] = _offsets(len(anns) for anns in annotations)
+        arrays["boxes"] = np.array([ann['bbox'] for ann in flat], dtype=np.float64).reshape((-1, 4))
+        arrays["categories"] = np.array([ann['category_id'] for ann in flat], dtype=np.int64)
+        if include_masks:
+            rles = [instances.annToRLE(ann) for ann in flat]
+            counts = [rle['counts'] if isinstance(rle['counts'], bytes) else rle['counts'].encode() for rle in rles]
+            arrays["mask_sizes"] = np.array([rle['size'] for rle in rles], dtype=np.int64).reshape((-1, 2))
+            arrays["mask_offsets"] = _offsets(len(count) for count in counts)
+            arrays["masks"] = np.frombuffer(b''.join(counts), dtype=np.uint8)
+        meta["instances"] = _fingerprint(annotation_file)
+        meta["masks"] = include_masks
+    if captions is not None:
+        texts = [[ann['caption'].encode('utf-8') for ann in captions.imgToAnns[image_id]] for image_id in image_ids]
+        flat = [text for image_texts in texts for text in image_texts]
+        arrays["caption_image_offsets"] = _offsets(len(image_texts) for image_texts in texts)
+        arrays["caption_offsets"] = _offsets(len(text) for text in flat)
+        arrays["captions"] = np.frombuffer(b''.join(flat), dtype=np.uint8)
+        meta["captions"] = _fingerprint(caption_file)
+    tmp_dir = tempfile.mkdtemp(prefix=".tmp_", dir=index_dir)
+    tmp_meta = os.path.join(index_dir, ".{}.{}.tmp".format(_INDEX_META, uuid.uuid4().hex))
+    try:
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_dir, name + ".npy"), array)
+        meta["arrays"] = list(arrays.keys())
+        meta["directory"] = "arrays_{}".format(uuid.uuid4().hex)
+        os.rename(tmp_dir, os.path.join(index_dir, meta["directory"]))
+        # The metadata is written last, so that an interrupted build will not be mistaken for a complete one
+        with open(tmp_meta, 'w') as file:
+            json.dump(meta, file)
+        os.replace(tmp_meta, os.path.join(index_dir, _INDEX_META))
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if os.path.exists(tmp_meta):
+            os.remove(tmp_meta)
+        raise
+
+
+def _load_index(index_dir: Optional[str],
+                annotation_file: str,
+                caption_file: str,
+                include_bboxes: bool,
+                include_masks: bool,
+                include_captions: bool) -> Dict[str, np.ndarray]:
+    """Load the binary index of MSCOCO annotations, (re-)building it first if necessary.
+
+    The index is rebuilt if any of the required annotations are missing from it, or if their source file has changed.
+    Annotations which were previously indexed are kept during a rebuild, so that alternating between configurations
+    (ex. with and without captions) does not cause repeated rebuilds.
+
+    Args:
+        index_dir: Where the index is stored. If None, it will be stored next to the `annotation_file` if possible, or
+            else under `fastestimator_data` in the user's home directory (ex. if the data is on a read-only mount).
+        annotation_file: The instance annotation file.
+        caption_file: The caption annotation file.
+        include_bboxes: Whether bboxes are required.
+        include_masks: Whether masks are required.
+        include_captions: Whether captions are required.
+
+    Returns:
+        The (memory-mapped) index arrays.
+    """
+    requirements = (annotation_file, caption_file, include_bboxes, include_masks, include_captions)
+    if index_dir is None:
+        index_dir = os.path.splitext(annotation_file)[0] + "_index"
+        if _is_stale(_read_meta(index_dir), *requirements) and not _is_writable(index_dir):
+            index_dir = _fallback_index_dir(annotation_file)
+    meta = _read_meta(index_dir)
+    if _is_stale(meta, *requirements):
+        include_bboxes = include_bboxes or (meta.get("instances") is not None and os.path.exists(annotation_file))
+        include_captions = include_captions or (meta.get("captions") is not None and os.path.exists(caption_file))
+        _build_index(index_dir,
+                     annotation_file if include_bboxes else None,
+                     caption_file if include_captions else None,
+                     include_masks or meta.get("masks", False))
+        if meta.get("directory"):
+            # Processes which already memory-mapped the old arrays can keep using them after they are deleted
+            shutil.rmtree(os.path.join(index_dir, meta["directory"]), ignore_errors=True)
+        meta = _read_meta(index_dir)
+    while True:
+        try:
+            return _load_arrays(os.path.join(index_dir, meta["directory"]), meta["arrays"])
+        except FileNotFoundError:
+            # Another process replaced the index in the meantime, so follow the metadata to the new arrays
+            new_meta = _read_meta(index_dir)
+            if new_meta.get("directory") in (None, meta["directory"]):
+                raise
+            meta = new_meta
+
+
+def _load_arrays(directory: str, names: List[str]) -> Dict[str, np.ndarray]:
+    """Load the arrays of an index.
+
+    Args:
+        directory: The directory holding the arrays.
+        names: Which arrays to load.
+
+    Returns:
+        The (memory-mapped) arrays.
+    """
+    index = {}
+    for name in names:
+        path = os.path.join(directory, name + ".npy")
+        try:
+            index[name] = np.load(path, mmap_mode='r')
+        except ValueError:
+            index[name] = np.load(path)  # Empty arrays cannot be memory-mapped
+    return index
+
+
+@traceable(blacklist=('data', 'summary', 'index', 'rows', 'valid', 'valid_indices'))
 class MSCOCODataset(DirDataset):
     """A specialized DirDataset to handle MSCOCO data.
 
     This dataset combines images from the MSCOCO data directory with their corresponding bboxes, masks, and captions.
 
+    The first time the dataset is constructed, the annotation files are parsed into a compact binary index (stored in
+    `index_dir`) which holds the bboxes, category ids, RLE-compressed masks, and captions of every image in contiguous
+    memory-mapped arrays. Later constructions re-use the index rather than parsing the (very large) JSON files again,
+    so long as the annotation files have not changed.
+
     Args:
         image_dir: The path the directory containing MSOCO images.
         annotation_file: The path to the file containing annotation data.
@@ -47,10 +296,17 @@ class MSCOCODataset(DirDataset):
         include_captions: Whether images should be paired with their associated captions. If true, images without
             captions will be ignored and other images may be oversampled in order to take their place.
         min_bbox_area: Bounding boxes with a total area less than `min_bbox_area` will be discarded.
+        index_dir: Where to store the binary annotation index. If None, it will be stored next to the `annotation_file`,
+            or under `fastestimator_data` in the user's home directory if that location is not writable.
+
+    Raises:
+        AssertionError: If masks are requested without bboxes.
     """
 
-    instances: Optional[COCO]
-    captions: Optional[COCO]
+    index: Optional[Dict[str, np.ndarray]]
+    rows: Optional[np.ndarray]  # The row of the index corresponding to each element of the data, or -1 if it has none
+    valid: Optional[np.ndarray]  # Whether each element of the data has all of the required annotations
+    valid_indices: Optional[np.ndarray]
 
     def __init__(self,
                  image_dir: str,
@@ -59,16 +315,65 @@ class MSCOCODataset(DirDataset):
                  include_bboxes: bool = True,
                  include_masks: bool = False,
                  include_captions: bool = False,
-                 min_bbox_area=1.0) -> None:
+                 min_bbox_area=1.0,
+                 index_dir: Optional[str] = None) -> None:
         super().__init__(root_dir=image_dir, data_key="image", recursive_search=False)
         if include_masks:
             assert include_bboxes, "must include bboxes with mask data"
         self.include_bboxes = include_bboxes
         self.include_masks = include_masks
+        self.include_captions = include_captions
         self.min_bbox_area = min_bbox_area
-        with Suppressor():
-            self.instances = COCO(annotation_file)
-            self.captions = COCO(caption_file) if include_captions else None
+        self.index = None
+        if include_bboxes or include_captions:
+            self.index = _load_index(index_dir,
+                                     annotation_file,
+                                     caption_file,
+                                     include_bboxes=include_bboxes,
+                                     include_masks=include_masks,
+                                     include_captions=include_captions)
+        self._find_valid_indices()
+
+    def _find_valid_indices(self) -> None:
+        """Match the data elements with their annotations, and determine which of them have all required annotations.
+        """
+        self.rows, self.valid, self.valid_indices = None, None, None
+        if self.index is None:
+            return
+        image_ids = np.array([self._image_id(self.data[idx]["image"]) for idx in range(len(self.data))],
+                             dtype=np.int64)
+        indexed_ids = self.index["image_ids"]
+        if len(indexed_ids) == 0:
+            self.rows = np.full(len(image_ids), -1, dtype=np.int64)
+            self.valid = np.zeros(len(image_ids), dtype=bool)
+            self.valid_indices = np.flatnonzero(self.valid)
+            return
+        rows = np.minimum(np.searchsorted(indexed_ids, image_ids), len(indexed_ids) - 1)
+        found = indexed_ids[rows] == image_ids
+        self.rows = np.where(found, rows, -1)
+        valid = found
+        if self.include_bboxes:
+            # Masks are stored for every bbox, so any image with a bbox also has a mask
+            boxes = self.index["boxes"]
+            large = np.concatenate([[0], np.cumsum(boxes[:, 2] * boxes[:, 3] > self.min_bbox_area)])
+            offsets = self.index["box_offsets"]
+            valid = valid & ((large[offsets[1:]] - large[offsets[:-1]])[rows] > 0)
+        if self.include_captions:
+            valid = valid & (np.diff(self.index["caption_image_offsets"])[rows] > 0)
+        self.valid = valid
+        self.valid_indices = np.flatnonzero(valid)
+
+    @staticmethod
+    def _image_id(path: str) -> int:
+        """Get the MSCOCO image id corresponding to a given image file.
+
+        Args:
+            path: The path to an image.
+
+        Returns:
+            The image id.
+        """
+        return int(os.path.splitext(os.path.basename(path))[0])
 
     def __getitem__(self, index: Union[int, str]) -> Union[Dict[str, Any], np.ndarray, List[Any]]:
         """Look up data from the dataset.
@@ -81,86 +386,105 @@ class MSCOCODataset(DirDataset):
 
         Returns:
             A data dictionary if the index was an int, otherwise a column of data in list format.
+
+        Raises:
+            ValueError: If no elements of the dataset have all of the required features.
         """
-        has_data = False
-        response = {}
-        while not has_data:
-            has_box, has_mask, has_caption = True, True, True
-            response = self._get_single_item(index)
-            if isinstance(index, str):
-                return response
-            if self.include_bboxes and not response["bbox"]:
-                has_box = False
-            if self.include_masks and not response["mask"]:
-                has_mask = False
-            if self.captions and not response["caption"]:
-                has_caption = False
-            has_data = has_box and has_mask and has_caption
-            index = np.random.randint(len(self))
-        return response
+        if isinstance(index, str):
+            return super().__getitem__(index)
+        if self.valid is not None and not self.valid[index]:
+            if len(self.valid_indices) == 0:
+                raise ValueError("None of the images in the MSCOCODataset have all of the required annotations")
+            index = int(self.valid_indices[np.random.randint(len(self.valid_indices))])
+        return self._get_single_item(index)
 
-    def _get_single_item(self, index: Union[int, str]) -> Union[Dict[str, Any], np.ndarray, List[Any]]:
+    def _get_single_item(self, index: int) -> Dict[str, Any]:
         """Look up data from the dataset.
 
         Args:
-            index: Either an int corresponding to a particular element of data, or a string in which case the
-                corresponding column of data will be returned.
+            index: Which element of the data to retrieve.
 
         Returns:
-            A data dictionary if the index was an int, otherwise a column of data in list format.
+            A data dictionary.
         """
-        response = super().__getitem__(index)
-        if isinstance(index, str):
-            return response
-        else:
-            response = deepcopy(response)
-        image = response["image"]
-        image_id = int(os.path.splitext(os.path.basename(image))[0])
-        response["image_id"] = image_id
+        response = CopyOnWriteDict(super().__getitem__(index))
+        response["image_id"] = self._image_id(response["image"])
         if self.include_bboxes:
-            self._populate_instance_data(response, image_id)
-        if self.captions:
-            self._populate_caption_data(response, image_id)
+            self._populate_instance_data(response, int(self.rows[index]))
+        if self.include_captions:
+            self._populate_caption_data(response, int(self.rows[index]))
         return response
 
-    def _populate_instance_data(self, data: Dict[str, Any], image_id: int) -> None:
+    def _populate_instance_data(self, data: Dict[str, Any], row: int) -> None:
         """Add instance data to a data dictionary.
 
         Args:
             data: The dictionary to be augmented.
-            image_id: The id of the image for which to find data.
+            row: The row of the index containing the image's annotations, or -1 if it has none.
         """
         data["bbox"] = []
         if self.include_masks:
             data["mask"] = []
-        annotation_ids = self.instances.getAnnIds(imgIds=image_id, iscrowd=False)
-        if annotation_ids:
-            annotations = self.instances.loadAnns(annotation_ids)
-            for annotation in annotations:
-                if annotation["bbox"][2] * annotation["bbox"][3] > self.min_bbox_area:
-                    data["bbox"].append(tuple(annotation['bbox'] + [annotation['category_id']]))
-                    if self.include_masks:
-                        data["mask"].append(self.instances.annToMask(annotation))
-
-    def _populate_caption_data(self, data: Dict[str, Any], image_id: int) -> None:
+        if row < 0:
+            return
+        start, stop = self.index["box_offsets"][row:row + 2]
+        boxes = self.index["boxes"][start:stop]
+        categories = self.index["categories"][start:stop]
+        for idx in np.flatnonzero(boxes[:, 2] * boxes[:, 3] > self.min_bbox_area):
+            data["bbox"].append(tuple(boxes[idx].tolist() + [int(categories[idx])]))
+            if self.include_masks:
+                data["mask"].append(self._decode_mask(start + idx))
+
+    def _decode_mask(self, annotation: int) -> np.ndarray:
+        """Decode the mask of a particular annotation.
+
+        Args:
+            annotation: The position of the annotation within the index.
+
+        Returns:
+            The mask as an HxW array of 0s and 1s.
+        """
+        start, stop = self.index["mask_offsets"][annotation:annotation + 2]
+        size = self.index["mask_sizes"][annotation].tolist()
+        return mask_util.decode({"size": size, "counts": self.index["masks"][start:stop].tobytes()})
+
+    def _populate_caption_data(self, data: Dict[str, Any], row: int) -> None:
         """Add captions to a data dictionary.
 
         Args:
             data: The dictionary to be augmented.
-            image_id: The id of the image for which to find captions.
+            row: The row of the index containing the image's captions, or -1 if it has none.
         """
         data["caption"] = []
-        annotation_ids = self.captions.getAnnIds(imgIds=image_id)
-        if annotation_ids:
-            annotations = self.captions.loadAnns(annotation_ids)
-            for annotation in annotations:
-                data["caption"].append(annotation['caption'])
+        if row < 0:
+            return
+        first, last = self.index["caption_image_offsets"][row:row + 2]
+        offsets = self.index["caption_offsets"][first:last + 1]
+        for start, stop in zip(offsets[:-1], offsets[1:]):
+            data["caption"].append(self.index["captions"][start:stop].tobytes().decode('utf-8'))
+
+    def _do_split(self, splits: Sequence[Iterable[int]]) -> List['MSCOCODataset']:
+        """Split the current dataset apart into several smaller datasets.
+
+        Args:
+            splits: Which indices to remove from the current dataset in order to create new dataset(s). One dataset will
+                be generated for every iterable within the `splits` sequence.
+
+        Returns:
+            New Datasets generated by removing data at the indices specified by `splits` from the current dataset.
+        """
+        results = super()._do_split(splits)
+        for dataset in results + [self]:
+            dataset._find_valid_indices()
+        return results
 
 
 def load_data(root_dir: Optional[str] = None,
               load_bboxes: bool = True,
               load_masks: bool = False,
-              load_captions: bool = False) -> Tuple[MSCOCODataset, MSCOCODataset]:
+              load_captions: bool = False,
+              num_threads: int = 3,
+              max_bytes_per_sec: Optional[float] = None) -> Tuple[MSCOCODataset, MSCOCODataset]:
     """Load and return the COCO dataset.
 
     Args:
@@ -169,6 +493,8 @@ def load_data(root_dir: Optional[str] = None,
         load_bboxes: Whether to load bbox-related data.
         load_masks: Whether to load mask data (in the form of an array of 1-hot images).
         load_captions: Whether to load caption-related data.
+        num_threads: How many files to download at the same time.
+        max_bytes_per_sec: The maximum combined download speed, or None for no limit.
 
     Returns:
         (train_data, eval_data)
@@ -189,17 +515,12 @@ def load_data(root_dir: Optional[str] = None,
               "annotations_trainval2017.zip",
               'http://images.cocodataset.org/annotations/annotations_trainval2017.zip')]
 
-    for data_dir, zip_name, download_url in files:
-        if not os.path.exists(data_dir):
-            zip_path = os.path.join(root_dir, zip_name)
-            # Download
-            if not os.path.exists(zip_path):
-                print("Downloading {} to {}".format(zip_name, root_dir))
-                wget.download(download_url, zip_path, bar=bar_custom)
-            # Extract
-            print("Extracting {}".format(zip_name))
-            with zipfile.ZipFile(zip_path, 'r') as zip_file:
-                zip_file.extractall(os.path.dirname(zip_path))
+    missing = [(os.path.join(root_dir, zip_name), download_url) for data_dir, zip_name, download_url in files
+               if not os.path.exists(data_dir)]
+    if missing:
+        zip_paths, download_urls = zip(*missing)
+        download_files(download_urls, zip_paths, num_threads=num_threads, max_bytes_per_sec=max_bytes_per_sec)
+        extract_archives(zip_paths, root_dir)
 
     train_annotation = os.path.join(annotation_data, "instances_train2017.json")
     eval_annotation = os.path.join(annotation_data, "instances_val2017.json")
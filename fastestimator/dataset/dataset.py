@@ -14,18 +14,23 @@
 # ==============================================================================
 import math
 import random
+import time
 from collections import defaultdict
 from copy import deepcopy
 from functools import lru_cache
-from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple, Union
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Mapping, MutableMapping, Optional, Sequence, Set, \
+    Tuple, Union
 
 import jsonpickle
 import numpy as np
 from torch.utils.data import Dataset
 
+from fastestimator.util.sketch_util import HyperLogLog
 from fastestimator.util.traceability_util import FeSplitSummary, traceable
 from fastestimator.util.util import FEID, get_shape, get_type
 
+_MAX_EXACT_SUMMARY = 1000000  # Datasets larger than this will generate approximate summaries by default
+
 
 class KeySummary:
     """A summary of the dataset attributes corresponding to a particular key.
@@ -37,15 +42,23 @@ class KeySummary:
         shape: The shape of the vectors corresponding to the key. None is used in a list to indicate that a dimension is
             ragged.
         dtype: The data type of instances corresponding to the given key.
+        estimated: Which of the other fields ('num_unique_values', 'shape', 'dtype') are estimates rather than exact
+            values, for example because they were computed from a sample of the data.
     """
     num_unique_values: Optional[int]
     shape: List[Optional[int]]
     dtype: str
+    estimated: Optional[List[str]]
 
-    def __init__(self, dtype: str, num_unique_values: Optional[int] = None, shape: List[Optional[int]] = ()) -> None:
+    def __init__(self,
+                 dtype: str,
+                 num_unique_values: Optional[int] = None,
+                 shape: List[Optional[int]] = (),
+                 estimated: Optional[Sequence[str]] = None) -> None:
         self.num_unique_values = num_unique_values
         self.shape = shape
         self.dtype = dtype
+        self.estimated = list(estimated) if estimated else None
 
     def __repr__(self):
         return "<KeySummary {}>".format(self.__getstate__())
@@ -268,8 +281,19 @@ class FEDataset(Dataset):
         """
         raise NotImplementedError
 
-    def summary(self) -> DatasetSummary:
+    def summary(self,
+                approximate: Optional[bool] = None,
+                sample_size: int = 100,
+                time_budget: float = 10.0) -> DatasetSummary:
         """Generate a summary representation of this dataset.
+
+        Args:
+            approximate: Whether to compute an approximate summary. If None, an approximate summary will be computed
+                only if the dataset is very large. See InMemoryDataset.summary() for details. Datasets which can only
+                produce one kind of summary will ignore this.
+            sample_size: How many randomly selected elements to inspect when computing an approximate summary.
+            time_budget: Roughly how many seconds an approximate summary may take.
+
         Returns:
             A summary representation of this dataset.
         """
@@ -279,17 +303,225 @@ class FEDataset(Dataset):
         return str(self.summary())
 
 
+class ColumnarRow(MutableMapping[str, Any]):
+    """A dictionary-like view of a single row of a ColumnarData object.
+
+    This class is intentionally not @traceable.
+
+    Reads are served directly from the underlying columns, and writes go through to them. Copying or pickling a row
+    produces a regular dictionary.
+
+    Args:
+        source: The ColumnarData object which holds the row.
+        index: Which row to view.
+    """
+    def __init__(self, source: 'ColumnarData', index: int) -> None:
+        self.source = source
+        self.index = index
+
+    def __getitem__(self, key: str) -> Any:
+        return self.source.columns[key][self.index]
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.source.set_value(self.index, key, value)
+
+    def __delitem__(self, key: str) -> None:
+        raise TypeError("keys cannot be deleted from an individual row of columnar data")
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.source.columns)
+
+    def __len__(self) -> int:
+        return len(self.source.columns)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+    def __copy__(self) -> Dict[str, Any]:
+        return dict(self)
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> Dict[str, Any]:
+        return deepcopy(dict(self), memo)
+
+    def __reduce__(self) -> Tuple[type, Tuple[Dict[str, Any]]]:
+        return dict, (dict(self), )
+
+
+class ColumnarData(Mapping[int, ColumnarRow]):
+    """A column-oriented replacement for the {data_index: {<instance dictionary>}} storage of an InMemoryDataset.
+
+    This class is intentionally not @traceable.
+
+    Each key is stored as a single numpy array (or list, for data which cannot be stacked) holding every instance, so
+    that column access, splitting, and summarization can be done with vectorized operations instead of per-instance
+    dictionary manipulation. Indexing with an int returns a ColumnarRow view of the corresponding instance.
+
+    Columns which are provided by the user are never modified in place. They are copied the first time one of their
+    elements is overwritten.
+
+    ```python
+    data = ColumnarData({"x": np.ones((1000, 28, 28)), "y": np.zeros(1000)})
+    data[0]  # {"x": <28x28>, "y": 0.0}
+    data.take([0, 1])  # A new ColumnarData with 2 instances
+    data.delete([0, 1])  # data now has 998 instances, re-indexed from 0
+    ```
+
+    Args:
+        columns: A dictionary like {"key1": <numpy array>, "key2": [list]}, where every value has the same length.
+
+    Raises:
+        AssertionError: If the columns have differing numbers of elements.
+    """
+    columns: Dict[str, Union[np.ndarray, List[Any]]]
+    owned: Set[str]
+
+    def __init__(self, columns: Mapping[str, Union[np.ndarray, Sequence[Any]]]) -> None:
+        self.columns = {key: val if isinstance(val, np.ndarray) else list(val) for key, val in columns.items()}
+        assert len({len(val) for val in self.columns.values()}) <= 1, \
+            "All columns must have the same number of elements"
+        self.owned = {key for key, val in self.columns.items() if val is not columns[key]}
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()))) if self.columns else 0
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(len(self)))
+
+    def __contains__(self, index: Any) -> bool:
+        return isinstance(index, (int, np.integer)) and 0 <= index < len(self)
+
+    def __getitem__(self, index: int) -> ColumnarRow:
+        if index not in self:
+            raise KeyError(index)
+        return ColumnarRow(self, int(index))
+
+    def __setitem__(self, index: int, value: Mapping[str, Any]) -> None:
+        """Overwrite (or append) an entire row of data.
+
+        Args:
+            index: Which row to overwrite. If this is equal to the current length then a new row will be appended.
+            value: The data dictionary to be stored. It must contain every key which is present in the columns.
+
+        Raises:
+            AssertionError: If the `index` or `value` are invalid.
+        """
+        size = len(self)
+        assert 0 <= index <= size, "index must be between 0 and {}, but got {}".format(size, index)
+        assert set(self.columns).issubset(value.keys()), \
+            "value must contain all of the keys {}, but only had {}".format(list(self.columns), list(value.keys()))
+        if index == size:
+            for key, column in self.columns.items():
+                if isinstance(column, np.ndarray):
+                    column = list(column)
+                self.columns[key] = column
+                self.owned.add(key)
+                column.append(value[key])
+            for key in value.keys() - self.columns.keys():
+                self.columns[key] = [None] * size + [value[key]]
+                self.owned.add(key)
+        else:
+            for key, val in value.items():
+                self.set_value(index, key, val)
+
+    def set_value(self, index: int, key: str, value: Any) -> None:
+        """Overwrite a single element of data.
+
+        Numeric array columns are written in place when the `value` has a matching shape and can be safely cast to the
+        column's dtype. Otherwise the column is converted into a list so that it can hold arbitrary values.
+
+        Args:
+            index: Which row to modify.
+            key: Which column to modify. A new column will be created if it does not already exist.
+            value: The new value.
+        """
+        if key not in self.columns:
+            self.columns[key] = [None] * len(self)
+            self.owned.add(key)
+        column = self.columns[key]
+        if isinstance(column, np.ndarray):
+            array = np.asarray(value)
+            if column.dtype.kind in "biufc" and array.shape == column.shape[1:] and np.can_cast(
+                    array.dtype, column.dtype, casting='safe'):
+                if key not in self.owned:
+                    column = self.columns[key] = column.copy()
+                    self.owned.add(key)
+                column[index] = value
+                return
+            column = self.columns[key] = list(column)
+            self.owned.add(key)
+        elif key not in self.owned:
+            column = self.columns[key] = list(column)
+            self.owned.add(key)
+        column[index] = value
+
+    def column(self, key: str) -> Union[np.ndarray, List[Any]]:
+        """Get all of the data for a given key.
+
+        Args:
+            key: Which column to retrieve.
+
+        Returns:
+            The column itself (not a copy).
+        """
+        return self.columns[key]
+
+    def set_column(self, key: str, value: Union[np.ndarray, Sequence[Any]]) -> None:
+        """Replace (or create) all of the data for a given key.
+
+        Args:
+            key: Which column to replace.
+            value: The new data, which must have the same length as the existing columns.
+
+        Raises:
+            AssertionError: If the `value` has the wrong length.
+        """
+        if self.columns:
+            assert len(value) == len(self), \
+                "input value must be of length {}, but had length {}".format(len(self), len(value))
+        self.columns[key] = value if isinstance(value, np.ndarray) else list(value)
+        self.owned.discard(key)
+
+    def take(self, indices: Sequence[int]) -> 'ColumnarData':
+        """Gather a subset of the rows into a new object.
+
+        Args:
+            indices: Which rows to gather, in order.
+
+        Returns:
+            A new ColumnarData containing copies of the requested rows.
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        return ColumnarData({
+            key: column[indices] if isinstance(column, np.ndarray) else [column[idx] for idx in indices]
+            for key, column in self.columns.items()
+        })
+
+    def delete(self, indices: Sequence[int]) -> None:
+        """Remove rows in place, re-indexing the remaining rows to be contiguous from 0.
+
+        Args:
+            indices: Which rows to remove.
+        """
+        keep = np.ones(len(self), dtype=bool)
+        keep[np.asarray(indices, dtype=np.int64)] = False
+        kept = np.flatnonzero(keep)
+        for key, column in self.columns.items():
+            self.columns[key] = column[keep] if isinstance(column, np.ndarray) else [column[idx] for idx in kept]
+            self.owned.add(key)
+
+
 @traceable(blacklist=('data', 'summary'))
 class InMemoryDataset(FEDataset):
     """A dataset abstraction to simplify the implementation of datasets which hold their data in memory.
 
     Args:
-        data: A dictionary like {data_index: {<instance dictionary>}}.
+        data: A dictionary like {data_index: {<instance dictionary>}}, or a ColumnarData object. The latter allows
+            column access, splitting, and summarization to be performed as vectorized operations.
     """
-    data: Dict[int, Dict[str, Any]]  # Index-based data dictionary
+    data: Union[Dict[int, Dict[str, Any]], ColumnarData]  # Index-based data dictionary
     summary: lru_cache
 
-    def __init__(self, data: Dict[int, Dict[str, Any]]) -> None:
+    def __init__(self, data: Union[Dict[int, Dict[str, Any]], ColumnarData]) -> None:
         self.data = data
         # Normally lru cache annotation is shared over all class instances, so calling cache_clear would reset all
         # caches (for example when calling .split()). Instead we make the lru cache per-instance
@@ -316,6 +548,11 @@ class InMemoryDataset(FEDataset):
         """
         if isinstance(index, int):
             return self.data[index]
+        elif isinstance(self.data, ColumnarData):
+            column = self.data.column(index)
+            if isinstance(column, np.ndarray) and column.ndim > 1:
+                return np.array(column)
+            return list(column)
         else:
             result = [elem[index] for elem in self.data.values()]
             if isinstance(result[0], np.ndarray):
@@ -344,6 +581,8 @@ class InMemoryDataset(FEDataset):
         if isinstance(key, int):
             assert isinstance(value, Dict), "if setting a value using an integer index, must provide a dictionary"
             self.data[key] = value
+        elif isinstance(self.data, ColumnarData):
+            self.data.set_column(key, value)
         else:
             assert len(value) == len(self.data), \
                 "input value must be of length {}, but had length {}".format(len(self.data), len(value))
@@ -351,7 +590,7 @@ class InMemoryDataset(FEDataset):
                 self.data[i][key] = value[i]
         self.summary.cache_clear()
 
-    def _skip_init(self, data: Dict[int, Dict[str, Any]], **kwargs) -> 'InMemoryDataset':
+    def _skip_init(self, data: Union[Dict[int, Dict[str, Any]], ColumnarData], **kwargs) -> 'InMemoryDataset':
         """A helper method to create new dataset instances without invoking their __init__ methods.
 
         Args:
@@ -382,6 +621,14 @@ class InMemoryDataset(FEDataset):
             New Datasets generated by removing data at the indices specified by `splits` from the current dataset.
         """
         results = []
+        if isinstance(self.data, ColumnarData):
+            splits = [list(split) for split in splits]
+            for split in splits:
+                results.append(
+                    self._skip_init(self.data.take(split), **{k: v for k, v in self.__dict__.items() if k != 'data'}))
+            self.data.delete([idx for split in splits for idx in split])
+            self.summary.cache_clear()
+            return results
         for split in splits:
             data = {new_idx: self.data.pop(old_idx) for new_idx, old_idx in enumerate(split)}
             results.append(self._skip_init(data, **{k: v for k, v in self.__dict__.items() if k not in {'data'}}))
@@ -390,11 +637,31 @@ class InMemoryDataset(FEDataset):
         self.summary.cache_clear()
         return results
 
-    def summary(self) -> DatasetSummary:
+    def summary(self,
+                approximate: Optional[bool] = None,
+                sample_size: int = 100,
+                time_budget: float = 10.0) -> DatasetSummary:
         """Generate a summary representation of this dataset.
+
+        An exact summary counts the unique values of each key by visiting every element of the dataset, which can take
+        minutes for very large datasets. An approximate summary instead infers shapes and dtypes from a random sample of
+        elements, and estimates the number of unique values with a HyperLogLog sketch, subject to a time budget. The
+        `estimated` attribute of each KeySummary indicates which of its fields are not exact.
+
+        Args:
+            approximate: Whether to compute an approximate summary. If None, an approximate summary will be computed
+                only if the dataset contains more than 1 million elements.
+            sample_size: How many randomly selected elements to inspect in order to infer shapes and dtypes when
+                computing an approximate summary.
+            time_budget: Roughly how many seconds an approximate summary may take. If the budget runs out before every
+                element has been visited, the unique values will only be counted over the elements visited so far.
+
         Returns:
             A summary representation of this dataset.
         """
+        if approximate is None:
+            approximate = len(self) > _MAX_EXACT_SUMMARY
+        deadline = time.perf_counter() + time_budget
         # We will check whether the dataset is doing additional pre-processing on top of the self.data keys. If not we
         # can extract extra information about the data without incurring a large computational time cost
         final_example = self[0]
@@ -403,6 +670,8 @@ class InMemoryDataset(FEDataset):
         shapes = {}
         dtypes = {}
         n_unique_vals = defaultdict(lambda: 0)
+        estimated = defaultdict(list)
+        countable = []
         for key in keys:
             final_val = final_example[key]
             # TODO - if val is empty list, should find a sample which has entries
@@ -418,10 +687,120 @@ class InMemoryDataset(FEDataset):
                 # If no changes, then we can relatively quickly count the unique values using self.data
                 if dtypes[key] == original_dtype and shapes[key] == original_shape and isinstance(
                         original_val, Hashable):
-                    n_unique_vals[key] = len({self.data[i][key] for i in range(len(self.data))})
+                    countable.append(key)
+
+        if approximate:
+            num_sampled = self._sample_shapes(shapes, dtypes, sample_size, deadline)
+            if num_sampled < len(self):
+                for key in keys:
+                    estimated[key].extend(['shape', 'dtype'])
+            n_unique_vals.update(self._estimate_unique(countable, deadline))
+            for key in countable:
+                estimated[key].append('num_unique_values')
+        else:
+            for key in countable:
+                n_unique_vals[key] = self._count_unique(key)
 
         key_summary = {
-            key: KeySummary(dtype=dtypes[key], num_unique_values=n_unique_vals[key] or None, shape=shapes[key])
+            key: KeySummary(dtype=dtypes[key],
+                            num_unique_values=n_unique_vals[key] or None,
+                            shape=shapes[key],
+                            estimated=estimated[key])
             for key in keys
         }
         return DatasetSummary(num_instances=len(self), keys=key_summary)
+
+    def _sample_shapes(self,
+                       shapes: Dict[str, List[Optional[int]]],
+                       dtypes: Dict[str, str],
+                       sample_size: int,
+                       deadline: float) -> int:
+        """Refine the inferred shapes and dtypes of the data by inspecting a random sample of elements.
+
+        Since the dataset supports random access, the sample is drawn directly rather than by reservoir sampling.
+
+        Args:
+            shapes: The shape of each key, which will be updated in place. Dimensions which vary are set to None.
+            dtypes: The dtype of each key, which will be updated in place. Keys with multiple dtypes are reported as
+                'dtype1|dtype2'.
+            sample_size: How many elements to inspect.
+            deadline: A time (according to time.perf_counter) after which to stop inspecting elements.
+
+        Returns:
+            How many elements were inspected, including the first element of the dataset.
+        """
+        num_sampled = 1
+        sample_size = min(sample_size, len(self))
+        if sample_size < 2:
+            return num_sampled
+        seen_dtypes = {key: {dtype} for key, dtype in dtypes.items()}
+        indices = np.random.default_rng(0).choice(len(self) - 1, size=sample_size - 1, replace=False) + 1
+        for index in indices:
+            if time.perf_counter() > deadline:
+                break
+            example = self[int(index)]
+            num_sampled += 1
+            for key in shapes.keys() & example.keys():
+                shape = get_shape(example[key])
+                if len(shapes[key]) != len(shape):
+                    shapes[key] = [None] * max(len(shapes[key]), len(shape))
+                else:
+                    shapes[key] = [a if a == b else None for a, b in zip(shapes[key], shape)]
+                seen_dtypes[key].add(get_type(example[key]))
+        for key, seen in seen_dtypes.items():
+            dtypes[key] = "|".join(sorted(seen))
+        return num_sampled
+
+    def _estimate_unique(self, keys: List[str], deadline: float, chunk_size: int = 4096) -> Dict[str, int]:
+        """Estimate how many unique values are stored under the given `keys` of the data.
+
+        The data is visited in randomly ordered chunks, so that if the `deadline` is reached the visited elements are
+        spread throughout the dataset.
+
+        Args:
+            keys: The keys to inspect. Their values must be hashable.
+            deadline: A time (according to time.perf_counter) after which to stop visiting elements.
+            chunk_size: How many consecutive elements to visit at a time.
+
+        Returns:
+            The estimated number of unique values for each key.
+        """
+        sketches = {key: HyperLogLog() for key in keys}
+        remaining = []
+        for key in keys:
+            if isinstance(self.data, ColumnarData):
+                column = self.data.column(key)
+                if isinstance(column, np.ndarray) and column.ndim == 1 and column.dtype.kind in 'biuf':
+                    sketches[key].add_array(column)  # Vectorized numeric columns are cheap enough to always finish
+                    continue
+            remaining.append(key)
+        if remaining:
+            num_rows = len(self.data)
+            for start in np.random.default_rng(0).permutation(np.arange(0, num_rows, chunk_size)):
+                stop = min(int(start) + chunk_size, num_rows)
+                if isinstance(self.data, ColumnarData):
+                    for key in remaining:
+                        sketches[key].add(self.data.column(key)[start:stop])
+                else:
+                    rows = [self.data[idx] for idx in range(start, stop)]
+                    for key in remaining:
+                        sketches[key].add(row[key] for row in rows)
+                if time.perf_counter() > deadline:
+                    break
+        return {key: max(1, sketch.count()) for key, sketch in sketches.items()}
+
+    def _count_unique(self, key: str) -> int:
+        """Count how many unique values are stored under a given `key` of the data.
+
+        Args:
+            key: The key to inspect. Its values must be hashable.
+
+        Returns:
+            The number of unique values.
+        """
+        if isinstance(self.data, ColumnarData):
+            column = self.data.column(key)
+            if isinstance(column, np.ndarray) and column.ndim == 1 and not column.dtype.hasobject:
+                return len(np.unique(column))
+            return len(set(column))
+        return len({self.data[i][key] for i in range(len(self.data))})
@@ -16,6 +16,7 @@ import os
 from typing import Dict, Optional
 
 from fastestimator.dataset.dataset import InMemoryDataset
+from fastestimator.util.dir_util import scan_dir
 from fastestimator.util.traceability_util import traceable
 
 
@@ -23,11 +24,19 @@ from fastestimator.util.traceability_util import traceable
 class DirDataset(InMemoryDataset):
     """A dataset which reads files from a folder hierarchy like root/data.file.
 
+    Directories are scanned in parallel, and the resulting file list can optionally be persisted to a `manifest` which
+    will be reused for as long as the directory contents do not change. This avoids lengthy re-scans of large
+    directories (especially on network file systems) every time the dataset is constructed. Files are sorted by path.
+
     Args:
         root_dir: The path to the directory containing data.
         data_key: What key to assign to the data values in the data dictionary.
         file_extension: If provided then only files ending with the file_extension will be included.
         recursive_search: Whether to search within subdirectories for files.
+        num_threads: How many threads to use when scanning the directory tree. If None, a default based on the number
+            of CPUs will be used.
+        manifest: A file path at which to save the directory listing, so that it can be reused the next time the dataset
+            is constructed. If None, the directory will be scanned every time.
     """
     data: Dict[int, Dict[str, str]]
 
@@ -35,20 +44,14 @@ class DirDataset(InMemoryDataset):
                  root_dir: str,
                  data_key: str = "x",
                  file_extension: Optional[str] = None,
-                 recursive_search: bool = True) -> None:
-        data = []
+                 recursive_search: bool = True,
+                 num_threads: Optional[int] = None,
+                 manifest: Optional[str] = None) -> None:
         root_dir = os.path.normpath(root_dir)
-        if not os.path.isdir(root_dir):
-            raise AssertionError("Provided path is not a directory")
-        try:
-            for root, dirs, files in os.walk(root_dir):
-                for file_name in files:
-                    if file_name.startswith(".") or (file_extension is not None
-                                                     and not file_name.endswith(file_extension)):
-                        continue
-                    data.append((os.path.join(root, file_name), os.path.basename(root)))
-                if not recursive_search:
-                    break
-        except StopIteration:
-            raise ValueError("Invalid directory structure for DirDataset at root: {}".format(root_dir))
-        super().__init__({i: {data_key: data[i][0]} for i in range(len(data))})
+        listing = scan_dir(root_dir,
+                           file_extension=file_extension,
+                           recursive=recursive_search,
+                           num_threads=num_threads,
+                           manifest=manifest)
+        data = [os.path.join(root_dir, rel_dir, file) for rel_dir, files in listing.items() for file in files]
+        super().__init__({i: {data_key: data[i]} for i in range(len(data))})
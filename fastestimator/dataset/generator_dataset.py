@@ -14,7 +14,7 @@
 # ==============================================================================
 import warnings
 from functools import lru_cache
-from typing import Any, Dict, Generator, Iterable, List, Sequence, Sized
+from typing import Any, Dict, Generator, Iterable, List, Optional, Sequence, Sized
 
 from fastestimator.dataset.dataset import DatasetSummary, FEDataset, KeySummary
 from fastestimator.util.traceability_util import traceable
@@ -65,8 +65,19 @@ class GeneratorDataset(FEDataset):
             self.samples_per_epoch -= size
         return results
 
-    def summary(self) -> DatasetSummary:
+    def summary(self,
+                approximate: Optional[bool] = None,
+                sample_size: int = 100,
+                time_budget: float = 10.0) -> DatasetSummary:
         """Generate a summary representation of this dataset.
+
+        The summary is always inferred from a single sample, so it is inherently approximate.
+
+        Args:
+            approximate: Unused.
+            sample_size: Unused.
+            time_budget: Unused.
+
         Returns:
             A summary representation of this dataset.
         """
@@ -13,10 +13,10 @@
 # limitations under the License.
 # ==============================================================================
 import os
-from collections import deque
 from typing import Any, Dict, Optional
 
 from fastestimator.dataset.dataset import DatasetSummary, InMemoryDataset
+from fastestimator.util.dir_util import scan_dir
 from fastestimator.util.traceability_util import traceable
 
 
@@ -30,6 +30,10 @@ class LabeledDirDataset(InMemoryDataset):
         label_key: What key to assign to the label values in the data dictionary.
         label_mapping: A dictionary defining the mapping to use. If not provided will map classes to int labels.
         file_extension: If provided then only files ending with the file_extension will be included.
+        num_threads: How many threads to use when scanning the directory tree. If None, a default based on the number
+            of CPUs will be used.
+        manifest: A file path at which to save the directory listing, so that it can be reused the next time the dataset
+            is constructed. If None, the directory will be scanned every time. See fe.util.scan_dir() for details.
     """
     data: Dict[int, Dict[str, Any]]
     mapping: Dict[str, Any]
@@ -40,21 +44,13 @@ class LabeledDirDataset(InMemoryDataset):
                  data_key: str = "x",
                  label_key: str = "y",
                  label_mapping: Optional[Dict[str, Any]] = None,
-                 file_extension: Optional[str] = None) -> None:
+                 file_extension: Optional[str] = None,
+                 num_threads: Optional[int] = None,
+                 manifest: Optional[str] = None) -> None:
         # Recursively find all the data
         root_dir = os.path.normpath(root_dir)
-        data = {}
-        keys = deque([""])
-        for _, dirs, entries in os.walk(root_dir):
-            key = keys.popleft()
-            dirs = [os.path.join(key, d) for d in dirs]
-            dirs.reverse()
-            keys.extendleft(dirs)
-            entries = [
-                os.path.join(key, e) for e in entries if not e.startswith(".") and e.endswith(file_extension or "")
-            ]
-            if entries:
-                data[key] = entries
+        listing = scan_dir(root_dir, file_extension=file_extension, num_threads=num_threads, manifest=manifest)
+        data = {key: [os.path.join(key, e) for e in entries] for key, entries in listing.items()}
         # Compute label mappings
         self.mapping = label_mapping or {label: idx for idx, label in enumerate(sorted(data.keys()))}
         assert self.mapping.keys() >= data.keys(), \
@@ -71,12 +67,22 @@ class LabeledDirDataset(InMemoryDataset):
         self.label_key = label_key
         super().__init__(parsed_data)
 
-    def summary(self) -> DatasetSummary:
+    def summary(self,
+                approximate: Optional[bool] = None,
+                sample_size: int = 100,
+                time_budget: float = 10.0) -> DatasetSummary:
         """Generate a summary representation of this dataset.
+
+        Args:
+            approximate: Whether to compute an approximate summary. If None, an approximate summary will be computed
+                only if the dataset is very large. See InMemoryDataset.summary() for details.
+            sample_size: How many randomly selected elements to inspect when computing an approximate summary.
+            time_budget: Roughly how many seconds an approximate summary may take.
+
         Returns:
             A summary representation of this dataset.
         """
-        summary = super().summary()
+        summary = super().summary(approximate=approximate, sample_size=sample_size, time_budget=time_budget)
         summary.class_key = self.label_key
         summary.class_key_mapping = self.mapping
         summary.num_classes = len(self.mapping)
@@ -16,7 +16,7 @@ from typing import Dict, List, Union
 
 import numpy as np
 
-from fastestimator.dataset.dataset import InMemoryDataset
+from fastestimator.dataset.dataset import ColumnarData, InMemoryDataset
 from fastestimator.util.traceability_util import traceable
 
 
@@ -24,6 +24,9 @@ from fastestimator.util.traceability_util import traceable
 class NumpyDataset(InMemoryDataset):
     """A dataset constructed from a dictionary of Numpy data or list of data.
 
+    The data is stored column-wise rather than being broken apart into per-instance dictionaries, so column access,
+    splitting, and summarization are vectorized, and no extra memory is required to hold the dataset.
+
     Args:
         data: A dictionary of data like {"key1": <numpy array>, "key2": [list]}.
     Raises:
@@ -43,4 +46,4 @@ class NumpyDataset(InMemoryDataset):
                 assert size == current_size, "All data arrays must have the same number of elements"
             else:
                 size = current_size
-        super().__init__({i: {k: v[i] for k, v in data.items()} for i in range(size)})
+        super().__init__(ColumnarData(data))
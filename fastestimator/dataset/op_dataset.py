@@ -12,16 +12,36 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ==============================================================================
-from copy import deepcopy
-from typing import Any, List, Mapping
+import time
+import uuid
+from typing import Any, Dict, List, Mapping, MutableMapping, Optional, Set
 
 import numpy as np
 from torch.utils.data import Dataset
 
 from fastestimator.dataset import BatchDataset
 from fastestimator.op.numpyop.numpyop import NumpyOp, forward_numpyop
+from fastestimator.util.cache_util import SharedCache
 from fastestimator.util.traceability_util import traceable
-from fastestimator.util.util import pad_batch
+from fastestimator.util.util import CopyOnWriteDict, pad_batch
+
+
+def _stack(values: List[Any]) -> np.ndarray:
+    """Combine the values of a particular key from every element of a batch into a single array.
+
+    Arrays which all share the same shape are copied straight into a single preallocated output, which avoids the
+    element-by-element shape and type discovery that np.array performs on a list.
+
+    Args:
+        values: The values to be combined.
+
+    Returns:
+        An array whose first dimension corresponds to the elements of `values`.
+    """
+    shape = getattr(values[0], 'shape', None)
+    if isinstance(values[0], np.ndarray) and all(isinstance(val, np.ndarray) and val.shape == shape for val in values):
+        return np.stack(values)
+    return np.array(values)
 
 
 @traceable()
@@ -35,13 +55,42 @@ class OpDataset(Dataset):
         dataset: The base dataset to wrap.
         ops: A list of ops to be applied after the base `dataset` `__getitem__` is invoked.
         mode: What mode the system is currently running in ('train', 'eval', 'test', or 'infer').
+        cache: A cache in which to store the outputs of the first `num_cached_ops` ops for each index, or None to
+            disable caching. Caching is not supported for BatchDatasets.
+        num_cached_ops: How many of the leading `ops` are deterministic, such that their outputs may be cached.
+        output_keys: Which keys to return. Any other keys are discarded before the data leaves this dataset, so that
+            they don't need to be collated or transferred between processes. If None, all keys are returned.
+        seed: A seed for re-arranging the index maps of a BatchDataset, or None to use the global random state.
+        cache_namespace: A unique identifier for the owner of this dataset (ex. a Pipeline), which prevents its cache
+            entries from being confused with those of anyone else sharing the same `cache`. This is necessary since the
+            ids of garbage-collected datasets and ops may be re-used by new ones. Cache entries are only re-used between
+            OpDatasets with the same namespace. If None, a new namespace will be generated.
     """
-    def __init__(self, dataset: Dataset, ops: List[NumpyOp], mode: str) -> None:
+    def __init__(self,
+                 dataset: Dataset,
+                 ops: List[NumpyOp],
+                 mode: str,
+                 cache: Optional[SharedCache] = None,
+                 num_cached_ops: int = 0,
+                 output_keys: Optional[Set[str]] = None,
+                 seed: Optional[int] = None,
+                 cache_namespace: Optional[str] = None) -> None:
         self.dataset = dataset
+        self.output_keys = output_keys
         if isinstance(self.dataset, BatchDataset):
-            self.dataset.reset_index_maps()
+            self.dataset.reset_index_maps(seed=seed)
+            cache = None
         self.ops = ops
         self.mode = mode
+        self.cache = cache if num_cached_ops > 0 else None
+        self.num_cached_ops = num_cached_ops
+        # Entries are only valid for this exact dataset and op prefix, which may change between epochs via a Scheduler
+        signature = hash((id(dataset), ) + tuple(id(op) for op in ops[:num_cached_ops])) & 0xFFFFFFFFFFFFFFFF
+        self.cache_prefix = "{}_{}_{:x}_".format(cache_namespace or uuid.uuid4().hex, mode, signature)
+        # Profiling information for Pipeline.benchmark
+        self.profile = False
+        self.op_times = [[] for _ in ops]
+        self.fetch_start = None
 
     def __getitem__(self, index: int) -> Mapping[str, Any]:
         """Fetch a data instance at a specified index, and apply transformations to it.
@@ -52,20 +101,80 @@ class OpDataset(Dataset):
         Returns:
             The data dictionary from the specified index, with transformations applied.
         """
-        items = deepcopy(self.dataset[index])  # Deepcopy to prevent ops from overwriting values in datasets
+        if self.profile and self.fetch_start is None:
+            self.fetch_start = time.perf_counter()
+        if self.cache is not None:
+            key = self.cache_prefix + str(index)
+            items = self.cache.get(key)
+            if items is None:
+                items = CopyOnWriteDict(self.dataset[index])
+                self._forward(items, 0, self.num_cached_ops)
+                self.cache.put(key, items.to_dict())
+            items = CopyOnWriteDict(items)
+            self._forward(items, self.num_cached_ops, len(self.ops))
+            return self._select(items)
+        items = self.dataset[index]
         if isinstance(self.dataset, BatchDataset):
             # BatchDataset may randomly sample the same elements multiple times, so need to avoid reprocessing
-            unique_samples = set()
-            for item in items:
+            unique_samples = {}
+            for idx, item in enumerate(items):
                 if id(item) not in unique_samples:
-                    forward_numpyop(self.ops, item, {'mode': self.mode})
-                    unique_samples.add(id(item))
+                    # Copy-on-write to prevent ops from overwriting values in datasets
+                    unique_samples[id(item)] = CopyOnWriteDict(item)
+                    self._forward(unique_samples[id(item)], 0, len(self.ops))
+                items[idx] = unique_samples[id(item)]
+            items = [self._select(item) for item in items]
             if self.dataset.pad_value is not None:
                 pad_batch(items, self.dataset.pad_value)
-            items = {key: np.array([item[key] for item in items]) for key in items[0]}
+            items = {key: _stack([item[key] for item in items]) for key in items[0]}
         else:
-            forward_numpyop(self.ops, items, {'mode': self.mode})
+            items = CopyOnWriteDict(items)  # Copy-on-write to prevent ops from overwriting values in datasets
+            self._forward(items, 0, len(self.ops))
+            items = self._select(items)
         return items
 
+    def _select(self, data: CopyOnWriteDict) -> Dict[str, Any]:
+        """Discard any keys which are not part of the `output_keys`.
+
+        Arrays which no op has touched are returned as read-only views of the underlying dataset rather than copies.
+
+        Args:
+            data: The data dictionary to be filtered.
+
+        Returns:
+            A new dictionary containing only the required keys (or all of the keys if `output_keys` is None).
+        """
+        return data.to_dict(keys=self.output_keys)
+
+    def _forward(self, data: MutableMapping[str, Any], start: int, stop: int) -> None:
+        """Run a slice of the ops on a data dictionary, recording the time taken by each op if profiling is enabled.
+
+        Args:
+            data: The data dictionary to be modified in place.
+            start: The index of the first op to run.
+            stop: The index after the last op to run.
+        """
+        if not self.profile:
+            forward_numpyop(self.ops[start:stop], data, {'mode': self.mode})
+            return
+        for idx in range(start, stop):
+            op_start = time.perf_counter()
+            forward_numpyop([self.ops[idx]], data, {'mode': self.mode})
+            self.op_times[idx].append(time.perf_counter() - op_start)
+
+    def pop_profile(self) -> Optional[Mapping[str, Any]]:
+        """Retrieve and reset the profiling information collected since the last call to this method.
+
+        Returns:
+            None if profiling is disabled, otherwise a dictionary containing the per-op execution times (in seconds) and
+            the time at which the first sample was fetched.
+        """
+        if not self.profile:
+            return None
+        profile = {"op_times": self.op_times, "fetch_start": self.fetch_start}
+        self.op_times = [[] for _ in self.ops]
+        self.fetch_start = None
+        return profile
+
     def __len__(self):
         return len(self.dataset)
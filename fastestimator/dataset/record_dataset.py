@@ -0,0 +1,338 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+import json
+import mmap
+import os
+import shutil
+import tempfile
+import uuid
+from functools import lru_cache
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+from fastestimator.dataset.batch_dataset import BatchDataset
+from fastestimator.dataset.dataset import DatasetSummary, FEDataset, KeySummary
+from fastestimator.op.numpyop.numpyop import NumpyOp, forward_numpyop
+from fastestimator.schedule.schedule import Scheduler, get_current_items
+from fastestimator.util.cache_util import _aligned, decode_entry, encode_entry, write_entry
+from fastestimator.util.traceability_util import traceable
+from fastestimator.util.util import CopyOnWriteDict, get_shape, get_type
+
+_INDEX_FILE = "index.npy"
+_META_FILE = "meta.json"
+_MAX_UNIQUE = 1000000  # Stop counting unique values for a key once there are more than this many of them
+
+
+@traceable(blacklist=('index', 'buffers', 'summary'))
+class RecordDataset(FEDataset):
+    """A dataset which reads from sharded record files written by `RecordDataset.write`.
+
+    Every record is stored at a 64 byte aligned offset within a large shard file, with numeric numpy arrays kept in
+    their raw binary form. The shards are memory-mapped when they are first accessed, so arrays are returned as
+    read-only zero-copy views, and the OS page cache is shared between all of the data loader worker processes. Reading
+    sequentially through the data results in sequential disk I/O, and no per-sample file system metadata lookups are
+    required.
+
+    ```python
+    fe.dataset.RecordDataset.write(source=fe.dataset.DirDataset(...), save_dir="/data/records")
+    ds = fe.dataset.RecordDataset("/data/records")
+    ds[0]  # {"x": <read-only array>}
+    ```
+
+    Args:
+        root_dir: The directory containing the records.
+
+    Raises:
+        AssertionError: If the `root_dir` does not contain a record index.
+    """
+    index: np.ndarray  # An Nx3 array of (shard, offset, size) for each record
+    buffers: Dict[int, mmap.mmap]
+    summary: lru_cache
+
+    def __init__(self, root_dir: str) -> None:
+        self.root_dir = os.path.normpath(root_dir)
+        assert os.path.exists(os.path.join(self.root_dir, _META_FILE)), \
+            "No record index found in {}".format(self.root_dir)
+        with open(os.path.join(self.root_dir, _META_FILE), 'r') as file:
+            meta = json.load(file)
+        # Records written by older versions are stored directly in the root_dir rather than in a subdirectory
+        directory = meta.get('directory', '')
+        self.shards = [os.path.join(directory, shard) for shard in meta['shards']]
+        self.keys = meta['keys']
+        self.num_records = meta['num_records']
+        self.index = np.load(os.path.join(self.root_dir, directory, _INDEX_FILE))
+        self.buffers = {}
+        self.summary = lru_cache(maxsize=1)(self.summary)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        """Look up data from the dataset.
+
+        Args:
+            index: Which record to retrieve.
+
+        Returns:
+            The data dictionary from the specified index. Numeric arrays are read-only views into the shard files.
+        """
+        shard, offset, _ = self.index[index]
+        buffer = self.buffers.get(shard)
+        if buffer is None:
+            with open(os.path.join(self.root_dir, self.shards[shard]), 'rb') as file:
+                buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.buffers[shard] = buffer
+        return decode_entry(buffer, int(offset))
+
+    def _do_split(self, splits: Sequence[Iterable[int]]) -> List['RecordDataset']:
+        """Split the current dataset apart into several smaller datasets.
+
+        Args:
+            splits: Which indices to remove from the current dataset in order to create new dataset(s). One dataset will
+                be generated for every iterable within the `splits` sequence.
+
+        Returns:
+            New Datasets generated by removing data at the indices specified by `splits` from the current dataset.
+        """
+        splits = [np.fromiter(split, dtype=np.int64) for split in splits]
+        results = []
+        for split in splits:
+            obj = self.__class__.__new__(self.__class__)
+            for k, v in self.__dict__.items():
+                if k not in {'index', 'buffers', 'summary'}:
+                    obj.__setattr__(k, v)
+            obj.index = self.index[split]
+            obj.buffers = {}
+            obj.summary = lru_cache(maxsize=1)(obj.summary)
+            results.append(obj)
+        self.index = np.delete(self.index, np.concatenate(splits), axis=0)
+        self.summary.cache_clear()
+        return results
+
+    def summary(self,
+                approximate: Optional[bool] = None,
+                sample_size: int = 100,
+                time_budget: float = 10.0) -> DatasetSummary:
+        """Generate a summary representation of this dataset.
+
+        The summary is computed from the information which was recorded when the dataset was written, so no records
+        need to be read. The number of unique values is only reported if the dataset has not been split.
+
+        Args:
+            approximate: Unused, since the recorded summary is already cheap to compute.
+            sample_size: Unused.
+            time_budget: Unused.
+
+        Returns:
+            A summary representation of this dataset.
+        """
+        split = len(self) != self.num_records
+        keys = {
+            key: KeySummary(dtype=info['dtype'],
+                            num_unique_values=None if split else info['num_unique_values'],
+                            shape=info['shape'])
+            for key, info in self.keys.items()
+        }
+        return DatasetSummary(num_instances=len(self), keys=keys)
+
+    @classmethod
+    def write(cls,
+              source: Union[FEDataset, 'Pipeline'],
+              save_dir: str,
+              mode: str = "train",
+              epoch: int = 1,
+              num_ops: Optional[int] = None,
+              shard_size: int = 2**28) -> 'RecordDataset':
+        """Write a dataset to disk in the record format.
+
+        The shards and index are written into a private temporary directory which is then renamed into place, after
+        which the metadata file pointing at it is atomically replaced. An interrupted write therefore never leaves a
+        partial dataset behind, and overwriting an existing `save_dir` only replaces its records once the new ones are
+        complete. RecordDatasets which were already reading from the old records must be re-created afterwards.
+
+        ```python
+        pipeline = fe.Pipeline(train_data=fe.dataset.DirDataset(...), ops=[ReadImage(...), Resize(...), ...])
+        ds = fe.dataset.RecordDataset.write(source=pipeline, save_dir="/data/records")  # Stores the resized images
+        ```
+
+        Args:
+            source: Where to get the data. If this is a Pipeline, then the dataset for the given `mode` and `epoch` will
+                be written after applying the leading ops of the Pipeline to each sample. A new Pipeline which reads
+                from the resulting RecordDataset should then only contain the remaining ops.
+            save_dir: The directory to write the records into. It will be created if it does not exist.
+            mode: The mode to use when the `source` is a Pipeline.
+            epoch: The epoch to use when the `source` is a Pipeline.
+            num_ops: How many of the Pipeline ops to apply before writing. If None, all of the leading ops which are
+                known to be deterministic will be applied.
+            shard_size: The approximate maximum number of bytes to write into each shard file. Records larger than this
+                will be placed in a shard of their own.
+
+        Returns:
+            A RecordDataset which reads from the newly written records.
+
+        Raises:
+            AssertionError: If the data can't be written.
+        """
+        from fastestimator.pipeline import Pipeline  # Avoid circular import
+        ops = []
+        if isinstance(source, Pipeline):
+            data = source.data[mode]
+            if isinstance(data, Scheduler):
+                data = data.get_current_value(epoch)
+            ops = get_current_items(source.ops, mode, epoch)
+            ops = ops[:Pipeline._get_num_deterministic_ops(ops) if num_ops is None else num_ops]
+        else:
+            data = source
+        assert isinstance(data, FEDataset), "RecordDataset can only be written from an FEDataset"
+        assert not isinstance(data, BatchDataset), "RecordDataset does not support writing BatchDatasets"
+        assert shard_size > 0, "shard_size must be positive"
+        os.makedirs(save_dir, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(prefix=".tmp_", dir=save_dir)
+        tmp_meta = os.path.join(save_dir, ".{}.{}.tmp".format(_META_FILE, uuid.uuid4().hex))
+        directory = "records_{}".format(uuid.uuid4().hex)
+        try:
+            meta = cls._write_records(data, ops, mode, shard_size, tmp_dir)
+            meta['directory'] = directory
+            os.rename(tmp_dir, os.path.join(save_dir, directory))
+            # The metadata is written last, so that an interrupted write will not be mistaken for a complete one
+            with open(tmp_meta, 'w') as meta_file:
+                json.dump(meta, meta_file, indent=4)
+            old_meta = cls._read_meta(save_dir)
+            os.replace(tmp_meta, os.path.join(save_dir, _META_FILE))
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            shutil.rmtree(os.path.join(save_dir, directory), ignore_errors=True)
+            if os.path.exists(tmp_meta):
+                os.remove(tmp_meta)
+            raise
+        if old_meta is not None:
+            cls._remove_records(save_dir, old_meta)
+        return cls(save_dir)
+
+    @staticmethod
+    def _read_meta(save_dir: str) -> Optional[Dict[str, Any]]:
+        """Read the metadata of the records in a directory, if there are any.
+
+        Args:
+            save_dir: The directory to look in.
+
+        Returns:
+            The metadata, or None if the directory does not contain (readable) records.
+        """
+        try:
+            with open(os.path.join(save_dir, _META_FILE), 'r') as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _remove_records(save_dir: str, meta: Dict[str, Any]) -> None:
+        """Delete records which have been superseded.
+
+        Args:
+            save_dir: The directory containing the records.
+            meta: The metadata of the records to be deleted.
+        """
+        directory = meta.get('directory')
+        if directory:
+            shutil.rmtree(os.path.join(save_dir, directory), ignore_errors=True)
+            return
+        # Records written by older versions are stored directly in the save_dir
+        for name in list(meta.get('shards', [])) + [_INDEX_FILE]:
+            try:
+                os.remove(os.path.join(save_dir, name))
+            except OSError:
+                pass
+
+    @classmethod
+    def _write_records(cls,
+                       data: FEDataset,
+                       ops: List[NumpyOp],
+                       mode: str,
+                       shard_size: int,
+                       save_dir: str) -> Dict[str, Any]:
+        """Write the shards and index of a dataset.
+
+        Args:
+            data: The dataset to write.
+            ops: The ops to apply to each sample before writing it.
+            mode: The mode to use when applying the `ops`.
+            shard_size: The approximate maximum number of bytes to write into each shard file.
+            save_dir: The (empty) directory to write the shards and index into.
+
+        Returns:
+            The metadata describing the records.
+        """
+        shards = []
+        index = np.zeros((len(data), 3), dtype=np.int64)
+        keys = {}
+        unique_values = {}
+        file = None
+        position = 0
+        try:
+            for idx in range(len(data)):
+                item = CopyOnWriteDict(data[idx])
+                forward_numpyop(ops, item, {'mode': mode})
+                item = item.to_dict()
+                encoded = encode_entry(item)
+                if file is None or (position > 0 and position + encoded[2] > shard_size):
+                    if file is not None:
+                        file.close()
+                    shards.append("shard_{:05d}.fer".format(len(shards)))
+                    file = open(os.path.join(save_dir, shards[-1]), 'wb')
+                    position = 0
+                file.write(b"\0" * (_aligned(position) - position))
+                position = _aligned(position)
+                index[idx] = (len(shards) - 1, position, encoded[2])
+                position += write_entry(file, encoded)
+                cls._update_keys(keys, unique_values, item)
+        finally:
+            if file is not None:
+                file.close()
+        for key, info in keys.items():
+            values = unique_values.get(key)
+            info['num_unique_values'] = None if values is None else len(values)
+        np.save(os.path.join(save_dir, _INDEX_FILE), index)
+        return {'num_records': len(data), 'shards': shards, 'keys': keys}
+
+    @staticmethod
+    def _update_keys(keys: Dict[str, Dict[str, Any]], unique_values: Dict[str, Optional[set]],
+                     item: Dict[str, Any]) -> None:
+        """Accumulate summary information about the records which are being written.
+
+        Args:
+            keys: A dictionary of {key: {'dtype': <type>, 'shape': <shape>}} information to be updated in place.
+                Dimensions which differ between records are replaced by None.
+            unique_values: A dictionary of {key: <unique values>} to be updated in place. The values for a key are set
+                to None once they are found to be unhashable or too numerous to track.
+            item: The data dictionary of the record which is being written.
+        """
+        for key, value in item.items():
+            shape = get_shape(value)
+            if key not in keys:
+                keys[key] = {'dtype': get_type(value), 'shape': shape}
+                unique_values[key] = set()
+            elif keys[key]['shape'] != shape:
+                old = keys[key]['shape']
+                keys[key]['shape'] = [None] * max(len(old), len(shape)) if len(old) != len(shape) else [
+                    a if a == b else None for a, b in zip(old, shape)
+                ]
+            values = unique_values[key]
+            if values is not None:
+                if not shape and isinstance(value, Hashable) and len(values) < _MAX_UNIQUE:
+                    values.add(value.item() if isinstance(value, np.generic) else value)
+                else:
+                    unique_values[key] = None
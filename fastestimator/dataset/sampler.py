@@ -0,0 +1,176 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+from typing import Iterator, List, Optional, Sequence
+
+import numpy as np
+from torch.utils.data import Sampler
+
+
+class LengthBucketSampler(Sampler):
+    """A batch sampler which groups samples of similar length together in order to minimize padding.
+
+    This class is intentionally not @traceable.
+
+    When shuffling, the indices are randomly permuted and then divided into pools of roughly `pool_size` batches. Each
+    pool is sorted by length before being cut into batches, and the order of the resulting batches is then shuffled.
+    This keeps batches internally homogeneous while still randomizing which samples end up together. Without shuffling
+    the entire dataset is sorted by length.
+
+    Batches may be limited by a number of samples (`batch_size`), by a number of tokens (`max_tokens`), or both. The
+    number of tokens in a batch is measured after padding, meaning the number of samples times the longest length in
+    the batch. A sample which alone exceeds `max_tokens` will be placed into a batch by itself.
+
+    For data-parallel training, every replica should construct the sampler with the same `seed` and invoke `set_epoch`
+    at the start of each epoch. Each replica then draws a disjoint subset of the same batch plan, with batches being
+    repeated (or dropped if `drop_last` is True) so that every replica receives the same number of batches.
+
+    ```python
+    sampler = fe.dataset.LengthBucketSampler(lengths=[5, 100, 7, 98], batch_size=2)
+    list(sampler)  # [[0, 2], [3, 1]] (in a random order)
+    ```
+
+    Args:
+        lengths: The length of each sample in the dataset.
+        batch_size: The maximum number of samples per batch, or None to only limit batches by `max_tokens`.
+        max_tokens: The maximum number of (padded) tokens per batch, or None to only limit batches by `batch_size`.
+        shuffle: Whether to randomize the batches. A new random ordering is generated for every epoch.
+        drop_last: Whether to drop batches which contain fewer than `batch_size` samples. This has no effect when
+            `max_tokens` is provided, since batches are then expected to vary in size.
+        pool_size: How many batches worth of samples to sort together when shuffling. Larger values reduce padding, but
+            make the batch contents less random.
+        num_replicas: How many data-parallel replicas the batches should be divided between.
+        rank: Which replica this sampler belongs to, from 0 to `num_replicas` - 1.
+        seed: The base seed to use for shuffling. The ordering for a given epoch depends only on `seed` + epoch, so it
+            is consistent between replicas. If None, the global numpy random state is used instead.
+
+    Raises:
+        AssertionError: If neither `batch_size` nor `max_tokens` are provided, if either of them are not positive, or
+            if the `rank` is invalid.
+    """
+    batches: Optional[List[np.ndarray]]
+
+    def __init__(self,
+                 lengths: Sequence[int],
+                 batch_size: Optional[int] = None,
+                 max_tokens: Optional[int] = None,
+                 shuffle: bool = True,
+                 drop_last: bool = False,
+                 pool_size: int = 100,
+                 num_replicas: int = 1,
+                 rank: int = 0,
+                 seed: Optional[int] = None) -> None:
+        assert batch_size is not None or max_tokens is not None, "either batch_size or max_tokens must be provided"
+        assert batch_size is None or batch_size > 0, "batch_size must be positive"
+        assert max_tokens is None or max_tokens > 0, "max_tokens must be positive"
+        assert pool_size > 0, "pool_size must be positive"
+        assert 0 <= rank < num_replicas, "rank must be between 0 and {}, but got {}".format(num_replicas - 1, rank)
+        super().__init__(None)
+        self.lengths = np.asarray(lengths, dtype=np.int64)
+        self.batch_size = batch_size
+        self.max_tokens = max_tokens
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+        self.pool_size = pool_size
+        self.num_replicas = num_replicas
+        self.rank = rank
+        self.seed = seed
+        self.epoch = 0
+        self.batches = None  # Computed lazily, since set_epoch is often invoked immediately after construction
+
+    def __iter__(self) -> Iterator[List[int]]:
+        batches = self._get_batches()
+        if self.shuffle:
+            self.set_epoch(self.epoch + 1)  # Prepare a new ordering for the next epoch
+        return (batch.tolist() for batch in batches)
+
+    def __len__(self) -> int:
+        return len(self._get_batches())
+
+    def set_epoch(self, epoch: int) -> None:
+        """Set the epoch which the sampler will produce batches for next.
+
+        Args:
+            epoch: The epoch index.
+        """
+        if epoch != self.epoch:
+            self.epoch = epoch
+            self.batches = None
+
+    def _get_batches(self) -> List[np.ndarray]:
+        """Get the batches of this replica for the current epoch.
+
+        Returns:
+            A list of index arrays, one per batch.
+        """
+        if self.batches is None:
+            self.batches = self._make_batches()
+        return self.batches
+
+    def _make_batches(self) -> List[np.ndarray]:
+        """Divide the dataset indices into batches of similar length, and select the ones for this replica.
+
+        Returns:
+            A list of index arrays, one per batch.
+        """
+        num_samples = len(self.lengths)
+        if num_samples == 0:
+            return []
+        rng = np.random if self.seed is None else np.random.RandomState(self.seed + self.epoch)
+        if self.shuffle:
+            samples_per_batch = self.batch_size or max(1, self.max_tokens // max(1, int(np.mean(self.lengths))))
+            pool = samples_per_batch * self.pool_size
+            order = rng.permutation(num_samples)
+        else:
+            pool = num_samples
+            order = np.arange(num_samples)
+        batches = []
+        for start in range(0, num_samples, pool):
+            indices = order[start:start + pool]
+            indices = indices[np.argsort(self.lengths[indices], kind='stable')]
+            batches.extend(self._cut(indices))
+        if self.drop_last and self.max_tokens is None:
+            batches = [batch for batch in batches if len(batch) == self.batch_size]
+        if self.shuffle:
+            batches = [batches[idx] for idx in rng.permutation(len(batches))]
+        if self.num_replicas > 1 and batches:
+            remainder = len(batches) % self.num_replicas
+            if self.drop_last:
+                batches = batches[:len(batches) - remainder]
+            elif remainder:
+                batches += [batches[idx % len(batches)] for idx in range(self.num_replicas - remainder)]
+            batches = batches[self.rank::self.num_replicas]
+        return batches
+
+    def _cut(self, indices: np.ndarray) -> List[np.ndarray]:
+        """Cut a sequence of indices, sorted by length, into batches.
+
+        Args:
+            indices: The indices to be batched, sorted by increasing sample length.
+
+        Returns:
+            A list of index arrays, one per batch.
+        """
+        if self.max_tokens is None:
+            return [indices[start:start + self.batch_size] for start in range(0, len(indices), self.batch_size)]
+        batches = []
+        start = 0
+        for end, length in enumerate(self.lengths[indices]):
+            # Since the indices are sorted, the current sample is the longest one in the batch
+            size = end - start
+            if size > 0 and ((size + 1) * length > self.max_tokens or size == self.batch_size):
+                batches.append(indices[start:end])
+                start = end
+        batches.append(indices[start:])
+        return batches
@@ -12,7 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ==============================================================================
-from copy import deepcopy
+import os
 from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 
 import numpy as np
@@ -32,6 +32,10 @@ class SiameseDirDataset(LabeledDirDataset):
     or many times as 'data_key_right' within the same epoch. SiameseDirDataset.split() will split by class index
     rather than by data instance index.
 
+    Pairs are drawn in constant time, regardless of the number of classes or the size of each class, using flat arrays
+    which group the data indices by class. Each process draws from its own random generator, which is seeded from the
+    global numpy random state of that process.
+
     Args:
         root_dir: The path to the directory containing data sorted by folders.
         data_key_left: What key to assign to the first data element in the pair.
@@ -40,9 +44,17 @@ class SiameseDirDataset(LabeledDirDataset):
         percent_matching_data: What percentage of the time should data be paired by class (label value = 1).
         label_mapping: A dictionary defining the mapping to use. If not provided will map classes to int labels.
         file_extension: If provided then only files ending with the file_extension will be included.
+        num_threads: How many threads to use when scanning the directory tree. If None, a default based on the number
+            of CPUs will be used.
+        manifest: A file path at which to save the directory listing, so that it can be reused the next time the dataset
+            is constructed. If None, the directory will be scanned every time. See fe.util.scan_dir() for details.
     """
 
     class_data: Dict[Any, Set[int]]
+    class_members: np.ndarray  # All of the data indices, grouped by class
+    class_offsets: np.ndarray  # Where each class starts within class_members (plus the total length at the end)
+    item_class: np.ndarray  # The class number of each data index
+    item_position: np.ndarray  # The position of each data index within class_members
 
     def __init__(self,
                  root_dir: str,
@@ -51,13 +63,76 @@ class SiameseDirDataset(LabeledDirDataset):
                  label_key: str = "y",
                  percent_matching_data: float = 0.5,
                  label_mapping: Optional[Dict[str, Any]] = None,
-                 file_extension: Optional[str] = None):
-        super().__init__(root_dir, data_key_left, label_key, label_mapping, file_extension)
+                 file_extension: Optional[str] = None,
+                 num_threads: Optional[int] = None,
+                 manifest: Optional[str] = None):
+        super().__init__(root_dir, data_key_left, label_key, label_mapping, file_extension, num_threads, manifest)
         self.class_data = self._data_to_class(self.data, label_key)
         self.percent_matching_data = percent_matching_data
         self.data_key_left = data_key_left
         self.data_key_right = data_key_right
         self.label_key = label_key
+        self.rng = None  # The (pid, generator) of the process which is currently sampling
+        self._index_classes()
+
+    def _index_classes(self) -> None:
+        """Build the flat class index arrays which are used to sample pairs in constant time.
+        """
+        members = [np.fromiter(sorted(self.class_data[key]), dtype=np.int64) for key in sorted(self.class_data.keys())]
+        sizes = np.array([len(member) for member in members], dtype=np.int64)
+        self.class_members = np.concatenate(members) if members else np.zeros((0, ), dtype=np.int64)
+        self.class_offsets = np.concatenate([[0], np.cumsum(sizes)])
+        self.item_class = np.zeros(len(self.data), dtype=np.int64)
+        self.item_class[self.class_members] = np.repeat(np.arange(len(members)), sizes)
+        self.item_position = np.zeros(len(self.data), dtype=np.int64)
+        self.item_position[self.class_members] = np.arange(len(self.class_members))
+
+    def _get_rng(self) -> np.random.Generator:
+        """Get a random generator which is valid in the current process.
+
+        Returns:
+            The random generator.
+        """
+        if self.rng is None or self.rng[0] != os.getpid():
+            # Either the first access, or a newly forked worker which should not repeat its parent's random sequence
+            self.rng = (os.getpid(), np.random.default_rng(np.random.randint(2**31 - 1)))
+        return self.rng[1]
+
+    def _sample_same_class(self, index: int, rng: np.random.Generator) -> int:
+        """Randomly select a different data index from the same class as a given `index`.
+
+        Args:
+            index: The data index to be matched.
+            rng: The random generator to use.
+
+        Returns:
+            A different data index from the same class.
+
+        Raises:
+            ValueError: If the `index` is the only element of its class.
+        """
+        clazz = self.item_class[index]
+        start, stop = self.class_offsets[clazz], self.class_offsets[clazz + 1]
+        size = stop - start
+        if size < 2:
+            raise ValueError("Cannot draw a matching pair for index {} since its class has no other elements".format(
+                index))
+        # Offsetting by 1 to size-1 positions (with wrap-around) selects uniformly from every other member of the class
+        offset = (self.item_position[index] - start + 1 + rng.integers(size - 1)) % size
+        return int(self.class_members[start + offset])
+
+    def _sample_class(self, clazz: int, rng: np.random.Generator) -> int:
+        """Randomly select a data index from a given class.
+
+        Args:
+            clazz: The class number to select from.
+            rng: The random generator to use.
+
+        Returns:
+            A data index from the class.
+        """
+        start, stop = self.class_offsets[clazz], self.class_offsets[clazz + 1]
+        return int(self.class_members[rng.integers(start, stop)])
 
     @staticmethod
     def _data_to_class(data: Dict[int, Dict[str, Any]], label_key: str) -> Dict[Any, Set[int]]:
@@ -103,14 +178,17 @@ class SiameseDirDataset(LabeledDirDataset):
             split = [item for i in split for item in self.class_data[int_class_keys[i]]]
             data = {new_idx: self.data.pop(old_idx) for new_idx, old_idx in enumerate(split)}
             class_data = self._data_to_class(data, self.label_key)
-            results.append(
-                self._skip_init(data,
-                                class_data=class_data,
-                                **{k: v
-                                   for k, v in self.__dict__.items() if k not in {'data', 'class_data'}}))
+            result = self._skip_init(data,
+                                     class_data=class_data,
+                                     **{k: v
+                                        for k, v in self.__dict__.items() if k not in {'data', 'class_data', 'rng'}})
+            result.rng = None
+            result._index_classes()
+            results.append(result)
         # Re-key the remaining data to be contiguous from 0 to new max index
         self.data = {new_idx: v for new_idx, (old_idx, v) in enumerate(self.data.items())}
         self.class_data = self._data_to_class(self.data, self.label_key)
+        self._index_classes()
         # The summary function is being cached by a base class, so reset our cache here
         # noinspection PyUnresolvedReferences
         self.summary.cache_clear()
@@ -125,18 +203,19 @@ class SiameseDirDataset(LabeledDirDataset):
         Returns:
             A datapoint for the given index.
         """
-        base_item = deepcopy(self.data[index])
-        if np.random.uniform(0, 1) < self.percent_matching_data:
+        rng = self._get_rng()
+        base_item = dict(self.data[index])
+        if rng.random() < self.percent_matching_data:
             # Generate matching data
-            clazz_items = self.class_data[base_item[self.label_key]]
-            other = np.random.choice(list(clazz_items - {index}))
+            other = self._sample_same_class(index, rng)
             base_item[self.data_key_right] = self.data[other][self.data_key_left]
             base_item[self.label_key] = 1
         else:
-            # Generate non-matching data
-            other_classes = self.class_data.keys() - {base_item[self.label_key]}
-            other_class = np.random.choice(list(other_classes))
-            other = np.random.choice(list(self.class_data[other_class]))
+            # Generate non-matching data by skipping over the current class
+            other_class = rng.integers(len(self.class_offsets) - 2)
+            if other_class >= self.item_class[index]:
+                other_class += 1
+            other = self._sample_class(other_class, rng)
             base_item[self.data_key_right] = self.data[other][self.data_key_left]
             base_item[self.label_key] = 0
         return base_item
@@ -157,21 +236,31 @@ class SiameseDirDataset(LabeledDirDataset):
         assert n <= len(self.class_data.keys()), \
             "one_shot_trial only supports up to {} comparisons, but an n-value of {} was given".format(
                 len(self.class_data.keys()), n)
-        classes = np.random.choice(list(self.class_data.keys()), size=n, replace=False)
-        base_image_indices = np.random.choice(list(self.class_data[classes[0]]), size=2, replace=False)
-        l1 = [self.data[base_image_indices[0]][self.data_key_left]] * n
-        l2 = [self.data[base_image_indices[1]][self.data_key_left]]
+        rng = self._get_rng()
+        classes = rng.choice(len(self.class_offsets) - 1, size=n, replace=False)
+        base_index = self._sample_class(classes[0], rng)
+        l1 = [self.data[base_index][self.data_key_left]] * n
+        l2 = [self.data[self._sample_same_class(base_index, rng)][self.data_key_left]]
         for clazz in classes[1:]:
-            index = np.random.choice(list(self.class_data[clazz]))
-            l2.append(self.data[index][self.data_key_left])
+            l2.append(self.data[self._sample_class(clazz, rng)][self.data_key_left])
         return l1, l2
 
-    def summary(self) -> DatasetSummary:
+    def summary(self,
+                approximate: Optional[bool] = None,
+                sample_size: int = 100,
+                time_budget: float = 10.0) -> DatasetSummary:
         """Generate a summary representation of this dataset.
+
+        Args:
+            approximate: Whether to compute an approximate summary. If None, an approximate summary will be computed
+                only if the dataset is very large. See InMemoryDataset.summary() for details.
+            sample_size: How many randomly selected elements to inspect when computing an approximate summary.
+            time_budget: Roughly how many seconds an approximate summary may take.
+
         Returns:
             A summary representation of this dataset.
         """
-        summary = super().summary()
+        summary = super().summary(approximate=approximate, sample_size=sample_size, time_budget=time_budget)
         # since class key is re-mapped, remove class key mapping to reduce confusion
         summary.class_key_mapping = None
         return summary
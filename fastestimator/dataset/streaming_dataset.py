@@ -0,0 +1,205 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+import itertools
+import os
+import threading
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from torch.utils.data import get_worker_info
+
+from fastestimator.dataset.dataset import DatasetSummary, FEDataset, KeySummary
+from fastestimator.util.traceability_util import traceable
+from fastestimator.util.util import get_shape, get_type
+
+_OPEN_LOCK = threading.Lock()  # Guards the creation of per-process streams
+
+
+@traceable()
+class StreamingDataset(FEDataset):
+    """A dataset which draws samples from a (possibly unbounded) stream rather than from an index.
+
+    Each process which reads from this dataset (the Pipeline worker processes, or the main process if multiprocessing
+    is disabled) lazily opens its own shard of the stream, so the stream can be consumed in parallel without being
+    materialized. The index passed to `__getitem__` is ignored: every call simply returns the next sample from the
+    current process' shard. If the stream runs out it will be re-opened, so finite sources are repeated as necessary to
+    provide `samples_per_epoch` samples. Since new worker processes are created every epoch, each epoch starts reading
+    from the beginning of the stream unless the Pipeline is configured with `persistent_workers`. Threads within a
+    process (for example the tf.data threads of a `tf_native` Pipeline) share their process' shard, and take turns
+    reading from it.
+
+    The DataLoader hands whole batches to its workers in round-robin order, so each worker's shard only contributes an
+    equal share of an epoch when the number of batches per epoch is a multiple of `num_process`. Otherwise some shards
+    provide one batch more than others, so within an epoch some shards may wrap around and repeat samples while parts
+    of the others go unread. To avoid this, choose `samples_per_epoch` to be a multiple of `batch_size` * `num_process`.
+
+    ```python
+    def read_logs(shard, num_shards):
+        for file in sorted(os.listdir(log_dir))[shard::num_shards]:
+            with open(os.path.join(log_dir, file)) as f:
+                for line in f:
+                    yield {"x": line}
+    ds = fe.dataset.StreamingDataset(read_logs, samples_per_epoch=100000, sharded_source=True, shuffle_buffer=1000)
+    ```
+
+    Args:
+        source: A function which returns an iterable of data dictionaries. It is invoked once per process.
+        samples_per_epoch: How many samples should be drawn from the stream during an epoch.
+        sharded_source: Whether the `source` can produce disjoint shards of the stream by itself. If True, it will be
+            invoked as `source(shard, num_shards)` and must only yield the samples belonging to the given shard. If
+            False, it will be invoked as `source()`, and each process will read through the entire stream while keeping
+            only every `num_shards`-th sample.
+        shuffle_buffer: How many samples each process should hold in a buffer in order to randomize their order. Each
+            sample is drawn uniformly from the buffer and then replaced with the next sample from the stream. If 0, the
+            samples are returned in stream order.
+        world_size: How many data-parallel training processes are reading from the stream. Each of them will read a
+            disjoint set of shards.
+        rank: The index of the current training process, from 0 to `world_size` - 1.
+        probe_size: How many samples to read from the start of the stream in order to generate a summary.
+
+    Raises:
+        AssertionError: If any of the arguments are invalid.
+    """
+    def __init__(self,
+                 source: Callable[..., Iterable[Dict[str, Any]]],
+                 samples_per_epoch: int,
+                 sharded_source: bool = False,
+                 shuffle_buffer: int = 0,
+                 world_size: int = 1,
+                 rank: int = 0,
+                 probe_size: int = 10) -> None:
+        assert samples_per_epoch > 0, "samples_per_epoch must be positive"
+        assert shuffle_buffer >= 0, "shuffle_buffer must be non-negative"
+        assert 0 <= rank < world_size, "rank must be between 0 and {}, but got {}".format(world_size - 1, rank)
+        assert probe_size > 0, "probe_size must be positive"
+        self.source = source
+        self.samples_per_epoch = samples_per_epoch
+        self.sharded_source = sharded_source
+        self.shuffle_buffer = shuffle_buffer
+        self.world_size = world_size
+        self.rank = rank
+        self.probe_size = probe_size
+        self.stream = None  # The (pid, iterator, buffer, lock) of the process which is currently reading
+        self.summary = lru_cache(maxsize=1)(self.summary)
+
+    def __len__(self) -> int:
+        return self.samples_per_epoch
+
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        """Get the next sample from the stream.
+
+        Args:
+            index: Ignored, since streams do not support random access.
+
+        Returns:
+            The next data dictionary from the current process' shard of the stream.
+        """
+        stream = self.stream
+        if stream is None or stream[0] != os.getpid():
+            with _OPEN_LOCK:
+                if self.stream is None or self.stream[0] != os.getpid():
+                    # Either the first access, or a newly forked process which must not share its parent's stream
+                    self.stream = (os.getpid(), self._open(), [], threading.Lock())
+                stream = self.stream
+        _, iterator, buffer, lock = stream
+        # Generators cannot be advanced by several threads at once, and the buffer must not be modified concurrently
+        with lock:
+            if not self.shuffle_buffer:
+                return next(iterator)
+            while len(buffer) < self.shuffle_buffer:
+                buffer.append(next(iterator))
+            idx = np.random.randint(len(buffer))
+            sample = buffer[idx]
+            buffer[idx] = next(iterator)
+            return sample
+
+    def _get_shard(self) -> Tuple[int, int]:
+        """Determine which shard of the stream the current process should read.
+
+        Returns:
+            (shard index, number of shards).
+        """
+        worker = get_worker_info()
+        worker_id, num_workers = (0, 1) if worker is None else (worker.id, worker.num_workers)
+        return self.rank * num_workers + worker_id, self.world_size * num_workers
+
+    def _open(self) -> Iterator[Dict[str, Any]]:
+        """Open the current process' shard of the stream, re-opening it whenever it runs out.
+
+        Returns:
+            An endless iterator over the shard.
+
+        Raises:
+            ValueError: If the shard does not contain any samples.
+        """
+        shard, num_shards = self._get_shard()
+        while True:
+            if self.sharded_source:
+                samples = iter(self.source(shard, num_shards))
+            else:
+                samples = itertools.islice(self.source(), shard, None, num_shards)
+            empty = True
+            for sample in samples:
+                empty = False
+                yield sample
+            if empty:
+                raise ValueError("StreamingDataset shard {} of {} did not produce any samples".format(
+                    shard, num_shards))
+
+    def _do_split(self, splits: Sequence[Iterable[int]]) -> List['StreamingDataset']:
+        """StreamingDatasets cannot be split, since they have no index.
+
+        Args:
+            splits: Which indices to remove from the current dataset in order to create new dataset(s).
+
+        Raises:
+            NotImplementedError: Always.
+        """
+        raise NotImplementedError("StreamingDataset does not support split(). Please create a separate "
+                                  "StreamingDataset for each split of your source data instead.")
+
+    def summary(self,
+                approximate: Optional[bool] = None,
+                sample_size: int = 100,
+                time_budget: float = 10.0) -> DatasetSummary:
+        """Generate a summary representation of this dataset.
+
+        The summary is computed from the first `probe_size` samples of the stream, which are read using a separate
+        iterator so that training is not affected. Streams can only be summarized approximately.
+
+        Args:
+            approximate: Unused.
+            sample_size: Unused, since the `probe_size` determines how many samples are inspected.
+            time_budget: Unused.
+
+        Returns:
+            A summary representation of this dataset.
+        """
+        source = self.source(0, 1) if self.sharded_source else self.source()
+        shapes = {}
+        dtypes = {}
+        for sample in itertools.islice(source, self.probe_size):
+            for key, val in sample.items():
+                shape = get_shape(val)
+                if key not in shapes:
+                    shapes[key] = shape
+                    dtypes[key] = get_type(val)
+                elif len(shapes[key]) != len(shape):
+                    shapes[key] = [None] * max(len(shapes[key]), len(shape))
+                else:
+                    shapes[key] = [a if a == b else None for a, b in zip(shapes[key], shape)]
+        key_summary = {key: KeySummary(shape=shapes[key], dtype=dtypes[key]) for key in shapes}
+        return DatasetSummary(num_instances=self.samples_per_epoch, keys=key_summary)
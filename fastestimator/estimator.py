@@ -14,6 +14,7 @@
 # ==============================================================================
 import os
 import random
+import time
 from collections import ChainMap
 from typing import Any, Dict, Iterable, List, Optional, Set, Union
 
@@ -38,9 +39,12 @@ from fastestimator.trace.io.restore_wizard import RestoreWizard
 from fastestimator.trace.io.traceability import Traceability
 from fastestimator.trace.trace import EvalEssential, Logger, TestEssential, Trace, TrainEssential, sort_traces
 from fastestimator.util.data import Data
+from fastestimator.util.shared_memory_util import detach_batch, uses_shared_memory
 from fastestimator.util.traceability_util import traceable
 from fastestimator.util.util import Suppressor, draw, to_list, to_set
 
+_TUNE_STEPS = 3  # How many network steps to time during warmup when the Pipeline is auto-tuning
+
 
 @traceable()
 class Estimator:
@@ -195,7 +199,8 @@ class Estimator:
                 if epoch not in epochs_with_data:
                     continue
                 # key checking
-                loader = self._configure_loader(self.pipeline.get_loader(mode, epoch))
+                loader = self._configure_loader(
+                    self.pipeline.get_loader(mode, epoch, output_keys=self._get_required_keys(mode, epoch)))
                 with Suppressor():
                     if isinstance(loader, tf.data.Dataset):
                         batch = list(loader.take(1))[0]
@@ -220,6 +225,14 @@ class Estimator:
                 trace_input_keys.update(traces[0].inputs)
                 self.network.load_epoch(mode, epoch, output_keys=trace_input_keys, warmup=warmup)
                 self.network.run_step(batch)
+                if self.pipeline.auto_tune and mode == "train":
+                    # The first step may include graph compilation, so measure the network speed on a few more steps.
+                    # Warmup steps may skip parts of a real step (ex. optimizer updates), so this is only an estimate
+                    # which the Pipeline corrects at the end of the first complete training epoch.
+                    start = time.perf_counter()
+                    for _ in range(_TUNE_STEPS):
+                        self.network.run_step(batch)
+                    self.pipeline.tune(mode, epoch, step_time=(time.perf_counter() - start) / _TUNE_STEPS)
                 self.network.unload_epoch()
         assert not monitor_names, "found missing key(s): {}".format(monitor_names)
 
@@ -234,6 +247,40 @@ class Estimator:
         """
         return self.traces_in_use
 
+    def _get_required_keys(self, mode: str, epoch: int) -> Optional[Set[str]]:
+        """Determine which Pipeline outputs are consumed by the Network and Traces during a given `epoch`.
+
+        Args:
+            mode: The execution mode to consider.
+            epoch: The epoch number to consider.
+
+        Returns:
+            The keys which the Pipeline needs to provide, or None if a Trace requests every available key.
+        """
+        trace_keys = self._get_trace_keys(mode, epoch)
+        if trace_keys is None:
+            return None
+        return self.network.get_effective_input_keys(mode, epoch) | trace_keys
+
+    def _get_trace_keys(self, mode: str, epoch: int) -> Optional[Set[str]]:
+        """Determine which data keys are read by the Traces (and monitor names) during a given `epoch`.
+
+        Args:
+            mode: The execution mode to consider.
+            epoch: The epoch number to consider.
+
+        Returns:
+            The keys which the Traces might read, or None if a Trace requests every available key.
+        """
+        trace_keys = set(self.monitor_names)
+        for trace in get_current_items(self.traces_in_use, run_modes=mode, epoch=epoch):
+            if "*" in trace.inputs:
+                if isinstance(trace, (Logger, Traceability, RestoreWizard)):
+                    continue  # These only claim wildcard inputs in order to be sorted last
+                return None
+            trace_keys.update(trace.inputs)
+        return trace_keys
+
     def _start(self, run_modes: Set[str]) -> None:
         """The outer training loop.
 
@@ -273,7 +320,13 @@ class Estimator:
         trace_input_keys = set()
         for trace in traces:
             trace_input_keys.update(trace.inputs)
-        loader = self._configure_loader(self.pipeline.get_loader(self.system.mode, self.system.epoch_idx))
+        loader = self._configure_loader(
+            self.pipeline.get_loader(self.system.mode,
+                                     self.system.epoch_idx,
+                                     output_keys=self._get_required_keys(self.system.mode, self.system.epoch_idx)))
+        # Traces may hold on to batch data across steps, so keys they read must not alias recycled shared memory
+        detach_keys = self._get_trace_keys(self.system.mode, self.system.epoch_idx)
+        shared_memory = uses_shared_memory(loader) and (detach_keys is None or len(detach_keys) > 0)
         iterator = iter(loader)
         self.network.load_epoch(mode=self.system.mode, epoch=self.system.epoch_idx, output_keys=trace_input_keys)
         self.system.batch_idx = None
@@ -284,23 +337,39 @@ class Estimator:
             available_outputs=to_set(batch.keys())
             | self.network.get_all_output_keys(self.system.mode, self.system.epoch_idx))
         self._run_traces_on_epoch_begin(traces=traces)
+        # Data starvation is measured from the first batch onwards, so that one-time startup costs (forking workers,
+        # loading the epoch, etc.) don't look like the Network waiting for data
+        wait_time, num_steps, steady_start = 0.0, 0, time.perf_counter()
         while True:
             try:
                 if self.system.mode == "train":
                     self.system.update_global_step()
                 self.system.update_batch_idx()
                 batch = self._configure_tensor(loader, batch)
+                if shared_memory:
+                    batch = detach_batch(batch, keys=detach_keys)
                 self._run_traces_on_batch_begin(batch, traces=traces)
                 batch, prediction = self.network.run_step(batch)
                 self._run_traces_on_batch_end(batch, prediction, traces=traces)
+                num_steps += 1
                 if isinstance(loader, DataLoader) and (
                     (self.system.batch_idx == self.system.max_train_steps_per_epoch and self.system.mode == "train") or
                     (self.system.batch_idx == self.system.max_eval_steps_per_epoch and self.system.mode == "eval")):
                     raise StopIteration
+                wait_start = time.perf_counter()
                 with Suppressor():
                     batch = next(iterator)
+                wait_time += time.perf_counter() - wait_start
             except StopIteration:
                 break
+        max_steps = self.system.max_train_steps_per_epoch
+        # Epochs which are cut short by max_train_steps_per_epoch may be dominated by startup costs, so are ignored
+        truncated = bool(max_steps) and self.system.batch_idx >= max_steps
+        if self.pipeline.auto_tune and self.system.mode == "train" and num_steps > 1 and not truncated:
+            elapsed = time.perf_counter() - steady_start
+            self.pipeline.adjust(self.system.mode,
+                                 wait_fraction=wait_time / elapsed,
+                                 step_time=(elapsed - wait_time) / num_steps)
         self._run_traces_on_epoch_end(traces=traces)
         self.network.unload_epoch()
 
@@ -317,6 +386,10 @@ class Estimator:
             The potentially modified dataloader to be used for training.
         """
         new_loader = loader
+        if isinstance(new_loader, DataLoader) and isinstance(self.network, TFNetwork) and self.pipeline.tf_native:
+            tf_loader = self.pipeline.to_tf_dataset(loader)
+            if tf_loader is not None:
+                new_loader = tf_loader
         if isinstance(new_loader, DataLoader) and isinstance(self.network, TFNetwork):
             add_batch = True
             if hasattr(loader.dataset, "dataset") and isinstance(loader.dataset.dataset, BatchDataset):
@@ -12,27 +12,250 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ==============================================================================
-from typing import Any, Dict, List, Union
+from copy import deepcopy
+from typing import Any, Dict, List, NamedTuple, Optional, Union
 
 import numpy as np
+from albumentations import BaseCompose, BasicTransform, BboxParams, Compose, KeypointParams
+from albumentations import OneOf as OneOfAlb
 
+from fastestimator.op.numpyop.meta.one_of import OneOf
+from fastestimator.op.numpyop.meta.sometimes import Sometimes
+from fastestimator.op.numpyop.multivariate.multivariate import MultiVariateAlbumentation
 from fastestimator.op.numpyop.numpyop import NumpyOp, forward_numpyop
+from fastestimator.op.numpyop.univariate.univariate import ImageOnlyAlbumentation
 from fastestimator.util.traceability_util import traceable
 from fastestimator.util.util import to_list
 
+_TARGETS = ("image", "mask", "masks", "bboxes", "keypoints")
+
+
+class _AlbumentationSpec(NamedTuple):
+    """A description of how to run a NumpyOp as part of a single albumentations Compose.
+
+    Attributes:
+        transform: The albumentations transform (or composition) which implements the op.
+        targets: A mapping from each data key which the op modifies (in place) to its albumentations target type.
+        dual: Whether the transform modifies every target (as opposed to only the images).
+        bbox_params: The bounding box parameters used by the op, if any.
+        keypoint_params: The keypoint parameters used by the op, if any.
+    """
+    transform: Union[BasicTransform, BaseCompose]
+    targets: Dict[str, str]
+    dual: bool
+    bbox_params: Optional[BboxParams]
+    keypoint_params: Optional[KeypointParams]
+
+
+def _always_applied(transform: BasicTransform) -> bool:
+    """Check whether an albumentations transform will be applied every time it is invoked.
+
+    Args:
+        transform: The transform to inspect.
+
+    Returns:
+        True iff the `transform` is always applied.
+    """
+    return getattr(transform, 'always_apply', False) or transform.p >= 1
+
+
+def _get_spec(op: NumpyOp) -> Optional[_AlbumentationSpec]:
+    """Determine how an op could be run as part of a single albumentations Compose.
+
+    Args:
+        op: The op to inspect.
+
+    Returns:
+        The specification of the op, or None if it cannot be fused with other ops.
+    """
+    if isinstance(op, Sometimes):
+        spec = _get_spec(op.op)
+        if spec is None:
+            return None
+        transform = deepcopy(spec.transform)
+        if isinstance(transform, BasicTransform):
+            # The wrapped op would itself only be applied with probability p (unless it is always applied)
+            transform.p = op.prob * (1.0 if _always_applied(spec.transform) else spec.transform.p)
+            transform.always_apply = False
+        else:
+            transform.p = op.prob
+        return spec._replace(transform=transform)
+    if isinstance(op, OneOf):
+        specs = [_get_spec(elem) for elem in op.ops]
+        if any(spec is None or not isinstance(spec.transform, BasicTransform) for spec in specs):
+            return None
+        # Albumentations force-applies the chosen transform, so each choice must have been applied unconditionally
+        if any(not _always_applied(spec.transform) for spec in specs):
+            return None
+        if any(spec.targets != specs[0].targets or _params_differ(specs[0], spec) for spec in specs):
+            return None
+        transforms = [deepcopy(spec.transform) for spec in specs]
+        for transform in transforms:
+            transform.p = 1.0  # Albumentations weights the choices by their probabilities, but OneOf is uniform
+        return specs[0]._replace(transform=OneOfAlb(transforms, p=1.0), dual=any(spec.dual for spec in specs))
+    if type(op).forward is ImageOnlyAlbumentation.forward and isinstance(op, ImageOnlyAlbumentation):
+        if op.inputs != op.outputs:
+            return None
+        return _AlbumentationSpec(transform=op.func.transforms[0],
+                                  targets={key: "image" for key in op.inputs},
+                                  dual=False,
+                                  bbox_params=None,
+                                  keypoint_params=None)
+    if type(op).forward is MultiVariateAlbumentation.forward and isinstance(op, MultiVariateAlbumentation):
+        if op.keys_in != op.keys_out or any(target not in _TARGETS for target in op.keys_in):
+            return None
+        return _AlbumentationSpec(transform=op.func.transforms[0],
+                                  targets={key: target for target, key in op.keys_in.items()},
+                                  dual=True,
+                                  bbox_params=op.bbox_params,
+                                  keypoint_params=op.keypoint_params)
+    return None
+
+
+def _params_differ(spec1: _AlbumentationSpec, spec2: _AlbumentationSpec) -> bool:
+    """Check whether two specs use conflicting bounding box or keypoint parameters.
+
+    Args:
+        spec1: The first spec.
+        spec2: The second spec.
+
+    Returns:
+        True iff both specs define bounding box (or keypoint) parameters, and those parameters are different.
+    """
+    for param1, param2 in ((spec1.bbox_params, spec2.bbox_params), (spec1.keypoint_params, spec2.keypoint_params)):
+        if param1 is not None and param2 is not None and vars(param1) != vars(param2):
+            return True
+    return False
+
+
+def _compatible(specs: List[_AlbumentationSpec]) -> bool:
+    """Check whether a sequence of ops can be run together in a single albumentations Compose.
+
+    Every op in a Compose is applied to every target which it supports, so ops which modify all targets must share the
+    exact same keys, and ops which only modify images must share the same image keys.
+
+    Args:
+        specs: The specifications of the ops.
+
+    Returns:
+        True iff the ops can be fused without changing their behavior.
+    """
+    targets = {}
+    for spec in specs:
+        for key, target in spec.targets.items():
+            if targets.setdefault(key, target) != target:
+                return False
+    image_keys = {key for key, target in targets.items() if target == "image"}
+    if not image_keys:
+        return False
+    if sum(target == "bboxes" for target in targets.values()) > 1:
+        return False
+    if sum(target == "keypoints" for target in targets.values()) > 1:
+        return False
+    for spec in specs:
+        if spec.dual and spec.targets != targets:
+            return False
+        if not spec.dual and set(spec.targets) != image_keys:
+            return False
+        if any(_params_differ(spec, other) for other in specs):
+            return False
+    return True
+
+
+def _fuse_albumentations(ops: List[NumpyOp]) -> List[NumpyOp]:
+    """Combine runs of consecutive albumentation-based ops into single ops which invoke one albumentations Compose.
+
+    Args:
+        ops: The ops to be fused.
+
+    Returns:
+        A list of ops with the same behavior as the `ops`.
+    """
+    fused = []
+    group = []  # Pairs of (op, spec)
+
+    def close_group() -> None:
+        if len(group) > 1:
+            fused.append(_FusedAlbumentation([op for op, _ in group], [spec for _, spec in group]))
+        else:
+            fused.extend(op for op, _ in group)
+        group.clear()
+
+    for op in ops:
+        spec = _get_spec(op)
+        if spec is None:
+            close_group()
+            fused.append(op)
+            continue
+        if not _compatible([elem for _, elem in group] + [spec]):
+            close_group()
+        group.append((op, spec))
+    close_group()
+    return fused
+
+
+@traceable()
+class _FusedAlbumentation(NumpyOp):
+    """Run several albumentation-based ops using a single albumentations Compose.
+
+    Compared to running the ops one after another, this only packs and unpacks the data once, and only converts bounding
+    boxes and keypoints to and from the albumentations format once.
+
+    Args:
+        ops: The ops being fused.
+        specs: The specifications of the `ops`.
+    """
+    def __init__(self, ops: List[NumpyOp], specs: List[_AlbumentationSpec]) -> None:
+        targets = {}
+        for spec in specs:
+            targets.update(spec.targets)
+        keys = list(targets.keys())
+        super().__init__(inputs=keys, outputs=keys, mode=ops[0].mode)
+        self.in_list, self.out_list = True, True
+        self.ops = ops
+        # The first key of each target type is passed under the standard name, and any others as additional targets
+        self.names = []
+        additional_targets = {}
+        for idx, (key, target) in enumerate(targets.items()):
+            if target in self.names:
+                name = "target{}".format(idx)
+                additional_targets[name] = target
+            else:
+                name = target
+            self.names.append(name)
+        bbox_params = next((spec.bbox_params for spec in specs if spec.bbox_params is not None), None)
+        keypoint_params = next((spec.keypoint_params for spec in specs if spec.keypoint_params is not None), None)
+        self.func = Compose(transforms=[deepcopy(spec.transform) for spec in specs],
+                            bbox_params=bbox_params,
+                            keypoint_params=keypoint_params,
+                            additional_targets=additional_targets)
+
+    def forward(self, data: List[np.ndarray], state: Dict[str, Any]) -> List[np.ndarray]:
+        result = self.func(**{name: elem for name, elem in zip(self.names, data)})
+        return [result[name] for name in self.names]
+
 
 @traceable()
 class Fuse(NumpyOp):
     """Run a sequence of NumpyOps as a single Op.
 
+    Consecutive albumentation-based ops (ex. Rotate, HorizontalFlip, Blur), including those wrapped in Sometimes or
+    OneOf, are executed by a single albumentations Compose rather than by one Compose per op. This avoids repeatedly
+    packing and unpacking the data and converting bounding boxes to and from the albumentations format. Ops are only
+    combined when doing so does not change their behavior: ops which modify images, masks, bounding boxes, or
+    keypoints together must all operate (in place) on the same keys, and must use the same bounding box and keypoint
+    parameters. Each op is still applied with the same probability as before, though the random numbers are drawn by
+    albumentations.
+
     Args:
         ops: A sequence of NumpyOps to run. They must all share the same mode. It also doesn't support scheduled ops at
             the moment, though the Fuse itself may be scheduled.
+        fuse_albumentations: Whether to run consecutive albumentation-based ops using a single albumentations Compose.
 
     Raises:
         ValueError: If `repeat` or `ops` are invalid.
     """
-    def __init__(self, ops: Union[NumpyOp, List[NumpyOp]]) -> None:
+    def __init__(self, ops: Union[NumpyOp, List[NumpyOp]], fuse_albumentations: bool = True) -> None:
         ops = to_list(ops)
         if len(ops) < 1:
             raise ValueError("Fuse requires at least one op")
@@ -50,11 +273,12 @@ class Fuse(NumpyOp):
                     outputs.append(out)
         super().__init__(inputs=inputs, outputs=outputs, mode=mode)
         self.ops = ops
+        self.fused_ops = _fuse_albumentations(ops) if fuse_albumentations else ops
 
     def __getstate__(self) -> Dict[str, List[Dict[Any, Any]]]:
         return {'ops': [elem.__getstate__() if hasattr(elem, '__getstate__') else {} for elem in self.ops]}
 
     def forward(self, data: List[np.ndarray], state: Dict[str, Any]) -> List[np.ndarray]:
         data = {key: elem for key, elem in zip(self.inputs, data)}
-        forward_numpyop(self.ops, data, state)
+        forward_numpyop(self.fused_ops, data, state)
         return [data[key] for key in self.outputs]
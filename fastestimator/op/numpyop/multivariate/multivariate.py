@@ -92,6 +92,8 @@ class MultiVariateAlbumentation(NumpyOp):
             bbox_params = BboxParams(bbox_params)
         if isinstance(keypoint_params, str):
             keypoint_params = KeypointParams(keypoint_params)
+        self.bbox_params = bbox_params
+        self.keypoint_params = keypoint_params
         self.func = Compose(transforms=[func], bbox_params=bbox_params, keypoint_params=keypoint_params)
 
     def forward(self, data: List[np.ndarray], state: Dict[str, Any]) -> List[np.ndarray]:
@@ -95,6 +95,9 @@ class Delete(NumpyOp):
     def forward(self, data: Union[np.ndarray, List[np.ndarray]], state: Dict[str, Any]) -> None:
         pass
 
+    def forward_batch(self, data: Union[Tensor, List[Tensor]], state: Dict[str, Any]) -> None:
+        pass
+
 
 @traceable()
 class LambdaOp(NumpyOp):
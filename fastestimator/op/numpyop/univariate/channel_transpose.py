@@ -16,8 +16,9 @@ from typing import Any, Dict, Iterable, List, Union
 
 import numpy as np
 
-from fastestimator.op.numpyop.numpyop import NumpyOp
+from fastestimator.op.numpyop.numpyop import NumpyOp, Tensor
 from fastestimator.util.traceability_util import traceable
+from fastestimator.util.util import to_number
 
 
 @traceable()
@@ -43,3 +44,7 @@ class ChannelTranspose(NumpyOp):
 
     def forward(self, data: List[np.ndarray], state: Dict[str, Any]) -> List[np.ndarray]:
         return [np.transpose(elem, self.axes) for elem in data]
+
+    def forward_batch(self, data: List[Tensor], state: Dict[str, Any]) -> List[np.ndarray]:
+        axes = [0] + [axis + 1 if axis >= 0 else axis for axis in self.axes]
+        return [np.transpose(to_number(elem), axes) for elem in data]
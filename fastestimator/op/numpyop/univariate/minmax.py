@@ -16,8 +16,9 @@ from typing import Any, Dict, Iterable, List, Union
 
 import numpy as np
 
-from fastestimator.op.numpyop.numpyop import NumpyOp
+from fastestimator.op.numpyop.numpyop import NumpyOp, Tensor
 from fastestimator.util.traceability_util import traceable
+from fastestimator.util.util import to_number
 
 
 @traceable()
@@ -44,8 +45,13 @@ class Minmax(NumpyOp):
     def forward(self, data: List[np.ndarray], state: Dict[str, Any]) -> List[np.ndarray]:
         return [self._apply_minmax(elem) for elem in data]
 
-    def _apply_minmax(self, data: np.ndarray) -> np.ndarray:
-        data_max = np.max(data)
-        data_min = np.min(data)
-        data = (data - data_min) / max((data_max - data_min), self.epsilon)
+    def forward_batch(self, data: List[Tensor], state: Dict[str, Any]) -> List[np.ndarray]:
+        return [self._apply_minmax(to_number(elem), batched=True) for elem in data]
+
+    def _apply_minmax(self, data: np.ndarray, batched: bool = False) -> np.ndarray:
+        # Each sample in a batch is normalized independently, so the reduction skips the batch dimension
+        axis = tuple(range(1, data.ndim)) if batched else None
+        data_max = np.max(data, axis=axis, keepdims=batched)
+        data_min = np.min(data, axis=axis, keepdims=batched)
+        data = (data - data_min) / np.maximum((data_max - data_min), self.epsilon)
         return data.astype(np.float32)
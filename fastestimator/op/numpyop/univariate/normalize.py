@@ -12,12 +12,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ==============================================================================
-from typing import Iterable, Tuple, Union
+from typing import Any, Dict, Iterable, List, Tuple, Union
 
+import numpy as np
+from albumentations.augmentations.functional import normalize
 from albumentations.augmentations.transforms import Normalize as NormalizeAlb
 
+from fastestimator.op.numpyop.numpyop import Tensor
 from fastestimator.op.numpyop.univariate.univariate import ImageOnlyAlbumentation
 from fastestimator.util.traceability_util import traceable
+from fastestimator.util.util import to_number
 
 
 @traceable()
@@ -48,3 +52,10 @@ class Normalize(ImageOnlyAlbumentation):
                          inputs=inputs,
                          outputs=outputs,
                          mode=mode)
+        self.mean = mean
+        self.std = std
+        self.max_pixel_value = max_pixel_value
+
+    def forward_batch(self, data: List[Tensor], state: Dict[str, Any]) -> List[np.ndarray]:
+        # The normalization broadcasts along the channel axis, so it can be applied to a whole batch at once
+        return [normalize(to_number(elem), self.mean, self.std, self.max_pixel_value) for elem in data]
@@ -16,8 +16,9 @@ from typing import Any, Dict, Iterable, List, Union
 
 import numpy as np
 
-from fastestimator.op.numpyop.numpyop import NumpyOp
+from fastestimator.op.numpyop.numpyop import NumpyOp, Tensor
 from fastestimator.util.traceability_util import traceable
+from fastestimator.util.util import to_number
 
 
 @traceable()
@@ -51,6 +52,20 @@ class Onehot(NumpyOp):
     def forward(self, data: List[Union[int, np.ndarray]], state: Dict[str, Any]) -> List[np.ndarray]:
         return [self._apply_onehot(elem) for elem in data]
 
+    def forward_batch(self, data: List[Tensor], state: Dict[str, Any]) -> List[np.ndarray]:
+        return [self._apply_onehot_batch(to_number(elem)) for elem in data]
+
+    def _apply_onehot_batch(self, data: np.ndarray) -> np.ndarray:
+        assert "int" in str(data.dtype)
+        class_index = data.reshape((data.shape[0], -1))
+        assert class_index.shape[1] == 1, "data must have only one item"
+        class_index = class_index[:, 0]
+        assert np.all(class_index < self.num_classes), "label value should be smaller than num_classes"
+        output = np.full((class_index.shape[0], self.num_classes), fill_value=self.label_smoothing / self.num_classes)
+        output[np.arange(class_index.shape[0]), class_index] = \
+            1.0 - self.label_smoothing + self.label_smoothing / self.num_classes
+        return output
+
     def _apply_onehot(self, data: Union[int, np.ndarray]) -> np.ndarray:
         class_index = np.array(data)
         assert "int" in str(class_index.dtype)
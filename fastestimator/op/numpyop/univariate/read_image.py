@@ -13,7 +13,10 @@
 # limitations under the License.
 # ==============================================================================
 import os
-from typing import Any, Dict, Iterable, List, Union
+import struct
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
 
 import cv2
 import numpy as np
@@ -21,6 +24,47 @@ import numpy as np
 from fastestimator.op.numpyop.numpyop import NumpyOp
 from fastestimator.util.traceability_util import traceable
 
+_REDUCED_FLAGS = {
+    cv2.IMREAD_COLOR: {
+        2: cv2.IMREAD_REDUCED_COLOR_2, 4: cv2.IMREAD_REDUCED_COLOR_4, 8: cv2.IMREAD_REDUCED_COLOR_8
+    },
+    cv2.IMREAD_GRAYSCALE: {
+        2: cv2.IMREAD_REDUCED_GRAYSCALE_2, 4: cv2.IMREAD_REDUCED_GRAYSCALE_4, 8: cv2.IMREAD_REDUCED_GRAYSCALE_8
+    }
+}
+_COLOR_FLAGS = {cv2.IMREAD_COLOR, cv2.IMREAD_REDUCED_COLOR_2, cv2.IMREAD_REDUCED_COLOR_4, cv2.IMREAD_REDUCED_COLOR_8}
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+# Thread pools and read buffers are kept out of the ops themselves so that the ops can still be deep-copied and pickled
+_BUFFERS = threading.local()  # Per-thread read buffers, shared by every ReadImage op
+_POOLS = {}  # {num_threads: (pid, thread pool)}, since thread pools don't survive forking
+_POOL_LOCK = threading.Lock()
+
+
+def _get_jpeg_size(buffer: memoryview) -> Optional[Tuple[int, int]]:
+    """Find the dimensions of a JPEG image by parsing its header, without decoding it.
+
+    Args:
+        buffer: The encoded image.
+
+    Returns:
+        The (height, width) of the image, or None if the `buffer` does not contain a JPEG image.
+    """
+    if bytes(buffer[:2]) != b"\xff\xd8":
+        return None
+    position = 2
+    while position + 9 <= len(buffer):
+        if buffer[position] != 0xFF:
+            return None
+        marker = buffer[position + 1]
+        if marker == 0xFF:
+            position += 1  # Fill byte
+            continue
+        if marker in _JPEG_SOF_MARKERS:
+            height, width = struct.unpack(">HH", buffer[position + 5:position + 9])
+            return height, width
+        position += 2 + struct.unpack(">H", buffer[position + 2:position + 4])[0]
+    return None
+
 
 @traceable()
 class ReadImage(NumpyOp):
@@ -34,6 +78,13 @@ class ReadImage(NumpyOp):
             like "!infer" or "!train".
         parent_path: Parent path that will be prepended to a given path.
         color_flag: Whether to read the image as 'color', 'grey', or one of the cv2.IMREAD flags.
+        target_size: The (height, width) which the images will eventually be resized to, if known. JPEG images which are
+            at least twice as large as this in both dimensions will then be downscaled by a factor of 2, 4, or 8 during
+            decoding (which is much faster than decoding at full resolution), while remaining at least as large as the
+            `target_size`. The output images will therefore still need to be resized by a subsequent Op. This argument
+            is only used when the `color_flag` is 'color' or 'gray'.
+        num_threads: How many threads to use for decoding when there are multiple `inputs`. Decoding releases the GIL,
+            so this can speed up ops which read several images per sample.
 
     Raises:
         AssertionError: If `inputs` and `outputs` have mismatched lengths, or the `color_flag` is unacceptable.
@@ -43,7 +94,9 @@ class ReadImage(NumpyOp):
                  outputs: Union[str, Iterable[str]],
                  mode: Union[None, str, Iterable[str]] = None,
                  parent_path: str = "",
-                 color_flag: Union[str, int] = cv2.IMREAD_COLOR):
+                 color_flag: Union[str, int] = cv2.IMREAD_COLOR,
+                 target_size: Optional[Tuple[int, int]] = None,
+                 num_threads: int = 1):
         super().__init__(inputs=inputs, outputs=outputs, mode=mode)
         if isinstance(self.inputs, List) and isinstance(self.outputs, List):
             assert len(self.inputs) == len(self.outputs), "Input and Output lengths must match"
@@ -55,20 +108,80 @@ class ReadImage(NumpyOp):
             self.color_flag = cv2.IMREAD_COLOR
         elif self.color_flag in {"gray", "grey"}:
             self.color_flag = cv2.IMREAD_GRAYSCALE
+        assert target_size is None or len(target_size) == 2, "target_size must be a (height, width) tuple"
+        self.target_size = target_size
+        assert num_threads > 0, "num_threads must be positive"
+        self.num_threads = num_threads
         self.in_list, self.out_list = True, True
 
     def forward(self, data: List[str], state: Dict[str, Any]) -> List[np.ndarray]:
+        if self.num_threads > 1 and len(data) > 1:
+            return list(self._get_pool().map(self._read, data))
         return [self._read(elem) for elem in data]
 
+    def _get_pool(self) -> ThreadPoolExecutor:
+        """Get a thread pool for the current process.
+
+        Returns:
+            A thread pool with `num_threads` threads.
+        """
+        with _POOL_LOCK:
+            pool = _POOLS.get(self.num_threads)
+            if pool is None or pool[0] != os.getpid():
+                pool = _POOLS[self.num_threads] = (os.getpid(), ThreadPoolExecutor(max_workers=self.num_threads))
+        return pool[1]
+
+    @staticmethod
+    def _get_buffer(size: int) -> bytearray:
+        """Get a re-usable buffer for reading encoded images, which belongs to the current thread.
+
+        Args:
+            size: The minimum required size of the buffer.
+
+        Returns:
+            A buffer with at least `size` bytes.
+        """
+        buffer = getattr(_BUFFERS, 'buffer', None)
+        if buffer is None or len(buffer) < size:
+            buffer = _BUFFERS.buffer = bytearray(max(size, 2 * len(buffer or b"")))
+        return buffer
+
     def _read(self, path: str) -> np.ndarray:
-        path = os.path.normpath(os.path.join(self.parent_path, path))
-        img = cv2.imread(path, self.color_flag)
-        if self.color_flag in {
-                cv2.IMREAD_COLOR, cv2.IMREAD_REDUCED_COLOR_2, cv2.IMREAD_REDUCED_COLOR_4, cv2.IMREAD_REDUCED_COLOR_8
-        }:
-            img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        if self.parent_path:
+            path = os.path.join(self.parent_path, path)
+        try:
+            with open(path, 'rb') as file:
+                size = os.fstat(file.fileno()).st_size
+                buffer = memoryview(self._get_buffer(size))[:size]
+                file.readinto(buffer)
+        except OSError as err:
+            # Match the error raised by cv2.imread-based reading for missing or unreadable files
+            raise ValueError('cv2 did not read correctly for file "{}"'.format(os.path.normpath(path))) from err
+        flag = self._get_flag(buffer)
+        img = cv2.imdecode(np.frombuffer(buffer, dtype=np.uint8), flag)
         if not isinstance(img, np.ndarray):
-            raise ValueError('cv2 did not read correctly for file "{}"'.format(path))
+            raise ValueError('cv2 did not read correctly for file "{}"'.format(os.path.normpath(path)))
+        if flag in _COLOR_FLAGS:
+            img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB, dst=img)  # In place, avoiding an extra allocation
         if img.ndim == 2:
             img = np.expand_dims(img, -1)
         return img
+
+    def _get_flag(self, buffer: memoryview) -> int:
+        """Choose the cv2 flag to decode an image with, taking advantage of reduced-resolution decoding if possible.
+
+        Args:
+            buffer: The encoded image.
+
+        Returns:
+            The cv2.IMREAD flag to use.
+        """
+        if self.target_size is None or self.color_flag not in _REDUCED_FLAGS:
+            return self.color_flag
+        size = _get_jpeg_size(buffer)
+        if size is None:
+            return self.color_flag
+        for factor in (8, 4, 2):
+            if size[0] // factor >= self.target_size[0] and size[1] // factor >= self.target_size[1]:
+                return _REDUCED_FLAGS[self.color_flag][factor]
+        return self.color_flag
@@ -12,30 +12,94 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ==============================================================================
+import collections
+import csv
+import inspect
+import itertools
+import json
+import math
 import multiprocessing as mp
 import os
 import random
 import time
+import uuid
 import warnings
-from copy import deepcopy
-from typing import Any, Callable, Dict, List, MutableMapping, Optional, Set, TypeVar, Union
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, MutableMapping, Optional, Set, Tuple, \
+    TypeVar, Union
 
 import numpy as np
 import tensorflow as tf
-from torch.utils.data import DataLoader, Dataset, RandomSampler
-from torch.utils.data.dataloader import default_collate
+import torch
+from torch.utils.data import DataLoader, Dataset, DistributedSampler, RandomSampler
+from torch.utils.data.dataloader import default_collate, default_convert
 
 from fastestimator.dataset.batch_dataset import BatchDataset
+from fastestimator.dataset.dataset import InMemoryDataset
 from fastestimator.dataset.op_dataset import OpDataset
+from fastestimator.dataset.sampler import LengthBucketSampler
+from fastestimator.op.numpyop.meta.fuse import Fuse
 from fastestimator.op.numpyop.meta.one_of import OneOf
 from fastestimator.op.numpyop.meta.sometimes import Sometimes
-from fastestimator.op.numpyop.numpyop import NumpyOp, forward_numpyop
+from fastestimator.op.numpyop.multivariate import CenterCrop, Crop, LongestMaxSize, PadIfNeeded, ReadMat, Resize, \
+    SmallestMaxSize, Transpose
+from fastestimator.op.numpyop.numpyop import Delete, NumpyOp, forward_numpyop
+from fastestimator.op.numpyop.univariate import Binarize, Calibrate, ChannelTranspose, Equalize, ExpandDims, \
+    FromFloat, Hadamard, InvertImg, Minmax, Normalize, Onehot, PadSequence, ReadImage, Reshape, ToArray, ToFloat, \
+    ToGray, ToSepia, Tokenize, WordtoId
 from fastestimator.schedule.schedule import Scheduler, get_current_items
+from fastestimator.util.cache_util import SharedCache
+from fastestimator.util.shared_memory_util import SharedMemoryCollator, detach_batch, uses_shared_memory
 from fastestimator.util.traceability_util import traceable
-from fastestimator.util.util import pad_batch, to_list, to_set
+from fastestimator.util.util import CopyOnWriteDict, get_batch_size, pad_batch, to_list, to_set
 
 DataSource = TypeVar('DataSource', Dataset, DataLoader, tf.data.Dataset)
 
+_PREFETCH_FACTOR = 2  # The number of batches which each DataLoader worker will load in advance (PyTorch default)
+_PERSISTENT_WORKERS = "persistent_workers" in inspect.signature(DataLoader.__init__).parameters  # Torch >= 1.7
+_PREFETCH_FACTOR_ARG = "prefetch_factor" in inspect.signature(DataLoader.__init__).parameters  # Torch >= 1.7
+_TUNE_HEADROOM = 1.25  # How much faster than the network the auto-tuner tries to make the data production
+_STARVATION_THRESHOLD = 0.05  # The fraction of an epoch spent waiting for data before the auto-tuner adds workers
+_IDLE_THRESHOLD = 0.01  # The fraction of an epoch spent waiting for data below which the auto-tuner may remove workers
+_PROFILE_KEY = "_fe_benchmark_profile"  # Used by Pipeline.benchmark to pass profiling information out of the workers
+# Ops which always produce the same outputs given the same inputs, and whose results are therefore safe to cache
+_DETERMINISTIC_OPS = (Binarize, Calibrate, CenterCrop, ChannelTranspose, Crop, Delete, Equalize, ExpandDims, FromFloat,
+                      Hadamard, InvertImg, LongestMaxSize, Minmax, Normalize, Onehot, PadIfNeeded, PadSequence,
+                      ReadImage, ReadMat, Reshape, Resize, SmallestMaxSize, ToArray, ToFloat, ToGray, ToSepia, Tokenize,
+                      Transpose, WordtoId)
+
+
+_TRANSFORM_ARGS = None  # The (ops, batch_ops, mode, pad_value) used by Pipeline.transform_batches worker processes
+
+
+def _init_transform_worker(ops: List[NumpyOp], batch_ops: List[NumpyOp], mode: str,
+                           pad_value: Optional[Union[int, float]]) -> None:
+    """Prepare a worker process to run Pipeline.transform_batches.
+
+    Args:
+        ops: The ops to run on each sample.
+        batch_ops: The ops to run on each collated batch.
+        mode: The execution mode.
+        pad_value: The padding value if batch padding is needed. None indicates that no padding is needed.
+    """
+    global _TRANSFORM_ARGS
+    _TRANSFORM_ARGS = (ops, batch_ops, mode, pad_value)
+    # Forked workers would otherwise share the random state of their parent
+    random.seed()
+    np.random.seed()
+
+
+def _transform_worker(batch: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Transform a batch of data inside of a Pipeline.transform_batches worker process.
+
+    Args:
+        batch: The data instances to be transformed.
+
+    Returns:
+        The transformed and collated batch.
+    """
+    return Pipeline._transform_batch(batch, *_TRANSFORM_ARGS)
+
 
 @traceable()
 class Pipeline:
@@ -56,6 +120,66 @@ class Pipeline:
         pad_value: The padding value if batch padding is needed. None indicates that no padding is needed. NOTE: This
             argument is only applicable when using a FastEstimator Dataset.
         collate_fn: Function to merge data into one batch with input being list of elements.
+        shared_memory: Whether worker processes should assemble batches directly inside of a ring of re-usable
+            shared-memory buffers, avoiding extra copies when handing large tensors to the training loop. Batches
+            produced in this mode are recycled after a few more batches have been drawn, so they must be copied if they
+            need to be retained. The Estimator copies every key which is read by a Trace, so only the keys consumed
+            exclusively by the Network avoid the extra copy. NOTE: This argument is only applicable when using a
+            FastEstimator Dataset with `num_process` > 0, and is ignored if a custom `collate_fn` is provided.
+        vectorize: Whether to run the trailing sequence of ops which provide their own vectorized `forward_batch`
+            implementation (ex. Normalize, Minmax, ToFloat, ChannelTranspose, Onehot, ExpandDims) once on each collated
+            batch rather than once on every individual sample. Earlier ops (like ReadImage) still run on each sample
+            before collation. NOTE: This argument is only applicable when using a FastEstimator Dataset with batching.
+        persistent_workers: Whether to keep data loaders (and their worker processes) alive between epochs. A loader is
+            then only re-built when the dataset, ops, or batching configuration for its mode actually changes (for
+            example due to a Scheduler), rather than forking `num_process` new workers at the start of every epoch. One
+            loader is retained per mode. Samplers are still informed of each new epoch, so shuffling (including seeded
+            shuffling) behaves as usual, but the worker processes are only seeded once when they start. Random ops
+            therefore continue their existing random streams rather than being re-seeded every epoch. NOTE: This
+            argument is only applicable when using a FastEstimator Dataset which is not a BatchDataset, since
+            BatchDatasets need to re-draw their samples (from `seed` + epoch) every epoch.
+        cache: A cache in which to store the outputs of the leading deterministic ops for each sample (ex. ReadImage ->
+            Resize -> Normalize), so that they only need to be computed during the first epoch. The cache can be shared
+            by all of the worker processes, and by several Pipelines (each of which only sees its own entries). The
+            dataset must always return the same data for a given index in order to use a cache. NOTE: This argument is only applicable when using a FastEstimator Dataset which is not a
+            BatchDataset.
+        num_cached_ops: How many of the leading ops (for a given mode) should have their outputs cached. This may be an
+            int, or a dictionary of {mode: int}. If None, the longest prefix of built-in ops which are known to be
+            deterministic will be cached. This argument is ignored if no `cache` is provided.
+        prefetch_factor: How many batches each worker process should load in advance. If None, the PyTorch default of 2
+            will be used. NOTE: This argument is only applicable when using a FastEstimator Dataset with `num_process`
+            > 0, and is ignored for PyTorch versions older than 1.7.
+        auto_tune: Whether to automatically choose `num_process` and `prefetch_factor`. During the Estimator warmup, the
+            time needed to produce a batch is compared against an estimate of the time taken by the Network to consume
+            one, and just enough workers are allocated to keep up with the Network. After every complete training epoch
+            the number of workers is then corrected based on the measured training speed: workers are added if the
+            Network was starved of data, and removed if they were not needed. The choices made will be printed. NOTE:
+            This argument is only applicable when using a FastEstimator Dataset.
+        tf_native: Whether TensorFlow Networks should consume data through a native tf.data pipeline, where the ops are
+            run by tf.data's own parallel map (via tf.numpy_function) and batches are assembled and prefetched by
+            TensorFlow, rather than by wrapping a PyTorch DataLoader in a Python generator. NOTE: This argument is only
+            applicable when using a FastEstimator Dataset without a custom `collate_fn`.
+        bucket_key: A data key holding variable-length sequences (ex. token ids or raw text) by which to group samples
+            into batches. When provided, samples of similar length are batched together, which greatly reduces the
+            amount of padding needed for long-tailed length distributions. Lengths are measured on the dataset before
+            any ops are applied, with strings measured by their number of words. Padding is still performed according
+            to `pad_value`. NOTE: This argument is only applicable when using a FastEstimator Dataset which is not a
+            BatchDataset.
+        max_tokens: The maximum number of tokens per batch (the number of samples times the longest length in the
+            batch) when batching by `bucket_key`. If provided, batches are limited by their total size rather than (or
+            in addition to) `batch_size`, so that batches of short sequences contain more samples than batches of long
+            ones. This argument is ignored if no `bucket_key` is provided.
+        world_size: The number of data-parallel training processes (across all nodes) which are sharing this Pipeline's
+            data. If provided, each process reads a disjoint shard of the data, and the shards are padded by repeating
+            samples (or trimmed if `drop_last` is True) so that every process runs the same number of steps per epoch.
+            For BatchDatasets the batches are sharded rather than the samples. NOTE: This argument is only applicable
+            when using a FastEstimator Dataset.
+        rank: The index of the current process within the `world_size` processes, from 0 to `world_size` - 1. This
+            must be provided if and only if `world_size` is.
+        seed: The base seed used for shuffling. The ordering of each epoch is derived from `seed` + epoch, so every
+            process sees a consistent permutation without needing to communicate. If None while `world_size` is
+            provided, 0 will be used. If both are None, the global random state is used for shuffling as usual. NOTE:
+            This argument is only applicable when using a FastEstimator Dataset.
     """
     ops: List[Union[NumpyOp, Scheduler[NumpyOp]]]
 
@@ -68,7 +192,20 @@ class Pipeline:
                  num_process: Optional[int] = None,
                  drop_last: bool = False,
                  pad_value: Optional[Union[int, float]] = None,
-                 collate_fn: Optional[Callable] = None):
+                 collate_fn: Optional[Callable] = None,
+                 shared_memory: bool = False,
+                 vectorize: bool = False,
+                 persistent_workers: bool = False,
+                 cache: Optional[SharedCache] = None,
+                 num_cached_ops: Union[None, int, Dict[str, int]] = None,
+                 prefetch_factor: Optional[int] = None,
+                 auto_tune: bool = False,
+                 tf_native: bool = False,
+                 bucket_key: Optional[str] = None,
+                 max_tokens: Optional[int] = None,
+                 world_size: Optional[int] = None,
+                 rank: Optional[int] = None,
+                 seed: Optional[int] = None):
         self.data = {x: y for (x, y) in zip(["train", "eval", "test"], [train_data, eval_data, test_data]) if y}
         self.batch_size = batch_size
         self.ops = to_list(ops)
@@ -81,6 +218,28 @@ class Pipeline:
         self.drop_last = drop_last
         self.pad_value = pad_value
         self.collate_fn = collate_fn
+        self.shared_memory = shared_memory
+        self.vectorize = vectorize
+        self.persistent_workers = persistent_workers
+        self.cache = cache
+        self.num_cached_ops = num_cached_ops
+        self.prefetch_factor = prefetch_factor
+        self.auto_tune = auto_tune
+        self.tf_native = tf_native
+        self.bucket_key = bucket_key
+        self.max_tokens = max_tokens
+        assert (world_size is None) == (rank is None), "world_size and rank must be provided together"
+        if world_size is not None:
+            assert 0 <= rank < world_size, "rank must be between 0 and {}, but got {}".format(world_size - 1, rank)
+            if seed is None:
+                seed = 0  # Every process must shuffle the same way
+        self.world_size = world_size
+        self.rank = rank
+        self.seed = seed
+        self._loaders = {}
+        self._bucket_lengths = {}
+        self._batch_times = {}  # How long one process takes to produce a batch, as measured by the auto-tuner
+        self._cache_namespace = uuid.uuid4().hex  # Keeps this Pipeline's entries apart from others in a shared cache
         self._verify_inputs(**{k: v for k, v in locals().items() if k != 'self'})
 
     def _verify_inputs(self, **kwargs) -> None:
@@ -127,6 +286,8 @@ class Pipeline:
             # ops check
             for op in get_current_items(self.ops):
                 assert isinstance(op, NumpyOp), "unsupported op format, must provide NumpyOp in Pipeline"
+            # max_tokens check
+            assert self.max_tokens is None or self.max_tokens > 0, "max_tokens must be positive"
             # num_process check
             assert isinstance(self.num_process, int), "number of processes must be an integer"
             return True
@@ -161,86 +322,364 @@ class Pipeline:
                     all_modes.append(mode)
         return to_set(all_modes)
 
-    def benchmark(self, mode: str = "train", epoch: int = 1, num_steps: int = 1000, log_interval: int = 100) -> None:
+    def benchmark(self,
+                  mode: str = "train",
+                  epoch: int = 1,
+                  num_steps: int = 1000,
+                  log_interval: int = 100,
+                  num_process: Union[None, int, List[int]] = None,
+                  batch_size: Union[None, int, List[int]] = None,
+                  save_path: Optional[str] = None) -> List[Dict[str, Any]]:
         """Benchmark the pipeline processing speed.
 
+        When using a FastEstimator Dataset, the ops are profiled inside of the actual worker processes while the loader
+        runs. This reports the p50 / p95 / p99 latency of every op, the time spent collating each batch, the time
+        between a batch being finished by a worker and being received by the main process (queueing and transfer), and
+        how busy the workers were. A sweep over several `num_process` and/or `batch_size` values can be performed by
+        passing lists for those arguments.
+
+        ```python
+        pipeline.benchmark(num_process=[0, 4, 8], batch_size=[32, 64], save_path="benchmark.csv")
+        ```
+
+        Args:
+            mode: The execution mode to benchmark. This can be 'train', 'eval' or 'test'.
+            epoch: The epoch index to benchmark. Note that epoch indices are 1-indexed.
+            num_steps: The maximum number of steps over which to perform the benchmark.
+            log_interval: The logging interval.
+            num_process: The number(s) of worker processes to benchmark. If None, the Pipeline's own setting is used.
+                NOTE: This argument is only applicable when using a FastEstimator Dataset.
+            batch_size: The batch size(s) to benchmark. If None, the Pipeline's own setting is used. NOTE: This argument
+                is only applicable when using a FastEstimator Dataset.
+            save_path: Where to save the results. If the path ends in '.csv' the results will be written as one CSV row
+                per configuration, otherwise they will be written as JSON.
+
+        Returns:
+            A list containing one dictionary of results for every benchmarked configuration.
+        """
+        configs = [(n, b) for n in to_list(num_process) or [None] for b in to_list(batch_size) or [None]]
+        original = (self.num_process, self.batch_size, self.persistent_workers)
+        results = []
+        try:
+            self.persistent_workers = False  # Each configuration needs freshly started workers
+            for n, b in configs:
+                if n is not None:
+                    self.num_process = n
+                if b is not None:
+                    self.batch_size = b
+                results.append(self._benchmark(mode, epoch, num_steps, log_interval))
+        finally:
+            self.num_process, self.batch_size, self.persistent_workers = original
+        if save_path:
+            save_path = os.path.abspath(os.path.normpath(save_path))
+            os.makedirs(os.path.dirname(save_path), exist_ok=True)
+            if save_path.endswith(".csv"):
+                rows = [self._flatten_benchmark(result) for result in results]
+                columns = list(dict.fromkeys(key for row in rows for key in row))
+                with open(save_path, "w", newline="") as file:
+                    writer = csv.DictWriter(file, fieldnames=columns)
+                    writer.writeheader()
+                    writer.writerows(rows)
+            else:
+                with open(save_path, "w") as file:
+                    json.dump(results, file, indent=4)
+            print("FastEstimator-Benchmark: Results saved to {}".format(save_path))
+        return results
+
+    def _benchmark(self, mode: str, epoch: int, num_steps: int, log_interval: int) -> Dict[str, Any]:
+        """Benchmark the pipeline processing speed using its current settings.
+
         Args:
             mode: The execution mode to benchmark. This can be 'train', 'eval' or 'test'.
             epoch: The epoch index to benchmark. Note that epoch indices are 1-indexed.
             num_steps: The maximum number of steps over which to perform the benchmark.
             log_interval: The logging interval.
+
+        Returns:
+            A dictionary of results.
         """
         loader = self.get_loader(mode=mode, epoch=epoch)
+        profiled = isinstance(loader, DataLoader) and isinstance(loader.dataset, OpDataset)
+        result = {"mode": mode, "epoch": epoch}
+        if profiled:
+            loader.dataset.profile = True
+            loader.collate_fn = partial(self._profile_collate, collate_fn=loader.collate_fn, dataset=loader.dataset)
+            result.update({"num_process": self.num_process, "batch_size": loader.batch_size})
+            print("FastEstimator-Benchmark: num_process: {}, batch_size: {}".format(self.num_process,
+                                                                                 loader.batch_size))
         if isinstance(loader, tf.data.Dataset):
             loader = loader.take(num_steps)
-        start = time.perf_counter()
-        for idx, _ in enumerate(loader, start=1):
+        op_times = [[] for _ in loader.dataset.ops] if profiled else []
+        collate_times, transfer_times = [], []
+        worker_busy, worker_window = {}, {}
+        num_samples, wait_time = 0, 0.0
+        bench_start = start = time.perf_counter()
+        iterator = iter(loader)
+        idx = 0
+        while idx < num_steps:
+            request = time.perf_counter()
+            try:
+                batch = next(iterator)
+            except StopIteration:
+                break
+            received = time.perf_counter()
+            wait_time += received - request
+            idx += 1
+            if profiled:
+                profile = batch.pop(_PROFILE_KEY)
+                for times, new_times in zip(op_times, profile["op_times"]):
+                    times.extend(new_times)
+                collate_times.append(profile["collate"])
+                # perf_counter is based on a system-wide monotonic clock, so it can be compared between processes
+                transfer_times.append(received - profile["end"])
+                worker = profile["worker"]
+                worker_busy[worker] = worker_busy.get(worker, 0.0) + profile["end"] - profile["fetch_start"]
+                first, _ = worker_window.get(worker, (profile["fetch_start"], None))
+                worker_window[worker] = (first, profile["end"])
+            if isinstance(batch, dict):
+                try:
+                    num_samples += get_batch_size(batch)
+                except AssertionError:
+                    pass
             if idx % log_interval == 0:
                 duration = time.perf_counter() - start
                 iters_per_sec = log_interval / duration
                 print("FastEstimator: Step: {}, Epoch: {}, Steps/sec: {}".format(idx, epoch, iters_per_sec))
                 start = time.perf_counter()
-            if idx == num_steps:
-                break
-        # Pipeline Operations Benchmarking when using FEDataset
-        if isinstance(loader, DataLoader) and isinstance(loader.dataset, OpDataset):
-            op_list = loader.dataset.ops
-            duration_list = np.zeros(shape=(len(op_list)))
-
-            data_len = len(loader.dataset.dataset)
-            if self.batch_size:
-                batch_size = self.batch_size.get_current_value(epoch) if isinstance(self.batch_size,
-                                                                                    Scheduler) else self.batch_size
-                batch_size = batch_size[mode] if isinstance(batch_size, dict) else batch_size
-                log_interval = log_interval * batch_size
-
-            print("\nBreakdown of time taken by Pipeline Operations ({} epoch {})".format(mode, epoch))
-            for _ in range(log_interval):
-                index = np.random.randint(data_len)
-                items = deepcopy(loader.dataset.dataset[index])
-                if isinstance(loader.dataset.dataset, BatchDataset):
-                    # BatchDataset may randomly sample the same elements multiple times, so need to avoid reprocessing
-                    unique_samples = set()
-                    for item in items:
-                        if id(item) not in unique_samples:
-                            for i, op in enumerate(op_list):
-                                start = time.perf_counter()
-                                forward_numpyop([op], item, {'mode': loader.dataset.mode})
-                                duration = time.perf_counter() - start
-                                duration_list[i] += duration
-                            unique_samples.add(id(item))
-                else:
-                    for i, op in enumerate(op_list):
-                        start = time.perf_counter()
-                        forward_numpyop([op], items, {'mode': loader.dataset.mode})
-                        duration = time.perf_counter() - start
-                        duration_list[i] += duration
-
-            total_time = np.sum(duration_list)
-            op_names = ["Op"]
-
-            for op in op_list:
-                if isinstance(op, Sometimes) and op.op:
-                    op_names.append(op.__class__.__name__ + " (" + op.op.__class__.__name__ + ")")
-                elif isinstance(op, OneOf) and op.ops:
-                    op_names.append(op.__class__.__name__ + " (" +
-                                    ", ".join([sub_op.__class__.__name__ for sub_op in op.ops]) + ")")
-                else:
-                    op_names.append(op.__class__.__name__)
-
-            max_op_len = max(len(op_name) for op_name in op_names)
-            max_in_len = max([len(", ".join(op.inputs)) for op in op_list] + [len("Inputs")])
-            max_out_len = max([len(", ".join(op.outputs)) for op in op_list] + [len("Outputs")])
-            print("{}: {}: {}: {}".format("Op".ljust(max_op_len + 1),
-                                          "Inputs".ljust(max_in_len + 1),
-                                          "Outputs".ljust(max_out_len + 1),
-                                          "Time".rjust(5)))
-            print("-" * (max_op_len + max_in_len + max_out_len + 15))
-            for i, op in enumerate(op_list):
-                print("{}: {}: {}: {:5.2f}%".format(op_names[i + 1].ljust(max_op_len + 1),
-                                                    ", ".join(op.inputs).ljust(max_in_len + 1),
-                                                    ", ".join(op.outputs).ljust(max_out_len + 1),
-                                                    100 * duration_list[i] / total_time))
+        total_time = time.perf_counter() - bench_start
+        del iterator  # Shut down the workers
+        result.update({
+            "steps": idx,
+            "steps_per_sec": idx / total_time if total_time else 0.0,
+            "samples_per_sec": num_samples / total_time if total_time else 0.0,
+            "wait_fraction": wait_time / total_time if total_time else 0.0
+        })
+        if not profiled:
+            return result
+        busy = sum(worker_busy.values())
+        window = sum(end - first for first, end in worker_window.values())
+        result.update({
+            "collate_ms": self._percentiles(collate_times),
+            "transfer_ms": self._percentiles(transfer_times),
+            "worker_busy_sec": busy,
+            "worker_idle_sec": max(window - busy, 0.0),
+            "worker_utilization": busy / window if window else 1.0,
+            "ops": []
+        })
+        op_total = sum(sum(times) for times in op_times) or 1.0
+        for op, times in zip(loader.dataset.ops, op_times):
+            result["ops"].append({
+                "name": self._get_op_name(op),
+                "inputs": ", ".join(op.inputs),
+                "outputs": ", ".join(op.outputs),
+                "share": sum(times) / op_total,
+                **self._percentiles(times)
+            })
+        self._print_benchmark(result)
+        return result
+
+    @staticmethod
+    def _profile_collate(batch: Union[List[MutableMapping[str, Any]], MutableMapping[str, Any]],
+                         collate_fn: Callable,
+                         dataset: OpDataset) -> Dict[str, Any]:
+        """A collate function which attaches profiling information from the worker process to each batch.
+
+        Args:
+            batch: The data to be batched and collated.
+            collate_fn: The collate function to be profiled.
+            dataset: The dataset which produced the `batch`. Since workers are forked, this is the worker's own copy.
+
+        Returns:
+            The collated batch, with an extra key containing the profiling information.
+        """
+        start = time.perf_counter()
+        batch = collate_fn(batch)
+        end = time.perf_counter()
+        profile = dataset.pop_profile()
+        worker_info = torch.utils.data.get_worker_info()
+        profile.update({"collate": end - start, "end": end, "worker": worker_info.id if worker_info else -1})
+        if profile["fetch_start"] is None:
+            profile["fetch_start"] = start
+        batch[_PROFILE_KEY] = profile
+        return batch
+
+    @staticmethod
+    def _percentiles(times: List[float]) -> Dict[str, float]:
+        """Summarize a list of durations.
+
+        Args:
+            times: Durations in seconds.
+
+        Returns:
+            The mean, p50, p95, and p99 of the `times`, in milliseconds.
+        """
+        if not times:
+            return {"mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0}
+        p50, p95, p99 = np.percentile(times, [50, 95, 99]) * 1000
+        return {"mean": float(np.mean(times)) * 1000, "p50": float(p50), "p95": float(p95), "p99": float(p99)}
+
+    @staticmethod
+    def _get_op_name(op: NumpyOp) -> str:
+        """Get a human-readable name for an op.
+
+        Args:
+            op: The op to be named.
+
+        Returns:
+            The name of the op, including the names of any ops wrapped by it.
+        """
+        if isinstance(op, Sometimes) and op.op:
+            return op.__class__.__name__ + " (" + op.op.__class__.__name__ + ")"
+        if isinstance(op, (OneOf, Fuse)) and op.ops:
+            return op.__class__.__name__ + " (" + ", ".join([sub_op.__class__.__name__ for sub_op in op.ops]) + ")"
+        return op.__class__.__name__
+
+    @staticmethod
+    def _print_benchmark(result: Dict[str, Any]) -> None:
+        """Print the profiling results for a benchmarked configuration.
+
+        Args:
+            result: The results to be printed.
+        """
+        print("\nBreakdown of time taken by Pipeline Operations ({} epoch {})".format(result["mode"], result["epoch"]))
+        ops = result["ops"]
+        max_op_len = max([len(op["name"]) for op in ops] + [len("Op")])
+        max_in_len = max([len(op["inputs"]) for op in ops] + [len("Inputs")])
+        max_out_len = max([len(op["outputs"]) for op in ops] + [len("Outputs")])
+        print("{}: {}: {}: {}: {}: {}: {}".format("Op".ljust(max_op_len + 1),
+                                                  "Inputs".ljust(max_in_len + 1),
+                                                  "Outputs".ljust(max_out_len + 1),
+                                                  "Time".rjust(6),
+                                                  "p50 ms".rjust(8),
+                                                  "p95 ms".rjust(8),
+                                                  "p99 ms".rjust(8)))
+        print("-" * (max_op_len + max_in_len + max_out_len + 51))
+        for op in ops:
+            print("{}: {}: {}: {:5.2f}%: {:8.3f}: {:8.3f}: {:8.3f}".format(op["name"].ljust(max_op_len + 1),
+                                                                       op["inputs"].ljust(max_in_len + 1),
+                                                                       op["outputs"].ljust(max_out_len + 1),
+                                                                       100 * op["share"],
+                                                                       op["p50"],
+                                                                       op["p95"],
+                                                                       op["p99"]))
+        print("Collate (ms): p50: {:.3f}, p95: {:.3f}, p99: {:.3f}".format(result["collate_ms"]["p50"],
+                                                                          result["collate_ms"]["p95"],
+                                                                          result["collate_ms"]["p99"]))
+        print("Queue + Transfer (ms): p50: {:.3f}, p95: {:.3f}, p99: {:.3f}".format(result["transfer_ms"]["p50"],
+                                                                                   result["transfer_ms"]["p95"],
+                                                                                   result["transfer_ms"]["p99"]))
+        print("Workers: busy: {:.2f}s, idle: {:.2f}s, utilization: {:.2f}%, main process waiting: {:.2f}%\n".format(
+            result["worker_busy_sec"],
+            result["worker_idle_sec"],
+            100 * result["worker_utilization"],
+            100 * result["wait_fraction"]))
+
+    @staticmethod
+    def _flatten_benchmark(result: Dict[str, Any]) -> Dict[str, Any]:
+        """Flatten the results of a benchmarked configuration into a single CSV row.
+
+        Args:
+            result: The results to be flattened.
+
+        Returns:
+            A flat dictionary of results.
+        """
+        row = {}
+        for key, value in result.items():
+            if key == "ops":
+                for idx, op in enumerate(value):
+                    for stat in ("share", "mean", "p50", "p95", "p99"):
+                        row["op{}_{}_{}".format(idx, op["name"], stat)] = op[stat]
+            elif isinstance(value, dict):
+                for stat, val in value.items():
+                    row["{}_{}".format(key, stat)] = val
+            else:
+                row[key] = value
+        return row
+
+    def tune(self, mode: str, epoch: int, step_time: float, num_steps: int = 10) -> None:
+        """Choose `num_process` and `prefetch_factor` such that data production keeps up with the Network.
+
+        This method is invoked by the Estimator during warmup when `auto_tune` is enabled. Since warmup steps don't
+        necessarily match real training steps, the result is only an initial estimate which `adjust` later corrects.
+
+        Args:
+            mode: The execution mode to tune for.
+            epoch: The epoch index to tune for. Note that epoch indices are 1-indexed.
+            step_time: An estimate of how many seconds the Network takes to consume one batch.
+            num_steps: How many batches to produce in order to measure the data production speed.
+        """
+        if mp.get_start_method(allow_none=True) != 'fork':
+            return
+        original = (self.num_process, self.persistent_workers)
+        batch_times = []
+        try:
+            self.num_process, self.persistent_workers = 0, False
+            loader = self.get_loader(mode=mode, epoch=epoch)
+            if not isinstance(loader, DataLoader):
+                return
+            iterator = iter(loader)
+            for _ in range(num_steps + 1):
+                start = time.perf_counter()
+                try:
+                    next(iterator)
+                except StopIteration:
+                    break
+                batch_times.append(time.perf_counter() - start)
+        finally:
+            self.num_process, self.persistent_workers = original
+        batch_times = batch_times[1:]  # The first batch may include one-time initialization costs
+        if not batch_times:
+            return
+        batch_time, batch_time_p95 = float(np.mean(batch_times)), float(np.percentile(batch_times, 95))
+        self._batch_times[mode] = batch_time
+        max_process = os.cpu_count() or 1
+        needed = math.ceil(batch_time * _TUNE_HEADROOM / max(step_time, 1e-6))
+        num_process = min(max(needed, 1), max_process)
+        # Deeper prefetching absorbs variance in how long individual batches take to produce
+        prefetch_factor = min(max(math.ceil(batch_time_p95 / max(batch_time, 1e-9)) + 1, 2), 8)
+        print("FastEstimator-AutoTune: Producing a batch takes {:.1f}ms in one process and the network is estimated "
+              "(during warmup) to consume a batch every {:.1f}ms, so using num_process: {} (was {}) and "
+              "prefetch_factor: {}{}. This will be corrected after the first complete training epoch if needed".format(
+                  1000 * batch_time,
+                  1000 * step_time,
+                  num_process,
+                  self.num_process,
+                  prefetch_factor,
+                  ". Data loading will still be a bottleneck since {} processes would be needed".format(needed)
+                  if needed > max_process else ""))
+        self.num_process, self.prefetch_factor = num_process, prefetch_factor
+
+    def adjust(self, mode: str, wait_fraction: float, step_time: Optional[float] = None) -> None:
+        """Correct the number of worker processes based on how the Network fared during the last epoch.
+
+        This method is invoked by the Estimator at the end of every complete training epoch when `auto_tune` is enabled.
+        Workers are added if the Network was starved of data. If the Network hardly ever waited, and `tune` measured how
+        long producing a batch takes, then any workers beyond those needed to keep up with `step_time` are removed.
+
+        Args:
+            mode: The execution mode of the epoch which just ended.
+            wait_fraction: The fraction of the epoch during which the consumer was waiting for data, not counting the
+                time spent starting up the epoch.
+            step_time: How many seconds the Network took to consume one batch during the epoch, excluding waits.
+        """
+        if mp.get_start_method(allow_none=True) != 'fork':
+            return
+        max_process = os.cpu_count() or 1
+        num_process = self.num_process
+        if wait_fraction > _STARVATION_THRESHOLD:
+            num_process = min(max(self.num_process + 1, math.ceil(self.num_process * 1.5)), max_process)
+            reason = "spent {:.1f}% of the last {} epoch waiting for data".format(100 * wait_fraction, mode)
+        elif wait_fraction < _IDLE_THRESHOLD and step_time and mode in self._batch_times:
+            needed = math.ceil(self._batch_times[mode] * _TUNE_HEADROOM / max(step_time, 1e-6))
+            num_process = min(max(needed, 1), self.num_process)
+            reason = "consumed a batch every {:.1f}ms during the last {} epoch without waiting for data".format(
+                1000 * step_time, mode)
+        if num_process == self.num_process:
+            return
+        print("FastEstimator-AutoTune: The network {}, so changing num_process from {} to {}".format(
+            reason, self.num_process, num_process))
+        self.num_process = num_process
 
     def get_scheduled_items(self, mode: str) -> List[Any]:
         """Get a list of items considered for scheduling.
@@ -283,12 +722,99 @@ class Pipeline:
         Returns:
             The transformed data.
         """
-        data = deepcopy(data)
+        data = CopyOnWriteDict(data)
         ops = get_current_items(self.ops, mode, epoch)
         forward_numpyop(ops, data, {'mode': mode})
-        for key, value in data.items():
-            data[key] = np.expand_dims(value, 0)
-        return data
+        return {key: np.expand_dims(value, 0) for key, value in data.items()}
+
+    def transform_batches(self,
+                          data: Iterable[Dict[str, Any]],
+                          mode: str,
+                          epoch: int = 1,
+                          batch_size: int = 32,
+                          num_process: Optional[int] = None,
+                          prefetch_factor: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Apply all pipeline operations to a stream of data instances, yielding the results in batches.
+
+        This is the batched counterpart of `transform`, intended for offline inference over large amounts of data. Each
+        worker process transforms and collates entire batches, which are yielded in the same order as the input `data`.
+        At most `num_process` * `prefetch_factor` batches are in flight at any time, so `data` may be a generator over
+        more records than would fit in memory. The resulting batches can be passed directly to `Network.transform`.
+
+        ```python
+        pipeline = fe.Pipeline(ops=[ReadImage(inputs="x", outputs="x"), Minmax(inputs="x", outputs="x")])
+        for batch in pipeline.transform_batches(({"x": path} for path in paths), mode="infer", batch_size=256):
+            prediction = network.transform(batch, mode="infer")
+        ```
+
+        Args:
+            data: The data instances to be transformed, in dictionary format.
+            mode: The execution mode in which to run. This can be "train", "eval", "test" or "infer".
+            epoch: The epoch index to run. Note that epoch indices are 1-indexed.
+            batch_size: How many data instances to put in each batch. The final batch may be smaller.
+            num_process: How many worker processes to use. If None, the Pipeline's `num_process` will be used. Passing 0
+                will run the ops in the calling process.
+            prefetch_factor: How many batches each worker process should have queued at a time. If None, the
+                Pipeline's `prefetch_factor` (or else 2) will be used.
+
+        Yields:
+            Batches of transformed data. Numeric values are stacked into arrays, and padded according to the Pipeline's
+            `pad_value`.
+
+        Raises:
+            AssertionError: If the `batch_size` or `prefetch_factor` are invalid.
+        """
+        assert batch_size > 0, "batch_size must be positive"
+        if num_process is None:
+            num_process = self.num_process
+        if mp.get_start_method(allow_none=True) != 'fork':
+            num_process = 0
+        prefetch_factor = prefetch_factor or self.prefetch_factor or _PREFETCH_FACTOR
+        assert prefetch_factor > 0, "prefetch_factor must be positive"
+        ops = get_current_items(self.ops, mode, epoch)
+        batch_ops = []
+        if self.vectorize:
+            ops, batch_ops = self._split_batch_ops(ops)
+        data = iter(data)
+        batches = iter(lambda: list(itertools.islice(data, batch_size)), [])
+        if num_process == 0:
+            for batch in batches:
+                yield self._transform_batch(batch, ops, batch_ops, mode, self.pad_value)
+            return
+        with mp.Pool(num_process, initializer=_init_transform_worker,
+                     initargs=(ops, batch_ops, mode, self.pad_value)) as pool:
+            pending = collections.deque()
+            for batch in itertools.chain(batches, [None]):
+                if batch is not None:
+                    pending.append(pool.apply_async(_transform_worker, (batch, )))
+                # Results are handed back in order, and only once the queue is full, which bounds the memory usage
+                while pending and (batch is None or len(pending) >= num_process * prefetch_factor):
+                    yield pending.popleft().get()
+
+    @staticmethod
+    def _transform_batch(batch: List[Dict[str, Any]],
+                         ops: List[NumpyOp],
+                         batch_ops: List[NumpyOp],
+                         mode: str,
+                         pad_value: Optional[Union[int, float]]) -> Dict[str, Any]:
+        """Apply pipeline operations to a batch of data instances and then collate them.
+
+        Args:
+            batch: The data instances to be transformed.
+            ops: The ops to run on each data instance.
+            batch_ops: The ops to run on the collated batch.
+            mode: The execution mode.
+            pad_value: The padding value if batch padding is needed. None indicates that no padding is needed.
+
+        Returns:
+            The transformed and collated batch.
+        """
+        items = []
+        for elem in batch:
+            elem = CopyOnWriteDict(elem)
+            forward_numpyop(ops, elem, {'mode': mode})
+            items.append(elem.to_dict())
+        return Pipeline._batch_op_collate(items, ops=batch_ops, mode=mode, pad_value=pad_value, collate_fn=lambda x: x)
 
     def get_results(self, mode: str = "train", epoch: int = 1, num_steps: int = 1,
                     shuffle: bool = False) -> Union[List[Dict[str, Any]], Dict[str, Any]]:
@@ -307,7 +833,11 @@ class Pipeline:
         loader = self.get_loader(mode=mode, epoch=epoch, shuffle=shuffle)
         if isinstance(loader, tf.data.Dataset):
             loader = loader.take(num_steps)
+        shared_memory = uses_shared_memory(loader)
         for idx, batch in enumerate(loader, start=1):
+            if shared_memory:
+                # Shared memory slabs get recycled, so the batches need to be copied before holding on to them
+                batch = detach_batch(batch)
             results.append(batch)
             if idx == num_steps:
                 break
@@ -315,8 +845,11 @@ class Pipeline:
             results = results[0]
         return results
 
-    def get_loader(self, mode: str, epoch: int = 1,
-                   shuffle: Optional[bool] = None) -> Union[DataLoader, tf.data.Dataset]:
+    def get_loader(self,
+                   mode: str,
+                   epoch: int = 1,
+                   shuffle: Optional[bool] = None,
+                   output_keys: Optional[Set[str]] = None) -> Union[DataLoader, tf.data.Dataset]:
         """Get a data loader from the Pipeline for a given `mode` and `epoch`.
 
         Args:
@@ -324,6 +857,9 @@ class Pipeline:
             epoch: The epoch index for the loader. Note that epoch indices are 1-indexed.
             shuffle: Whether to shuffle the data. If None, the value for shuffle is based on mode. NOTE: This argument
                 is only used with FastEstimator Datasets.
+            output_keys: The keys which are consumed downstream of the Pipeline. If provided, any other keys are
+                dropped inside of the worker processes before being collated, and ops whose outputs are never used are
+                skipped. If None, every key is returned. NOTE: This argument is only used with FastEstimator Datasets.
 
         Returns:
             A data loader for the given `mode` and `epoch`.
@@ -341,25 +877,385 @@ class Pipeline:
             # batch dataset
             if isinstance(data, BatchDataset):
                 data.pad_value = self.pad_value
+            # length bucketing
+            bucketing = self.bucket_key is not None and not isinstance(data, BatchDataset) and (
+                batch_size is not None or self.max_tokens is not None)
             # shuffle
             if shuffle is None:
-                shuffle = mode == "train" and batch_size is not None
+                shuffle = mode == "train" and (batch_size is not None or bucketing)
             # collate_fn
             collate_fn = self.collate_fn
-            if collate_fn is None and self.pad_value is not None:
+            ops = get_current_items(self.ops, mode, epoch)
+            if output_keys is not None:
+                ops = self._prune_ops(ops, output_keys)
+            batch_ops = []
+            if collate_fn is None and self.vectorize and (batch_size is not None or bucketing
+                                                          or isinstance(data, BatchDataset)):
+                ops, batch_ops = self._split_batch_ops(ops)
+            if collate_fn is None and self.shared_memory and self.num_process > 0:
+                collate_fn = SharedMemoryCollator(num_slabs=(self.prefetch_factor or _PREFETCH_FACTOR) + 2,
+                                                  pad_value=None if batch_ops else self.pad_value)
+            elif collate_fn is None and self.pad_value is not None and not isinstance(data, BatchDataset) \
+                    and not batch_ops:
+                # BatchDatasets are already padded by the OpDataset
                 collate_fn = self._pad_batch_collate
-            op_dataset = OpDataset(data, get_current_items(self.ops, mode, epoch), mode)
-            batch_size = None if isinstance(data, BatchDataset) else batch_size
-            data = DataLoader(op_dataset,
-                              batch_size=batch_size,
-                              shuffle=False if isinstance(data, BatchDataset) else shuffle,
-                              sampler=RandomSampler(op_dataset) if isinstance(data, BatchDataset) and shuffle else None,
-                              num_workers=self.num_process,
-                              drop_last=False if batch_size is None else self.drop_last,
-                              worker_init_fn=lambda _: np.random.seed(random.randint(0, 2**32 - 1)),
-                              collate_fn=collate_fn)
+            if batch_ops:
+                collate_fn = partial(self._batch_op_collate,
+                                     ops=batch_ops,
+                                     mode=mode,
+                                     pad_value=self.pad_value,
+                                     collate_fn=collate_fn)
+            persist = self.persistent_workers and not isinstance(data, BatchDataset)
+            if persist:
+                # Schedulers hand out different op instances when the active ops change, so the ids of the active ops
+                # identify the signature. The OpDataset's per-epoch seed is deliberately not part of the key since it
+                # only affects BatchDatasets, which are never persisted.
+                loader_key = (id(data), tuple(id(op) for op in ops + batch_ops), batch_size, shuffle, self.num_process,
+                              self.prefetch_factor, None if output_keys is None else frozenset(output_keys))
+                if mode in self._loaders and self._loaders[mode][0] == loader_key:
+                    loader = self._loaders[mode][1]
+                    sampler = loader.batch_sampler if bucketing else loader.sampler
+                    if hasattr(sampler, 'set_epoch'):
+                        sampler.set_epoch(epoch)
+                    return loader
+                self._loaders.pop(mode, None)  # Release the old workers before forking new ones
+            num_cached_ops = 0
+            if self.cache is not None:
+                num_cached_ops = self.num_cached_ops
+                if isinstance(num_cached_ops, dict):
+                    num_cached_ops = num_cached_ops.get(mode, None)
+                if num_cached_ops is None:
+                    num_cached_ops = self._get_num_deterministic_ops(ops)
+                num_cached_ops = min(num_cached_ops, len(ops))
+            dataset_keys = None
+            if output_keys is not None:
+                # The vectorized ops run after the OpDataset, so their inputs must survive it
+                dataset_keys = set(output_keys).union(*[op.inputs for op in batch_ops])
+            op_dataset = OpDataset(data,
+                                   ops,
+                                   mode,
+                                   cache=self.cache,
+                                   num_cached_ops=num_cached_ops,
+                                   output_keys=dataset_keys,
+                                   seed=None if self.seed is None else self.seed + epoch,
+                                   cache_namespace=self._cache_namespace)
+            kwargs = {}
+            if bucketing:
+                kwargs['batch_sampler'] = LengthBucketSampler(self._get_bucket_lengths(mode, data),
+                                                              batch_size=batch_size,
+                                                              max_tokens=self.max_tokens,
+                                                              shuffle=shuffle,
+                                                              drop_last=self.drop_last,
+                                                              num_replicas=self.world_size or 1,
+                                                              rank=self.rank or 0,
+                                                              seed=self.seed)
+                kwargs['batch_sampler'].set_epoch(epoch)
+            elif self.seed is not None:
+                # DistributedSampler also provides seeded shuffling when there is only a single replica
+                batch_size = None if isinstance(data, BatchDataset) else batch_size
+                sampler = DistributedSampler(op_dataset,
+                                             num_replicas=self.world_size or 1,
+                                             rank=self.rank or 0,
+                                             shuffle=shuffle,
+                                             seed=self.seed,
+                                             drop_last=self.drop_last)
+                sampler.set_epoch(epoch)
+                kwargs['batch_size'] = batch_size
+                kwargs['sampler'] = sampler
+                kwargs['drop_last'] = False if batch_size is None else self.drop_last
+            else:
+                batch_size = None if isinstance(data, BatchDataset) else batch_size
+                kwargs['batch_size'] = batch_size
+                kwargs['shuffle'] = False if isinstance(data, BatchDataset) else shuffle
+                kwargs['sampler'] = RandomSampler(op_dataset) if isinstance(data, BatchDataset) and shuffle else None
+                kwargs['drop_last'] = False if batch_size is None else self.drop_last
+            if persist and _PERSISTENT_WORKERS and self.num_process > 0:
+                kwargs['persistent_workers'] = True
+            if self.prefetch_factor is not None and _PREFETCH_FACTOR_ARG and self.num_process > 0:
+                kwargs['prefetch_factor'] = self.prefetch_factor
+            if collate_fn is None:
+                auto_collation = 'batch_sampler' in kwargs or kwargs['batch_size'] is not None
+                collate_fn = partial(self._readonly_collate,
+                                     collate_fn=default_collate if auto_collation else default_convert)
+            loader = DataLoader(op_dataset,
+                                num_workers=self.num_process,
+                                worker_init_fn=lambda _: np.random.seed(random.randint(0, 2**32 - 1)),
+                                collate_fn=collate_fn,
+                                **kwargs)
+            if persist:
+                self._loaders[mode] = (loader_key, loader)
+            data = loader
         return data
 
+    def to_tf_dataset(self, loader: DataLoader) -> Optional[tf.data.Dataset]:
+        """Convert a DataLoader which was built by this Pipeline into an equivalent native tf.data.Dataset.
+
+        Samples are drawn by a parallel tf.data map which invokes the ops through tf.numpy_function, so that the ops
+        are executed by TensorFlow's thread pool. Batching, padding, and prefetching are then handled by tf.data.
+
+        Args:
+            loader: A loader returned by this Pipeline's `get_loader` method.
+
+        Returns:
+            The tf.data.Dataset, or None if the `loader` can't be converted (for example, if it uses a custom
+            `collate_fn`, length bucketing, or sharding).
+        """
+        if not isinstance(loader, DataLoader) or not isinstance(loader.dataset, OpDataset) or self.collate_fn:
+            return None
+        if isinstance(loader.batch_sampler, LengthBucketSampler) or isinstance(loader.sampler, DistributedSampler):
+            return None
+        op_dataset = loader.dataset
+        batch_ops, pad_value = [], self.pad_value
+        if isinstance(loader.collate_fn, partial) and loader.collate_fn.func is Pipeline._batch_op_collate:
+            batch_ops = loader.collate_fn.keywords['ops']
+        sample = op_dataset[0]
+        keys, dtypes = self._get_tf_signature(sample)
+        ranks = [np.ndim(sample[key]) for key in keys]
+
+        def fetch(index: np.ndarray) -> List[np.ndarray]:
+            data = op_dataset[int(index)]
+            return [self._to_tf_compatible(data[key], dtype) for key, dtype in zip(keys, dtypes)]
+
+        def to_dict(*values: tf.Tensor) -> Dict[str, tf.Tensor]:
+            for value, rank in zip(values, ranks):
+                value.set_shape([None] * rank)
+            return dict(zip(keys, values))
+
+        num_parallel_calls = tf.data.experimental.AUTOTUNE if self.num_process > 0 else None
+        dataset = tf.data.Dataset.range(len(op_dataset))
+        if isinstance(loader.sampler, RandomSampler):
+            dataset = dataset.shuffle(len(op_dataset), reshuffle_each_iteration=True)
+        out_types = [tf.as_dtype(dtype) for dtype in dtypes]
+        dataset = dataset.map(lambda idx: tuple(tf.numpy_function(fetch, [idx], out_types)),
+                              num_parallel_calls=num_parallel_calls)
+        dataset = dataset.map(to_dict)
+        if loader.batch_size is not None:
+            if pad_value is not None:
+                padding = {
+                    key: tf.constant(b"" if dtype == np.object_ else pad_value, dtype=tf.as_dtype(dtype))
+                    for key, dtype in zip(keys, dtypes)
+                }
+                dataset = dataset.padded_batch(loader.batch_size,
+                                               padding_values=padding,
+                                               drop_remainder=loader.drop_last)
+            else:
+                dataset = dataset.batch(loader.batch_size, drop_remainder=loader.drop_last)
+        if batch_ops:
+            dataset = self._map_tf_batch_ops(dataset, op_dataset, loader.batch_size, batch_ops, keys, pad_value)
+        return dataset.prefetch(tf.data.experimental.AUTOTUNE)
+
+    def _map_tf_batch_ops(self,
+                          dataset: tf.data.Dataset,
+                          op_dataset: OpDataset,
+                          batch_size: Optional[int],
+                          ops: List[NumpyOp],
+                          keys: List[str],
+                          pad_value: Optional[Union[int, float]]) -> tf.data.Dataset:
+        """Apply vectorized ops to each batch of a tf.data.Dataset.
+
+        Args:
+            dataset: The batched dataset.
+            op_dataset: The dataset from which the batches are drawn, used to determine the output signature.
+            batch_size: The batch size, or None if the `op_dataset` returns batches itself.
+            ops: The vectorized ops to run on each batch.
+            keys: The keys of the batch elements, in the order they are stored within the `dataset`.
+            pad_value: The padding value if batch padding is needed. None indicates that no padding is needed.
+
+        Returns:
+            The `dataset` with the `ops` applied.
+        """
+        mode = op_dataset.mode
+        if batch_size is None:
+            sample = op_dataset[0]
+        else:
+            sample = [op_dataset[idx] for idx in range(min(batch_size, len(op_dataset)))]
+        sample = self._batch_op_collate(sample, ops=ops, mode=mode, pad_value=pad_value, collate_fn=lambda x: x)
+        out_keys, out_dtypes = self._get_tf_signature(sample)
+
+        def run_ops(*values: np.ndarray) -> List[np.ndarray]:
+            batch = {key: value for key, value in zip(keys, values)}
+            forward_numpyop(ops, batch, {'mode': mode}, batched=True)
+            return [self._to_tf_compatible(batch[key], dtype) for key, dtype in zip(out_keys, out_dtypes)]
+
+        def to_dict(*values: tf.Tensor) -> Dict[str, tf.Tensor]:
+            for key, value in zip(out_keys, values):
+                value.set_shape([None] * np.ndim(sample[key]))
+            return dict(zip(out_keys, values))
+
+        num_parallel_calls = tf.data.experimental.AUTOTUNE if self.num_process > 0 else None
+        out_types = [tf.as_dtype(dtype) for dtype in out_dtypes]
+        dataset = dataset.map(lambda batch: tuple(tf.numpy_function(run_ops, [batch[key] for key in keys], out_types)),
+                              num_parallel_calls=num_parallel_calls)
+        return dataset.map(to_dict)
+
+    @staticmethod
+    def _get_tf_signature(data: Mapping[str, Any]) -> Tuple[List[str], List[np.dtype]]:
+        """Determine the keys and numpy dtypes which a data dictionary will have when passed through tf.data.
+
+        Args:
+            data: A sample data dictionary.
+
+        Returns:
+            (keys, dtypes). Strings are represented by the object dtype, which tf.numpy_function maps to tf.string.
+        """
+        keys = list(data.keys())
+        dtypes = []
+        for key in keys:
+            dtype = np.asarray(data[key]).dtype
+            dtypes.append(np.dtype(np.object_) if dtype.kind in "OSU" else dtype)
+        return keys, dtypes
+
+    @staticmethod
+    def _to_tf_compatible(value: Any, dtype: np.dtype) -> np.ndarray:
+        """Convert a value into an array which tf.numpy_function can return.
+
+        Args:
+            value: The value to convert.
+            dtype: The dtype which the output array must have.
+
+        Returns:
+            The converted array.
+        """
+        if dtype == np.object_:
+            value = np.asarray(value)
+            if value.dtype.kind == "U":
+                value = np.char.encode(value, "utf-8")
+            return value.astype(np.object_)
+        return np.asarray(value, dtype=dtype)
+
+    @staticmethod
+    def _split_batch_ops(ops: List[NumpyOp]) -> Tuple[List[NumpyOp], List[NumpyOp]]:
+        """Separate the trailing ops which can be executed on entire batches from those which must run per-sample.
+
+        Args:
+            ops: The ops which are active for the current mode and epoch.
+
+        Returns:
+            (per-sample ops, batch ops). An op is considered safe to run on a batch if it provides its own
+            `forward_batch` implementation, and its `forward` method is the one which that implementation mirrors.
+        """
+        split = len(ops)
+        while split > 0 and Pipeline._is_batch_safe(ops[split - 1]):
+            split -= 1
+        return ops[:split], ops[split:]
+
+    @staticmethod
+    def _is_batch_safe(op: NumpyOp) -> bool:
+        """Determine whether an op has a vectorized `forward_batch` which is equivalent to its `forward`.
+
+        A subclass which overrides `forward` but inherits a vectorized `forward_batch` (ex. class MyNorm(Normalize)) is
+        not batch-safe, since its `forward_batch` would silently ignore the new `forward` behavior.
+
+        Args:
+            op: The op to inspect.
+
+        Returns:
+            Whether the `op` may be executed on an entire batch at once.
+        """
+        owner = next(cls for cls in type(op).__mro__ if 'forward_batch' in cls.__dict__)
+        return owner is not NumpyOp and type(op).forward is owner.forward
+
+    def _get_bucket_lengths(self, mode: str, dataset: Dataset) -> np.ndarray:
+        """Measure the length of the `bucket_key` data for every sample in a `dataset`.
+
+        The lengths are only computed once per dataset, since doing so requires reading through the entire dataset.
+
+        Args:
+            mode: The mode which the `dataset` belongs to.
+            dataset: The dataset to be measured.
+
+        Returns:
+            The length of each sample in the `dataset`.
+        """
+        if mode in self._bucket_lengths and self._bucket_lengths[mode][0] is dataset:
+            return self._bucket_lengths[mode][1]
+        if isinstance(dataset, InMemoryDataset):
+            values = dataset[self.bucket_key]
+        else:
+            values = (dataset[idx][self.bucket_key] for idx in range(len(dataset)))
+        lengths = np.fromiter(
+            (len(value.split()) if isinstance(value, str) else
+             len(value) if isinstance(value, (list, tuple)) or np.ndim(value) > 0 else 1 for value in values),
+            dtype=np.int64,
+            count=len(dataset))
+        self._bucket_lengths[mode] = (dataset, lengths)
+        return lengths
+
+    @staticmethod
+    def _prune_ops(ops: List[NumpyOp], output_keys: Set[str]) -> List[NumpyOp]:
+        """Remove the ops whose outputs are never consumed.
+
+        Args:
+            ops: The ops which are active for the current mode and epoch.
+            output_keys: The keys which are needed at the end of the Pipeline.
+
+        Returns:
+            The subset of `ops` which contribute to the `output_keys`. Ops without any outputs are retained since they
+            might have side effects, except for Delete ops, which become unnecessary once unused keys are discarded at
+            the end of the Pipeline.
+        """
+        live_keys = set(output_keys)
+        needed = []
+        for op in reversed(ops):
+            if isinstance(op, Delete):
+                continue
+            if op.outputs and live_keys.isdisjoint(op.outputs):
+                continue
+            live_keys.difference_update(op.outputs)
+            live_keys.update(op.inputs)
+            needed.append(op)
+        return needed[::-1]
+
+    @staticmethod
+    def _get_num_deterministic_ops(ops: List[NumpyOp]) -> int:
+        """Find how many of the leading `ops` are known to be deterministic.
+
+        Args:
+            ops: The ops which are active for the current mode and epoch.
+
+        Returns:
+            The length of the longest prefix of `ops` which is deterministic.
+        """
+        for idx, op in enumerate(ops):
+            # Exact types are required, since a user subclass of a deterministic op might add randomness
+            if type(op) is Fuse:
+                if Pipeline._get_num_deterministic_ops(op.ops) < len(op.ops):
+                    return idx
+            elif type(op) not in _DETERMINISTIC_OPS:
+                return idx
+        return len(ops)
+
+    @staticmethod
+    def _batch_op_collate(batch: Union[List[MutableMapping[str, Any]], MutableMapping[str, Any]],
+                          ops: List[NumpyOp],
+                          mode: str,
+                          pad_value: Optional[Union[int, float]] = None,
+                          collate_fn: Optional[Callable] = None) -> Dict[str, Any]:
+        """A collate function which stacks a batch of data and then runs vectorized ops on the whole batch at once.
+
+        Args:
+            batch: The data to be batched, or a batch which has already been stacked by a BatchDataset.
+            ops: The ops to run on the stacked batch.
+            mode: The current execution mode.
+            pad_value: The padding value if batch padding is needed. None indicates that no padding is needed.
+            collate_fn: A collate function which accepts an already-stacked batch dictionary, or None to convert the
+                batch with the PyTorch default.
+
+        Returns:
+            The collated batch of data, with the `ops` applied.
+        """
+        if not isinstance(batch, Mapping):
+            if pad_value is not None:
+                pad_batch(batch, pad_value)
+            batch = {key: [elem[key] for elem in batch] for key in batch[0].keys()}
+            for key, values in batch.items():
+                if isinstance(values[0], (np.ndarray, np.number, int, float)):
+                    batch[key] = np.stack(values)
+        forward_numpyop(ops, batch, {'mode': mode}, batched=True)
+        if collate_fn is None:
+            return default_convert(batch)
+        return collate_fn(batch)
+
     def _pad_batch_collate(self, batch: List[MutableMapping[str, Any]]) -> Dict[str, Any]:
         """A collate function which pads a batch of data.
 
@@ -370,4 +1266,22 @@ class Pipeline:
             A padded and collated batch of data.
         """
         pad_batch(batch, self.pad_value)
-        return default_collate(batch)
+        return self._readonly_collate(batch, collate_fn=default_collate)
+
+    @staticmethod
+    def _readonly_collate(batch: Any, collate_fn: Callable[[Any], Any]) -> Any:
+        """A collate function wrapper which quietly accepts read-only numpy arrays.
+
+        The OpDataset hands out arrays which no op has modified as read-only views of the underlying dataset. PyTorch
+        warns about those when converting them to tensors even though collation never writes to them.
+
+        Args:
+            batch: The data to be collated.
+            collate_fn: The PyTorch collate (or convert) function to invoke.
+
+        Returns:
+            The collated batch of data.
+        """
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", message="The given NumPy array is not writable", category=UserWarning)
+            return collate_fn(batch)
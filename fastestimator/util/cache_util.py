@@ -0,0 +1,437 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+import mmap
+import multiprocessing as mp
+import os
+import pickle
+import shutil
+import struct
+import tempfile
+from typing import Any, BinaryIO, Callable, Dict, List, Mapping, Optional, Tuple, Union
+
+import numpy as np
+
+_MAGIC = b"FEC1"
+_ALIGNMENT = 64  # Arrays are aligned to cache lines so that they can be consumed directly from memory-mapped files
+
+
+def _aligned(offset: int) -> int:
+    """Round an `offset` up to the next multiple of the array alignment.
+
+    Args:
+        offset: The offset to be aligned.
+
+    Returns:
+        The aligned offset.
+    """
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+def encode_entry(data: Mapping[str, Any]) -> Tuple[bytes, List[Tuple[np.ndarray, int]], int]:
+    """Prepare a data dictionary to be written by `write_entry`.
+
+    Args:
+        data: The data dictionary to be encoded.
+
+    Returns:
+        (header, [(array, offset), ...], total size in bytes). Numeric numpy arrays are kept separately so that they can
+        be written without copying, while any other values (strings, lists, object arrays, etc.) are pickled into the
+        header.
+    """
+    arrays = []
+    array_specs = {}
+    objects = {}
+    offset = 0
+    for key, value in data.items():
+        if isinstance(value, np.ndarray) and not value.dtype.hasobject:
+            value = np.ascontiguousarray(value)
+            arrays.append((value, offset))
+            array_specs[key] = (value.dtype.str, value.shape, offset)
+            offset = _aligned(offset + value.nbytes)
+        else:
+            objects[key] = value
+    header = pickle.dumps({"arrays": array_specs, "objects": objects})
+    start = _aligned(len(_MAGIC) + 8 + len(header))
+    size = start + arrays[-1][1] + arrays[-1][0].nbytes if arrays else len(_MAGIC) + 8 + len(header)
+    return header, arrays, size
+
+
+def write_entry(file: BinaryIO, data: Union[Mapping[str, Any], Tuple[bytes, List[Tuple[np.ndarray, int]], int]]) -> int:
+    """Serialize a data dictionary into a file in a format which can later be memory-mapped by `read_entry`.
+
+    The file consists of a small pickled header followed by the raw bytes of every numeric numpy array in the `data`,
+    each aligned to a 64 byte boundary.
+
+    Args:
+        file: A binary file handle to write into.
+        data: The data dictionary to be written, or the output of `encode_entry` for that dictionary.
+
+    Returns:
+        The number of bytes written.
+    """
+    header, arrays, size = data if isinstance(data, tuple) else encode_entry(data)
+    start = _aligned(len(_MAGIC) + 8 + len(header))
+    file.write(_MAGIC)
+    file.write(struct.pack("<Q", len(header)))
+    file.write(header)
+    position = len(_MAGIC) + 8 + len(header)
+    for value, offset in arrays:
+        file.write(b"\0" * (start + offset - position))
+        file.write(value.data)
+        position = start + offset + value.nbytes
+    return size
+
+
+def read_entry(path: str) -> Optional[Dict[str, Any]]:
+    """Read a data dictionary which was written by `write_entry`.
+
+    Arrays are returned as read-only views into a memory-mapping of the file, so no data is copied until it is used. The
+    mapping stays valid even if the file is later deleted.
+
+    Args:
+        path: The file to be read.
+
+    Returns:
+        The data dictionary, or None if the file does not exist or has not been completely written yet.
+    """
+    try:
+        with open(path, "rb") as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError):
+        return None  # ValueError is raised when mapping an empty file (an entry which is still being written)
+    return decode_entry(buffer)
+
+
+def decode_entry(buffer: Union[mmap.mmap, bytes], offset: int = 0) -> Optional[Dict[str, Any]]:
+    """Decode a data dictionary which was written by `write_entry` from a `buffer`.
+
+    Arrays are returned as read-only views into the `buffer`, so no data is copied.
+
+    Args:
+        buffer: The buffer containing the entry.
+        offset: Where the entry starts within the `buffer`. It must be a multiple of 64 bytes in order for the arrays
+            to be aligned.
+
+    Returns:
+        The data dictionary, or None if the `buffer` does not contain a valid entry at the given `offset`.
+    """
+    base = offset + len(_MAGIC)
+    if buffer[offset:base] != _MAGIC:
+        return None
+    header_len = struct.unpack("<Q", buffer[base:base + 8])[0]
+    header = pickle.loads(buffer[base + 8:base + 8 + header_len])
+    start = offset + _aligned(len(_MAGIC) + 8 + header_len)
+    data = header["objects"]
+    for key, (dtype, shape, array_offset) in header["arrays"].items():
+        data[key] = np.ndarray(shape=shape, dtype=np.dtype(dtype), buffer=buffer, offset=start + array_offset)
+    return data
+
+
+def _remove(path: str) -> None:
+    """Delete a file if it exists.
+
+    Args:
+        path: The file to be deleted.
+    """
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _default_memory_limit(directory: Optional[str]) -> int:
+    """Choose a default size for the memory tier of a SharedCache.
+
+    Docker only provides 64MB of /dev/shm by default, so the limit is capped at half of the space which is currently
+    free in the given `directory`.
+
+    Args:
+        directory: Where the memory tier will live, or None if it will live in the system temporary directory.
+
+    Returns:
+        The smaller of 1GB and half of the free space in the `directory`.
+    """
+    try:
+        free = shutil.disk_usage(directory or tempfile.gettempdir()).free
+    except OSError:
+        return 0
+    return min(2**30, free // 2)
+
+
+class _CacheTier:
+    """One storage tier of a SharedCache, consisting of a directory of entry files with an LRU size limit.
+
+    Args:
+        directory: Where to store the entries.
+        limit: The maximum number of bytes to hold in this tier.
+    """
+    def __init__(self, directory: str, limit: int) -> None:
+        self.directory = directory
+        self.limit = limit
+        self.used = mp.Value('q', 0)  # An estimate of the bytes in use, which is re-synchronized during eviction
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def reserve(self, key: str, size: int) -> Optional[List[Tuple[str, str]]]:
+        """Claim space for a new entry. The caller must hold the SharedCache lock.
+
+        Args:
+            key: The key of the new entry.
+            size: How many bytes the new entry requires.
+
+        Returns:
+            None if the entry can't be stored (because it is too large, or because another process is already writing
+            it). Otherwise a list of (key, path) pairs for the entries which were evicted to make room. The evicted
+            files have been renamed so that they are no longer visible to readers, and should be disposed of by the
+            caller.
+        """
+        if size > self.limit:
+            return None
+        try:
+            # Create an empty placeholder so that no other process will try to write the same entry
+            os.close(os.open(self.path(key), os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        except FileExistsError:
+            return None
+        evicted = []
+        if self.used.value + size > self.limit:
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(".tmp") or entry.name == key:
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.name))
+            entries.sort()
+            used = sum(entry[1] for entry in entries)
+            for _, entry_size, entry_key in entries:
+                if used + size <= self.limit:
+                    break
+                victim = self.path(entry_key) + ".{}.evict.tmp".format(os.getpid())
+                try:
+                    os.rename(self.path(entry_key), victim)
+                except FileNotFoundError:
+                    continue
+                evicted.append((entry_key, victim))
+                used -= entry_size
+            self.used.value = used
+        self.used.value += size
+        return evicted
+
+    def write(self, key: str, data: Tuple[bytes, List[Tuple[np.ndarray, int]], int]) -> None:
+        """Write an entry into a reserved location.
+
+        Args:
+            key: The key of the entry.
+            data: The encoded data to be written.
+        """
+        tmp_path = self.path(key) + ".{}.tmp".format(os.getpid())
+        try:
+            with open(tmp_path, "wb") as file:
+                write_entry(file, data)
+            os.replace(tmp_path, self.path(key))  # Readers will never see a partially written entry
+        except BaseException:
+            _remove(tmp_path)
+            raise
+
+    def adopt(self, key: str, path: str) -> None:
+        """Copy an existing entry file into a reserved location.
+
+        Args:
+            key: The key of the entry.
+            path: The file to be copied.
+        """
+        tmp_path = self.path(key) + ".{}.tmp".format(os.getpid())
+        try:
+            shutil.copyfile(path, tmp_path)
+            os.replace(tmp_path, self.path(key))
+        except BaseException:
+            _remove(tmp_path)
+            raise
+
+
+class SharedCache:
+    """A two-tier key/value cache for data dictionaries which can be shared between forked worker processes.
+
+    This class is intentionally not @traceable.
+
+    Entries are stored as files which are memory-mapped when read, so cached arrays are handed out as read-only views
+    rather than copies. The memory tier lives in shared memory (/dev/shm) when it is available, and the optional disk
+    tier lives on regular storage. Each tier has its own size limit, with the least recently used entries being
+    evicted when space is needed. Entries evicted from the memory tier are demoted to the disk tier (if there is one).
+
+    Since forked processes share the bookkeeping counters, a SharedCache should be created in the main process before
+    any workers are started. Files created by the cache are deleted when the cache object in the main process is garbage
+    collected, or when `close` is invoked. A cache never interrupts the computation it is accelerating: if an entry
+    can't be written (for example because /dev/shm is full), a warning is printed once and the entry is not cached.
+
+    ```python
+    cache = fe.util.SharedCache(memory_limit=2**30)
+    cache.put("a", {"x": np.ones((2, 2))})
+    cache.get("a")  # {"x": array([[1., 1.], [1., 1.]])}
+    cache.get("b")  # None
+    ```
+
+    Args:
+        memory_limit: The maximum number of bytes to keep in the memory tier. If None, the smaller of 1GB and half of
+            the space currently free in /dev/shm will be used.
+        disk_limit: The maximum number of bytes to keep in the disk tier. If 0, the disk tier is disabled.
+        disk_dir: Where to create the disk tier. If None, the system temporary directory will be used.
+    """
+    def __init__(self, memory_limit: Optional[int] = None, disk_limit: int = 0, disk_dir: Optional[str] = None) -> None:
+        shm_dir = "/dev/shm" if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK) else None
+        if memory_limit is None:
+            memory_limit = _default_memory_limit(shm_dir)
+        assert memory_limit >= 0 and disk_limit >= 0, "cache limits must be non-negative"
+        self.memory = _CacheTier(tempfile.mkdtemp(prefix="fe_cache_", dir=shm_dir), memory_limit)
+        self.disk = None
+        if disk_limit > 0:
+            self.disk = _CacheTier(tempfile.mkdtemp(prefix="fe_cache_", dir=disk_dir), disk_limit)
+        self.lock = mp.Lock()
+        self.hits = mp.Value('q', 0)
+        self.misses = mp.Value('q', 0)
+        self.evictions = mp.Value('q', 0)
+        self.write_failed = mp.Value('b', 0)
+        self._owner = os.getpid()
+
+    def _tiers(self) -> List[_CacheTier]:
+        return [tier for tier in (self.memory, self.disk) if tier is not None]
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Retrieve an entry from the cache.
+
+        Args:
+            key: The key of the entry. It must be a valid file name.
+
+        Returns:
+            The data dictionary stored under the `key`, or None if it is not in the cache.
+        """
+        for tier in self._tiers():
+            data = read_entry(tier.path(key))
+            if data is not None:
+                try:
+                    os.utime(tier.path(key))  # Mark the entry as recently used
+                except FileNotFoundError:
+                    pass  # Evicted in the meantime, but the memory map is still valid
+                with self.hits.get_lock():
+                    self.hits.value += 1
+                return data
+        with self.misses.get_lock():
+            self.misses.value += 1
+        return None
+
+    def put(self, key: str, data: Mapping[str, Any]) -> None:
+        """Store an entry in the cache.
+
+        Nothing happens if the `key` is already present, if the entry is too large for every tier, or if the entry
+        can't be written (ex. because the underlying storage is out of space).
+
+        Args:
+            key: The key of the entry. It must be a valid file name.
+            data: The data dictionary to be cached.
+        """
+        encoded = encode_entry(data)
+        self._put(key, encoded[2], lambda tier: tier.write(key, encoded))
+
+    def _put(self,
+             key: str,
+             size: int,
+             writer: Callable[[_CacheTier], None],
+             tiers: Optional[List[_CacheTier]] = None) -> None:
+        """Reserve space for an entry in the first tier with room for it, and then write the entry.
+
+        Args:
+            key: The key of the entry.
+            size: The (approximate) size of the entry in bytes.
+            writer: A function which writes the entry into a given tier.
+            tiers: The tiers to consider, or None to consider all of them.
+        """
+        for tier in tiers or self._tiers():
+            with self.lock:
+                evicted = tier.reserve(key, size)
+            if evicted is None:
+                if os.path.exists(tier.path(key)):
+                    return  # Already cached (or being cached by another process)
+                continue
+            try:
+                writer(tier)
+            except BaseException as err:
+                with self.lock:
+                    tier.used.value -= size
+                _remove(tier.path(key))
+                self._dispose(tier, evicted)
+                if not isinstance(err, OSError):
+                    raise
+                self._warn_write_failure(err)
+                return
+            self._dispose(tier, evicted)
+            return
+
+    def _warn_write_failure(self, err: OSError) -> None:
+        """Print a warning the first time that any process fails to write a cache entry.
+
+        Args:
+            err: The error which prevented the entry from being written.
+        """
+        with self.write_failed.get_lock():
+            if self.write_failed.value:
+                return
+            self.write_failed.value = 1
+        print("FastEstimator-Warn: Unable to write to the cache ({}). Entries which don't fit will not be cached. "
+              "Consider reducing the cache memory_limit or enlarging /dev/shm.".format(err))
+
+    def _dispose(self, tier: _CacheTier, evicted: List[Tuple[str, str]]) -> None:
+        """Get rid of entries which were evicted from a given `tier`, demoting them to the disk tier if possible.
+
+        Args:
+            tier: The tier that the entries were evicted from.
+            evicted: (key, path) pairs for the evicted entries.
+        """
+        if not evicted:
+            return
+        with self.evictions.get_lock():
+            self.evictions.value += len(evicted)
+        for key, path in evicted:
+            if tier is self.memory and self.disk is not None:
+                self._put(key, os.path.getsize(path), lambda disk: disk.adopt(key, path), [self.disk])
+            _remove(path)
+
+    def stats(self) -> Dict[str, int]:
+        """Get usage statistics for the cache.
+
+        Returns:
+            A dictionary containing the number of hits, misses, and evictions across all processes, as well as the
+            approximate number of bytes used by each tier.
+        """
+        return {
+            "hits": self.hits.value,
+            "misses": self.misses.value,
+            "evictions": self.evictions.value,
+            "memory_bytes": self.memory.used.value,
+            "disk_bytes": 0 if self.disk is None else self.disk.used.value
+        }
+
+    def close(self) -> None:
+        """Delete all of the files held by the cache.
+        """
+        if os.getpid() != getattr(self, "_owner", None):
+            return  # Only the process which created the cache may clean it up
+        for tier in self._tiers():
+            shutil.rmtree(tier.directory, ignore_errors=True)
+
+    def __del__(self) -> None:
+        self.close()
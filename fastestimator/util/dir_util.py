@@ -0,0 +1,189 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+_MANIFEST_VERSION = 1
+
+
+def _list_dir(path: str) -> Tuple[List[int], List[str], List[str]]:
+    """List the contents of a single directory.
+
+    Args:
+        path: The directory to be listed.
+
+    Returns:
+        ([mtime_ns, size] of the directory, names of the files within it, names of the subdirectories within it).
+        Symbolic links to directories are not reported as subdirectories, which matches the behavior of `os.walk`.
+        Unreadable directories are treated as empty.
+    """
+    files, dirs = [], []
+    try:
+        fingerprint = _fingerprint(path)
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        if not entry.is_symlink():
+                            dirs.append(entry.name)
+                    else:
+                        files.append(entry.name)
+                except OSError:
+                    continue
+    except OSError:
+        return [-1, -1], [], []
+    return fingerprint, files, dirs
+
+
+def _fingerprint(path: str) -> List[int]:
+    """Compute the fingerprint of a directory, which changes whenever entries are added to or removed from it.
+
+    Args:
+        path: The directory to be fingerprinted.
+
+    Returns:
+        The [mtime_ns, size] of the directory, or [-1, -1] if it cannot be accessed.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return [-1, -1]
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _load_manifest(manifest: str, config: Dict[str, Any], root_dir: str,
+                   pool: ThreadPoolExecutor) -> Optional[Dict[str, Tuple[List[int], List[str]]]]:
+    """Load a directory listing from a manifest file, provided that it is still up to date.
+
+    Args:
+        manifest: The path to the manifest file.
+        config: The scanning configuration, which must match the one used to create the manifest.
+        root_dir: The directory which was scanned.
+        pool: A thread pool with which to check the directory fingerprints.
+
+    Returns:
+        The listing stored in the manifest, or None if the manifest is missing, invalid, or out of date.
+    """
+    try:
+        with open(manifest, 'r') as f:
+            content = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(content, dict) or content.get("config") != config:
+        return None
+    listing = content.get("dirs", {})
+    paths = [os.path.join(root_dir, rel_dir) for rel_dir in listing]
+    for fingerprint, (expected, _) in zip(pool.map(_fingerprint, paths), listing.values()):
+        # A directory's mtime changes whenever an entry is added, removed, or renamed within it
+        if fingerprint != expected or fingerprint == [-1, -1]:
+            return None
+    return listing
+
+
+def _save_manifest(manifest: str, config: Dict[str, Any], listing: Dict[str, Tuple[List[int], List[str]]]) -> None:
+    """Write a directory listing to a manifest file.
+
+    The file is written atomically, so concurrent readers will never observe a partial manifest.
+
+    Args:
+        manifest: The path to the manifest file.
+        config: The scanning configuration.
+        listing: The directory listing to be saved.
+    """
+    tmp_path = "{}.{}.tmp".format(manifest, os.getpid())
+    try:
+        with open(tmp_path, 'w') as f:
+            json.dump({"config": config, "dirs": listing}, f)
+        os.replace(tmp_path, manifest)
+    except OSError as err:
+        print("FastEstimator-Warn: Unable to save directory manifest to {}: {}".format(manifest, err))
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def scan_dir(root_dir: str,
+             file_extension: Optional[str] = None,
+             recursive: bool = True,
+             num_threads: Optional[int] = None,
+             manifest: Optional[str] = None) -> Dict[str, List[str]]:
+    """Find all of the (non-hidden) files within a directory tree.
+
+    Directories are listed in parallel using `os.scandir`, which is substantially faster than `os.walk` on network file
+    systems where every listing incurs a round trip. The results are sorted so that they do not depend on the order in
+    which the file system returns entries.
+
+    If a `manifest` path is provided, the listing is saved to that file along with a fingerprint (mtime and size) of
+    every directory in the tree. Subsequent scans with the same arguments will reuse the manifest instead of listing the
+    directories again, so long as none of the directories have changed since it was written. Since only the directories
+    need to be checked, this is much faster than a full scan. The manifest should be stored outside of the `root_dir`,
+    since otherwise writing it would modify the directory it is meant to describe.
+
+    ```python
+    files = fe.util.scan_dir("/data/images", file_extension=".png", manifest="/data/images.manifest.json")
+    # {"": ["a.png"], "cat": ["c1.png", "c2.png"], "dog": ["d1.png"]}
+    ```
+
+    Args:
+        root_dir: The directory to be scanned.
+        file_extension: If provided then only files ending with the file_extension will be included.
+        recursive: Whether to search within subdirectories for files.
+        num_threads: How many threads to use for listing directories. If None, a default based on the number of CPUs
+            will be used.
+        manifest: Where to save (and later reuse) the directory listing. If None, the directory will always be scanned.
+
+    Returns:
+        A mapping from every directory which contains matching files (relative to the `root_dir`, with the `root_dir`
+        itself being "") to a sorted list of the names of the matching files. The directories are in depth-first order.
+
+    Raises:
+        AssertionError: If the `root_dir` is not a directory.
+    """
+    root_dir = os.path.normpath(root_dir)
+    if not os.path.isdir(root_dir):
+        raise AssertionError("Provided path is not a directory")
+    config = {
+        "version": _MANIFEST_VERSION,
+        "root_dir": os.path.abspath(root_dir),
+        "file_extension": file_extension,
+        "recursive": recursive
+    }
+    if manifest is not None and os.path.abspath(manifest).startswith(os.path.join(config["root_dir"], "")):
+        print("FastEstimator-Warn: The manifest for {} is inside of the scanned directory, so it will never be reused. "
+              "Please save it somewhere else instead.".format(root_dir))
+    with ThreadPoolExecutor(max_workers=num_threads) as pool:
+        listing = None
+        if manifest is not None:
+            listing = _load_manifest(manifest, config, root_dir, pool)
+        if listing is None:
+            listing = {}
+            level = [""]
+            while level:
+                next_level = []
+                for rel_dir, (fingerprint, files, dirs) in zip(level, pool.map(
+                        _list_dir, [os.path.join(root_dir, rel_dir) for rel_dir in level])):
+                    files = sorted(
+                        file for file in files
+                        if not file.startswith(".") and (file_extension is None or file.endswith(file_extension)))
+                    listing[rel_dir] = (fingerprint, files)
+                    if recursive:
+                        next_level.extend(os.path.join(rel_dir, d) for d in dirs)
+                level = next_level
+            # Sorting by path components gives a depth-first ordering of the directories
+            listing = {rel_dir: listing[rel_dir] for rel_dir in sorted(listing, key=lambda d: d.split(os.sep))}
+            if manifest is not None:
+                _save_manifest(manifest, config, listing)
+    return {rel_dir: files for rel_dir, (_, files) in listing.items() if files}
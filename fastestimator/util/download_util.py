@@ -0,0 +1,363 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+import hashlib
+import http.client
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+from fastestimator.util.wget_util import bar_custom
+
+
+class _RateLimiter:
+    """A bandwidth limit which is shared between several threads.
+
+    This class is intentionally not @traceable.
+
+    Args:
+        max_bytes_per_sec: The maximum combined rate at which bytes may be consumed, or None for no limit.
+    """
+    def __init__(self, max_bytes_per_sec: Optional[float]) -> None:
+        assert max_bytes_per_sec is None or max_bytes_per_sec > 0, "max_bytes_per_sec must be positive"
+        self.max_bytes_per_sec = max_bytes_per_sec
+        self.lock = threading.Lock()
+        self.next_time = time.monotonic()
+
+    def consume(self, num_bytes: int) -> None:
+        """Wait until `num_bytes` more bytes may be consumed without exceeding the bandwidth limit.
+
+        Args:
+            num_bytes: How many bytes were (or are about to be) consumed.
+        """
+        if self.max_bytes_per_sec is None:
+            return
+        with self.lock:
+            now = time.monotonic()
+            # Each caller reserves the next slot of time, so concurrent callers are served in turn
+            start = max(now, self.next_time)
+            self.next_time = start + num_bytes / self.max_bytes_per_sec
+        if start > now:
+            time.sleep(start - now)
+
+
+class _Progress:
+    """A combined progress bar for several concurrent downloads.
+
+    This class is intentionally not @traceable.
+
+    Args:
+        verbose: Whether to display the progress bar.
+    """
+    def __init__(self, verbose: bool) -> None:
+        self.verbose = verbose
+        self.lock = threading.Lock()
+        self.current = 0
+        self.total = 0
+
+    def expect(self, num_bytes: int) -> None:
+        """Increase the total number of bytes which are expected to be downloaded.
+
+        Args:
+            num_bytes: How many additional bytes to expect.
+        """
+        with self.lock:
+            self.total += num_bytes
+
+    def update(self, num_bytes: int) -> None:
+        """Record that more bytes have been downloaded.
+
+        Args:
+            num_bytes: How many additional bytes have been downloaded.
+        """
+        with self.lock:
+            self.current += num_bytes
+            if self.verbose:
+                sys.stdout.write("\r{}".format(bar_custom(self.current, self.total)))
+
+    def close(self) -> None:
+        """Finish displaying the progress bar.
+        """
+        if self.verbose and self.current:
+            sys.stdout.write("\n")
+
+
+def _hash_file(path: str, algorithm: str) -> str:
+    """Compute the hex digest of a file.
+
+    Args:
+        path: The file to hash.
+        algorithm: The name of a hashlib algorithm, for example 'sha256' or 'md5'.
+
+    Returns:
+        The hex digest of the file's contents.
+    """
+    digest = hashlib.new(algorithm)
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(2**20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _parse_checksum(checksum: str) -> Tuple[str, str]:
+    """Split a checksum into its algorithm and digest.
+
+    Args:
+        checksum: A checksum like 'sha256:<hex digest>'. If no algorithm is specified then sha256 is assumed.
+
+    Returns:
+        (algorithm, hex digest).
+
+    Raises:
+        ValueError: If the algorithm is not supported by hashlib.
+    """
+    algorithm, _, expected = checksum.rpartition(":")
+    algorithm = algorithm.lower() or 'sha256'
+    if algorithm not in hashlib.algorithms_available:
+        raise ValueError("Unsupported checksum algorithm: {}".format(algorithm))
+    return algorithm, expected.lower()
+
+
+def _fetch(url: str,
+           part_path: str,
+           limiter: _RateLimiter,
+           progress: _Progress,
+           chunk_size: int,
+           timeout: float) -> None:
+    """Download a file, resuming from a partial download if one exists.
+
+    Args:
+        url: The url to download.
+        part_path: Where to save the (partial) download.
+        limiter: The bandwidth limit.
+        progress: The progress bar to update.
+        chunk_size: How many bytes to read at a time.
+        timeout: How many seconds to wait for the server before giving up.
+
+    Raises:
+        IOError: If the connection ended before the entire file was received.
+        HTTPException: If the server misbehaved.
+    """
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    request = urllib.request.Request(url, headers={"User-Agent": "FastEstimator"})
+    if offset:
+        request.add_header("Range", "bytes={}-".format(offset))
+    try:
+        response = urllib.request.urlopen(request, timeout=timeout)
+    except urllib.error.HTTPError as err:
+        if err.code == 416 and offset:
+            return  # The partial download already contains the entire file
+        raise
+    with response:
+        if offset and response.status != 206:
+            offset = 0  # The server does not support resuming, so start over
+        length = response.headers.get("Content-Length")
+        remaining = None if length is None else int(length)
+        progress.expect(remaining or 0)
+        received = 0
+        with open(part_path, 'ab' if offset else 'wb') as file:
+            for chunk in iter(lambda: response.read(chunk_size), b''):
+                limiter.consume(len(chunk))
+                file.write(chunk)
+                received += len(chunk)
+                progress.update(len(chunk))
+    if remaining is not None and received < remaining:
+        raise IOError("Connection closed after {} of {} bytes of {}".format(received, remaining, url))
+
+
+def download_file(url: str,
+                  path: str,
+                  checksum: Optional[str] = None,
+                  max_bytes_per_sec: Optional[float] = None,
+                  retries: int = 3,
+                  timeout: float = 60.0,
+                  chunk_size: int = 2**20,
+                  verbose: bool = True) -> str:
+    """Download a single file. See `download_files` for details.
+
+    ```python
+    fe.util.download_file("https://host/data.zip", "/data/data.zip", checksum="sha256:9f86d08...")
+    ```
+
+    Args:
+        url: The url to download.
+        path: Where to save the file.
+        checksum: The expected checksum of the file, like 'sha256:<hex digest>' or 'md5:<hex digest>'.
+        max_bytes_per_sec: The maximum download speed, or None for no limit.
+        retries: How many times to resume the download if the connection fails.
+        timeout: How many seconds to wait for the server before giving up on a connection.
+        chunk_size: How many bytes to read at a time.
+        verbose: Whether to display a progress bar.
+
+    Returns:
+        The `path`.
+    """
+    return download_files([url], [path],
+                          checksums=None if checksum is None else [checksum],
+                          max_bytes_per_sec=max_bytes_per_sec,
+                          retries=retries,
+                          timeout=timeout,
+                          chunk_size=chunk_size,
+                          verbose=verbose)[0]
+
+
+def download_files(urls: Sequence[str],
+                   paths: Sequence[str],
+                   checksums: Optional[Sequence[Optional[str]]] = None,
+                   num_threads: int = 4,
+                   max_bytes_per_sec: Optional[float] = None,
+                   retries: int = 3,
+                   timeout: float = 60.0,
+                   chunk_size: int = 2**20,
+                   verbose: bool = True) -> List[str]:
+    """Download several files concurrently.
+
+    Each file is downloaded to '<path>.part' and only moved to its final `path` once it is complete (and its checksum,
+    if provided, has been verified). An interrupted download therefore never masquerades as a complete file. Instead,
+    the next attempt resumes from where the previous one stopped using an HTTP range request (or starts over if the
+    server does not support them). Files which already exist at their `path` are not downloaded again, but are still
+    verified against their checksum if one is provided.
+
+    ```python
+    fe.util.download_files(["https://host/a.tar.gz", "https://host/b.tar.gz"],
+                           ["/data/a.tar.gz", "/data/b.tar.gz"],
+                           num_threads=2,
+                           max_bytes_per_sec=50e6)
+    ```
+
+    Args:
+        urls: The urls to download.
+        paths: Where to save each of the files.
+        checksums: The expected checksum of each file, like 'sha256:<hex digest>' or 'md5:<hex digest>'. Individual
+            entries may be None to skip verification of a particular file.
+        num_threads: How many files to download at the same time.
+        max_bytes_per_sec: The maximum combined download speed, or None for no limit.
+        retries: How many times to resume each download if the connection fails.
+        timeout: How many seconds to wait for the server before giving up on a connection.
+        chunk_size: How many bytes to read at a time.
+        verbose: Whether to display a progress bar.
+
+    Returns:
+        The `paths`.
+
+    Raises:
+        AssertionError: If the arguments have inconsistent lengths.
+        ValueError: If a downloaded file does not match its checksum.
+    """
+    urls, paths = list(urls), list(paths)
+    checksums = [None] * len(urls) if checksums is None else list(checksums)
+    assert len(urls) == len(paths) == len(checksums), "urls, paths, and checksums must all have the same length"
+    assert num_threads > 0, "num_threads must be positive"
+    limiter = _RateLimiter(max_bytes_per_sec)
+    progress = _Progress(verbose)
+
+    def _download(url: str, path: str, checksum: Optional[str]) -> str:
+        algorithm, expected = _parse_checksum(checksum) if checksum else (None, None)
+        if os.path.exists(path):
+            if expected is None or _hash_file(path, algorithm) == expected:
+                return path
+            print("FastEstimator-Warn: {} does not match its checksum, so it will be downloaded again".format(path))
+            os.remove(path)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        part_path = path + ".part"
+        for attempt in range(retries + 1):
+            try:
+                _fetch(url, part_path, limiter, progress, chunk_size, timeout)
+                break
+            except (IOError, http.client.HTTPException) as err:
+                if (isinstance(err, urllib.error.HTTPError) and err.code < 500) or attempt == retries:
+                    raise
+                print("FastEstimator-Warn: Download of {} was interrupted ({}), resuming".format(url, err))
+        if expected is not None:
+            actual = _hash_file(part_path, algorithm)
+            if actual != expected:
+                os.remove(part_path)
+                raise ValueError("Download of {} has {} checksum {}, but {} was expected".format(
+                    url, algorithm, actual, expected))
+        os.replace(part_path, path)
+        return path
+
+    if verbose:
+        print("Downloading {} file(s)".format(len(urls)))
+    try:
+        with ThreadPoolExecutor(max_workers=num_threads) as pool:
+            return list(pool.map(_download, urls, paths, checksums))
+    finally:
+        progress.close()
+
+
+def _merge_tree(src: str, dst: str) -> None:
+    """Move the contents of one directory into another, merging any subdirectories which exist in both.
+
+    Args:
+        src: The directory whose contents should be moved. It must be on the same file system as `dst`.
+        dst: The directory to move the contents into.
+    """
+    for entry in os.scandir(src):
+        target = os.path.join(dst, entry.name)
+        if entry.is_dir(follow_symlinks=False) and os.path.isdir(target):
+            _merge_tree(entry.path, target)
+        else:
+            os.replace(entry.path, target)
+
+
+def extract_archives(archives: Sequence[str],
+                     dest_dir: str,
+                     num_threads: Optional[int] = None,
+                     verbose: bool = True) -> None:
+    """Extract several archives concurrently.
+
+    The archives are first extracted into a hidden staging directory within the `dest_dir`, and their top-level
+    contents are then renamed into the `dest_dir`. Since renames are atomic, a directory will never appear in the
+    `dest_dir` until all of the archives have been fully extracted, so an interrupted extraction cannot be mistaken for
+    a complete one. Any archive format supported by `shutil.unpack_archive` may be used (zip, tar, tar.gz, etc.).
+
+    ```python
+    fe.util.extract_archives(["/data/a.tar.gz", "/data/b.tar.gz"], "/data")
+    ```
+
+    Args:
+        archives: The archives to extract.
+        dest_dir: Where to extract the archives.
+        num_threads: How many archives to extract at the same time. If None, a default based on the number of CPUs will
+            be used.
+        verbose: Whether to print progress messages.
+    """
+    os.makedirs(dest_dir, exist_ok=True)
+    staging_dir = tempfile.mkdtemp(prefix=".staging_", dir=dest_dir)
+    try:
+        # Each archive gets its own directory so that concurrent extractions do not race to create the same folders
+        targets = [os.path.join(staging_dir, str(idx)) for idx in range(len(archives))]
+
+        def _extract(archive: str, target: str) -> None:
+            if verbose:
+                print("Extracting {}".format(archive))
+            shutil.unpack_archive(archive, target)
+
+        with ThreadPoolExecutor(max_workers=num_threads) as pool:
+            list(pool.map(_extract, archives, targets))
+        merged_dir = os.path.join(staging_dir, "merged")
+        os.makedirs(merged_dir)
+        for target in targets:
+            _merge_tree(target, merged_dir)
+        _merge_tree(merged_dir, dest_dir)
+    finally:
+        shutil.rmtree(staging_dir, ignore_errors=True)
@@ -0,0 +1,155 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+from functools import partial
+from typing import Any, Dict, Iterable, List, Mapping, MutableMapping, Optional, Sequence, Union
+
+import numpy as np
+import torch
+from torch.utils.data import DataLoader
+from torch.utils.data.dataloader import default_collate
+
+from fastestimator.util.util import pad_batch
+
+NP_TO_TORCH_DTYPE = {
+    np.dtype('bool'): torch.bool,
+    np.dtype('uint8'): torch.uint8,
+    np.dtype('int8'): torch.int8,
+    np.dtype('int16'): torch.int16,
+    np.dtype('int32'): torch.int32,
+    np.dtype('int64'): torch.int64,
+    np.dtype('float16'): torch.float16,
+    np.dtype('float32'): torch.float32,
+    np.dtype('float64'): torch.float64
+}
+
+
+class SharedMemoryCollator:
+    """A collate function which assembles batches directly inside of a ring of reusable shared-memory slabs.
+
+    This class is intentionally not @traceable.
+
+    The default PyTorch collate function allocates a brand new shared-memory tensor for every key of every batch, and
+    BatchDataset outputs (which are stacked inside of the worker) get copied a second time when they are moved into
+    shared memory for transport. This collator instead keeps `num_slabs` pre-allocated shared-memory buffers per key in
+    each worker process, and stacks the samples straight into them. Only a handle to the buffer then needs to be sent to
+    the main process, and since the same buffers are re-used, the main process can also re-use its existing memory
+    mappings.
+
+    Since slabs are recycled, a batch produced by this collator will be overwritten once the worker which produced it
+    has generated `num_slabs` more batches. Consumers which need to retain batches for longer than that must copy them
+    (see `detach_batch`). The Estimator does this automatically for every key which is read by a Trace.
+
+    Args:
+        num_slabs: How many slabs each worker should cycle through for each key. This must be larger than the number of
+            batches a single worker can have in flight (the DataLoader prefetch factor) plus the number of batches which
+            the consumer holds onto at any given time.
+        pad_value: The padding value if batch padding is needed. None indicates that no padding is needed.
+    """
+    slabs: Dict[str, List[Optional[torch.Tensor]]]
+
+    def __init__(self, num_slabs: int, pad_value: Optional[Union[int, float]] = None) -> None:
+        assert num_slabs > 0, "num_slabs must be positive"
+        self.num_slabs = num_slabs
+        self.pad_value = pad_value
+        self.slabs = {}
+        self.counter = 0
+
+    def __call__(self, batch: Union[List[MutableMapping[str, Any]], Mapping[str, Any]]) -> Dict[str, Any]:
+        """Collate a `batch` of data into shared memory.
+
+        Args:
+            batch: Either a list of data dictionaries to be stacked, or a dictionary of data which has already been
+                batched (as is the case for BatchDatasets).
+
+        Returns:
+            A dictionary of collated data. Numeric keys will be torch.Tensors backed by shared memory.
+        """
+        slot = self.counter % self.num_slabs
+        self.counter += 1
+        if isinstance(batch, Mapping):
+            result = {}
+            for key, value in batch.items():
+                if isinstance(value, np.ndarray) and value.dtype in NP_TO_TORCH_DTYPE:
+                    result[key] = self._get_slab(key, slot, value.shape, value.dtype)
+                    np.copyto(result[key].numpy(), value)
+                else:
+                    result[key] = value
+            return result
+        if self.pad_value is not None:
+            pad_batch(batch, self.pad_value)
+        result = {}
+        for key in batch[0].keys():
+            values = [np.asarray(elem[key]) for elem in batch]
+            shape, dtype = values[0].shape, values[0].dtype
+            if dtype in NP_TO_TORCH_DTYPE and all(val.shape == shape and val.dtype == dtype for val in values):
+                result[key] = self._get_slab(key, slot, (len(values), ) + shape, dtype)
+                np.stack(values, out=result[key].numpy())
+            else:
+                result[key] = default_collate([elem[key] for elem in batch])
+        return result
+
+    def _get_slab(self, key: str, slot: int, shape: Sequence[int], dtype: np.dtype) -> torch.Tensor:
+        """Get a shared-memory tensor to write a batch into, allocating (or re-allocating) memory only when necessary.
+
+        Args:
+            key: The data key which the slab will hold.
+            slot: Which slab in the ring to use.
+            shape: The required shape of the output tensor.
+            dtype: The required numpy dtype of the output tensor.
+
+        Returns:
+            A view of a shared-memory slab with the requested `shape` and `dtype`.
+        """
+        ring = self.slabs.setdefault(key, [None] * self.num_slabs)
+        size = int(np.prod(shape, dtype=np.int64))
+        slab = ring[slot]
+        if slab is None or slab.dtype != NP_TO_TORCH_DTYPE[dtype] or slab.numel() < size:
+            slab = torch.empty(size, dtype=NP_TO_TORCH_DTYPE[dtype]).share_memory_()
+            ring[slot] = slab
+        return slab[:size].view(tuple(shape))
+
+
+def uses_shared_memory(loader: Any) -> bool:
+    """Determine whether a given `loader` produces batches using a SharedMemoryCollator.
+
+    Args:
+        loader: The data loader to inspect.
+
+    Returns:
+        True iff the `loader` is a DataLoader whose batches are backed by recycled shared-memory slabs.
+    """
+    if not isinstance(loader, DataLoader):
+        return False
+    collate_fn = loader.collate_fn
+    if isinstance(collate_fn, partial):
+        collate_fn = collate_fn.keywords.get('collate_fn')
+    return isinstance(collate_fn, SharedMemoryCollator)
+
+
+def detach_batch(batch: Mapping[str, Any], keys: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """Copy tensors out of a batch produced by a SharedMemoryCollator so that they survive slab recycling.
+
+    Args:
+        batch: The batch to be detached from shared memory.
+        keys: Which keys to copy, or None to copy every key. Other keys are passed through unchanged.
+
+    Returns:
+        A new batch dictionary in which the selected tensors no longer alias any shared-memory slab.
+    """
+    keys = batch.keys() if keys is None else set(keys)
+    return {
+        key: val.clone() if key in keys and isinstance(val, torch.Tensor) else val
+        for key, val in batch.items()
+    }
@@ -0,0 +1,131 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+import math
+from typing import Hashable, Iterable
+
+import numpy as np
+
+
+def _mix(hashes: np.ndarray) -> np.ndarray:
+    """Scramble 64 bit hash values so that every output bit depends on every input bit (the splitmix64 finalizer).
+
+    This is necessary since python hashes are not uniformly distributed (for example hash(5) == 5).
+
+    Args:
+        hashes: An array of uint64 values.
+
+    Returns:
+        The scrambled values.
+    """
+    with np.errstate(over='ignore'):
+        hashes = hashes ^ (hashes >> np.uint64(30))
+        hashes = hashes * np.uint64(0xbf58476d1ce4e5b9)
+        hashes = hashes ^ (hashes >> np.uint64(27))
+        hashes = hashes * np.uint64(0x94d049bb133111eb)
+        return hashes ^ (hashes >> np.uint64(31))
+
+
+class HyperLogLog:
+    """A fixed-size sketch which estimates how many distinct values it has been shown.
+
+    This class is intentionally not @traceable.
+
+    The sketch uses 2**`precision` bytes of memory regardless of how many values are added, and has a typical relative
+    error of 1.04 / sqrt(2**`precision`) (about 0.8% with the default precision). Small cardinalities are estimated
+    using linear counting, which is nearly exact. Values are identified by their python hash, so this should only be
+    used within a single process.
+
+    ```python
+    hll = fe.util.HyperLogLog()
+    hll.add(["a", "b", "a"])
+    hll.add_array(np.array([1, 2, 3]))
+    hll.count()  # 5
+    ```
+
+    Args:
+        precision: The base 2 logarithm of the number of registers to use, between 4 and 18.
+
+    Raises:
+        AssertionError: If the `precision` is invalid.
+    """
+    def __init__(self, precision: int = 14) -> None:
+        assert 4 <= precision <= 18, "precision must be between 4 and 18, but got {}".format(precision)
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def add(self, values: Iterable[Hashable]) -> None:
+        """Add hashable python objects to the sketch.
+
+        Args:
+            values: The values to add.
+        """
+        hashes = np.fromiter((hash(value) for value in values), dtype=np.int64)
+        self._add_hashes(_mix(hashes.view(np.uint64)))
+
+    def add_array(self, values: np.ndarray) -> None:
+        """Add the elements of a numeric array to the sketch.
+
+        This is much faster than `add`, but values are identified by their binary representation, so (for example) 1
+        and 1.0 are considered to be different from one another if they are added in arrays of different dtypes.
+
+        Args:
+            values: The values to add.
+        """
+        values = np.ascontiguousarray(values).ravel()
+        if values.dtype.itemsize != 8:
+            values = values.astype(np.float64 if values.dtype.kind == 'f' else np.int64)
+        self._add_hashes(_mix(values.view(np.uint64)))
+
+    def _add_hashes(self, hashes: np.ndarray) -> None:
+        """Add well-distributed 64 bit hash values to the sketch.
+
+        Args:
+            hashes: The uint64 hash values to add.
+        """
+        if hashes.size == 0:
+            return
+        bucket = (hashes & np.uint64(len(self.registers) - 1)).astype(np.intp)
+        remainder = hashes >> np.uint64(self.precision)
+        # The rank is the position of the lowest set bit, which is exactly computable since it is a power of 2
+        lowest = remainder & (~remainder + np.uint64(1))
+        rank = np.log2(np.maximum(lowest, np.uint64(1)).astype(np.float64)) + 1
+        rank[remainder == 0] = 64 - self.precision + 1
+        np.maximum.at(self.registers, bucket, rank.astype(np.uint8))
+
+    def merge(self, other: 'HyperLogLog') -> None:
+        """Combine another sketch into this one, as if all of its values had been added to this sketch.
+
+        Args:
+            other: The sketch to merge. It must have the same precision as this one.
+
+        Raises:
+            AssertionError: If the sketches have different precisions.
+        """
+        assert self.precision == other.precision, "Only sketches with the same precision can be merged"
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def count(self) -> int:
+        """Estimate the number of distinct values which have been added to the sketch.
+
+        Returns:
+            The estimated cardinality.
+        """
+        num_registers = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / num_registers)
+        estimate = alpha * num_registers**2 / np.sum(np.exp2(-self.registers.astype(np.float64)))
+        num_zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * num_registers and num_zeros:
+            estimate = num_registers * math.log(num_registers / num_zeros)
+        return int(round(estimate))
@@ -20,7 +20,9 @@ import sys
 import time
 from ast import literal_eval
 from contextlib import ContextDecorator
-from typing import Any, Callable, Dict, KeysView, List, MutableMapping, Optional, Set, Tuple, Type, TypeVar, Union
+from copy import deepcopy
+from typing import Any, Callable, Dict, Iterable, Iterator, KeysView, List, Mapping, MutableMapping, Optional, Set, \
+    Tuple, Type, TypeVar, Union
 
 import matplotlib.pyplot as plt
 import numpy as np
@@ -574,6 +576,99 @@ class DefaultKeyDict(dict):
         return res
 
 
+class CopyOnWriteDict(MutableMapping[str, Any]):
+    """A dictionary which lazily protects the contents of an underlying mapping from being modified.
+
+    This class is intentionally not @traceable.
+
+    Mutable values (numpy arrays, lists, dicts, etc.) are copied the first time that they are read from this dictionary,
+    so they may be freely modified in place without affecting the `base` mapping. Writes and deletions only affect this
+    dictionary, leaving the `base` unchanged. This makes it a cheap replacement for deepcopy when only a few of the keys
+    are going to be touched. Values which are never read can be extracted without copying via `to_dict`.
+
+    ```python
+    base = {"x": np.ones((2, 2)), "y": [1, 2]}
+    d = fe.util.CopyOnWriteDict(base)
+    d["x"][0, 0] = 5  # base["x"] is still all ones
+    d["y"].append(3)  # base["y"] is still [1, 2]
+    ```
+
+    Args:
+        base: The mapping to wrap. It will not be modified by this dictionary.
+    """
+    def __init__(self, base: Mapping[str, Any]) -> None:
+        if isinstance(base, CopyOnWriteDict) and not base.overlay and not base.deleted:
+            base = base.base  # Avoid copying values out of an untouched wrapper when they are read through this one
+        self.base = base
+        self.overlay = {}
+        self.deleted = set()
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.overlay:
+            return self.overlay[key]
+        if key in self.deleted:
+            raise KeyError(key)
+        value = self.base[key]
+        if isinstance(value, np.ndarray) and not value.dtype.hasobject:
+            value = self.overlay[key] = value.copy()
+        elif not isinstance(value, (str, bytes, int, float, complex, bool, np.generic, type(None))):
+            value = self.overlay[key] = deepcopy(value)
+        return value
+
+    def to_dict(self, keys: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+        """Extract the contents of this dictionary without copying the numpy arrays which have not yet been read.
+
+        Arrays which are still owned by the `base` mapping are returned as read-only views, so that consumers which only
+        need to read them (such as batch collation) can do so without any memory being copied.
+
+        Args:
+            keys: Which keys to extract, or None to extract all of them. Keys which are not present are ignored.
+
+        Returns:
+            A new dictionary containing the requested keys.
+        """
+        keys = None if keys is None else set(keys)
+        result = {}
+        for key in self:
+            if keys is not None and key not in keys:
+                continue
+            value = self.overlay[key] if key in self.overlay else self.base[key]
+            if key not in self.overlay:
+                if isinstance(value, np.ndarray) and not value.dtype.hasobject:
+                    value = value.view()
+                    value.flags.writeable = False
+                else:
+                    value = self[key]
+            result[key] = value
+        return result
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.overlay[key] = value
+        self.deleted.discard(key)
+
+    def __delitem__(self, key: str) -> None:
+        if key not in self:
+            raise KeyError(key)
+        self.overlay.pop(key, None)
+        if key in self.base:
+            self.deleted.add(key)
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self.overlay or (key not in self.deleted and key in self.base)
+
+    def __iter__(self) -> Iterator[str]:
+        # Snapshot the keys so that values can be overwritten while iterating
+        keys = list(self.overlay.keys())
+        keys.extend(key for key in self.base.keys() if key not in self.overlay and key not in self.deleted)
+        return iter(keys)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in iter(self))
+
+    def __repr__(self) -> str:
+        return repr(dict(self.items()))
+
+
 def get_num_devices():
     """Determine the number of available GPUs.
 
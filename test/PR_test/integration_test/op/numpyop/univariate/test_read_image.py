@@ -13,8 +13,12 @@
 # limitations under the License.
 # ==============================================================================
 import os
+import pickle
+import tempfile
 import unittest
+from copy import deepcopy
 
+import cv2
 import numpy as np
 
 from fastestimator.op.numpyop.univariate import ReadImage
@@ -45,3 +49,38 @@ class TestReadImage(unittest.TestCase):
             self.assertTrue(is_equal(output[0], self.expected_image_output))
         with self.subTest('Check second image in data'):
             self.assertTrue(is_equal(output[1], self.expected_second_image_output))
+
+    def test_multi_input_threads(self):
+        data = [self.img1_path, self.img2_path]
+        image = ReadImage(inputs='x', outputs='x', num_threads=2)
+        output = image.forward(data=data, state={})
+        with self.subTest('Check first image in data'):
+            self.assertTrue(is_equal(output[0], self.expected_image_output))
+        with self.subTest('Check second image in data'):
+            self.assertTrue(is_equal(output[1], self.expected_second_image_output))
+
+    def test_target_size(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, "img.jpg")
+            img = np.zeros((400, 300, 3), dtype=np.uint8)
+            img[..., 2] = 255  # Red in BGR
+            cv2.imwrite(path, img)
+            image = ReadImage(inputs='x', outputs='x', parent_path=tmpdir, target_size=(90, 60))
+            output = image.forward(data=["img.jpg"], state={})[0]
+            with self.subTest('Check reduced shape'):
+                self.assertEqual(output.shape, (100, 75, 3))
+            with self.subTest('Check channel order'):
+                self.assertGreater(output[50, 30, 0], 200)
+                self.assertLess(output[50, 30, 2], 50)
+
+    def test_copy_after_use(self):
+        image = ReadImage(inputs='x', outputs='x', num_threads=2)
+        image.forward(data=[self.img1_path, self.img2_path], state={})
+        pickle.dumps(image)
+        output = deepcopy(image).forward(data=[self.img1_path, self.img2_path], state={})
+        self.assertTrue(is_equal(output[1], self.expected_second_image_output))
+
+    def test_missing_file(self):
+        image = ReadImage(inputs='x', outputs='x')
+        with self.assertRaises(ValueError):
+            image.forward(data=[self.img1_path + ".missing"], state={})
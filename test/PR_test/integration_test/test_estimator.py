@@ -12,6 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ==============================================================================
+import os
+import tempfile
 import unittest
 from io import StringIO
 
@@ -24,11 +26,13 @@ import fastestimator as fe
 from fastestimator.architecture.pytorch.lenet import LeNet as LeNetTorch
 from fastestimator.architecture.tensorflow.lenet import LeNet as LeNetTf
 from fastestimator.dataset.data import mnist
+from fastestimator.op.numpyop import LambdaOp
 from fastestimator.op.tensorop import TensorOp
 from fastestimator.op.tensorop.loss import CrossEntropy
 from fastestimator.op.tensorop.model import ModelOp, UpdateOp
 from fastestimator.schedule.schedule import get_current_items
 from fastestimator.trace import Trace
+from fastestimator.trace.io import CSVLogger, RestoreWizard, TensorBoard, Traceability
 
 
 class TorchCustomDataset(Dataset):
@@ -310,6 +314,92 @@ class TestEstimatorWarmup(unittest.TestCase):
         self.assertTrue(True)
 
 
+class TestEstimatorRequiredKeys(unittest.TestCase):
+    """This test includes:
+    * fe.estimator.Estimator._get_required_keys
+    * fe.estimator.Estimator._get_trace_keys
+
+    This test has dependency on:
+    * fe.estimator.Estimator._prepare_traces
+    * fe.network.BaseNetwork.get_effective_input_keys
+    """
+    @classmethod
+    def setUpClass(cls):
+        cls.data = fe.dataset.NumpyDataset({
+            "x": np.random.rand(20, 28, 28, 1).astype(np.float32),
+            "y": np.random.randint(10, size=(20, )),
+            "z": np.ones((20, 3), dtype=np.float32)
+        })
+        model = fe.build(model_fn=LeNetTf, optimizer_fn="adam")
+        cls.network = fe.Network(ops=[
+            ModelOp(model=model, inputs="x", outputs="y_pred"),
+            CrossEntropy(inputs=("y_pred", "y"), outputs="ce"),
+            UpdateOp(model=model, loss_name="ce")
+        ])
+
+    def _get_required_keys(self, traces=None, monitor_names=None):
+        pipeline = fe.Pipeline(train_data=self.data, batch_size=10)
+        est = fe.Estimator(pipeline=pipeline,
+                           network=self.network,
+                           epochs=1,
+                           traces=traces,
+                           monitor_names=monitor_names)
+        est._prepare_traces({"train"})
+        return est._get_required_keys("train", 1)
+
+    def test_estimator_required_keys_prune_unused(self):
+        keys = self._get_required_keys()
+        self.assertIsNotNone(keys)
+        self.assertTrue({"x", "y", "ce"}.issubset(keys))
+        self.assertNotIn("z", keys)
+
+    def test_estimator_required_keys_keep_monitor_names(self):
+        keys = self._get_required_keys(monitor_names="z")
+        self.assertIsNotNone(keys)
+        self.assertIn("z", keys)
+
+    def test_estimator_required_keys_wildcard_trace(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            with self.subTest("CSVLogger"):
+                csv_logger = CSVLogger(filename=os.path.join(tmp_dir, "log.csv"), mode="train")
+                self.assertIsNone(self._get_required_keys(traces=csv_logger))
+
+            with self.subTest("TensorBoard"):
+                tensorboard = TensorBoard(log_dir=tmp_dir, write_graph=False)
+                self.assertIsNone(self._get_required_keys(traces=tensorboard))
+
+            with self.subTest("RestoreWizard"):
+                keys = self._get_required_keys(traces=RestoreWizard(directory=os.path.join(tmp_dir, "wizard")))
+                self.assertIsNotNone(keys)
+                self.assertNotIn("z", keys)
+
+            with self.subTest("Traceability"):
+                keys = self._get_required_keys(traces=Traceability(save_path=os.path.join(tmp_dir, "report")))
+                self.assertIsNotNone(keys)
+                self.assertNotIn("z", keys)
+
+    def test_estimator_fit_skip_dead_op(self):
+        calls = {"live": 0, "dead": 0}
+
+        def live_fn(y):
+            calls["live"] += 1
+            return y
+
+        def dead_fn(x):
+            calls["dead"] += 1
+            return x
+
+        pipeline = fe.Pipeline(train_data=self.data,
+                               batch_size=10,
+                               num_process=0,
+                               ops=[LambdaOp(fn=live_fn, inputs="y", outputs="y"),
+                                    LambdaOp(fn=dead_fn, inputs="x", outputs="x_unused")])
+        est = fe.Estimator(pipeline=pipeline, network=self.network, epochs=1, log_steps=None)
+        est.fit(warmup=False)
+        self.assertGreater(calls["live"], 0)
+        self.assertEqual(calls["dead"], 0)
+
+
 class ShoutNameOp(TensorOp):
     def __init__(self, name, iostream, inputs=None, outputs=None, mode=None):
         super().__init__(inputs, outputs, mode)
@@ -12,6 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ==============================================================================
+import csv
+import json
+import os
+import tempfile
 import unittest
 
 import numpy as np
@@ -42,6 +46,11 @@ class NumpyOpAdd1(NumpyOp):
         return data + 1
 
 
+class MinmaxPlus1(fe.op.numpyop.univariate.Minmax):
+    def forward(self, data, state):
+        return [elem + 1 for elem in super().forward(data, state)]
+
+
 class TorchCustomDataset(Dataset):
     def __init__(self, data):
         super().__init__()
@@ -307,6 +316,30 @@ class TestPipelineBechmark(unittest.TestCase):
                 except:
                     self.fail("exception occur")
 
+    def test_pipeline_benchmark_sweep(self):
+        pipeline = fe.Pipeline(train_data=self.sample_torch_dataset, ops=NumpyOpAdd1(inputs="x", outputs="y"))
+        save_path = os.path.join(tempfile.mkdtemp(), "benchmark.json")
+        results = pipeline.benchmark(num_steps=5, num_process=[0, 2], batch_size=[1, 2], save_path=save_path)
+        self.assertEqual(len(results), 4)
+        self.assertEqual([(res["num_process"], res["batch_size"]) for res in results], [(0, 1), (0, 2), (2, 1), (2, 2)])
+        self.assertEqual(results[0]["ops"][0]["name"], "NumpyOpAdd1")
+        self.assertTrue(all(res["steps"] == 5 for res in results))
+        with open(save_path) as file:
+            self.assertEqual(json.load(file), results)
+        # The pipeline settings should be restored afterwards
+        self.assertIsNone(pipeline.batch_size)
+
+    def test_pipeline_benchmark_csv(self):
+        pipeline = fe.Pipeline(train_data=self.sample_torch_dataset,
+                               ops=NumpyOpAdd1(inputs="x", outputs="y"),
+                               batch_size=2)
+        save_path = os.path.join(tempfile.mkdtemp(), "benchmark.csv")
+        pipeline.benchmark(num_steps=5, save_path=save_path)
+        with open(save_path) as file:
+            rows = list(csv.DictReader(file))
+        self.assertEqual(len(rows), 1)
+        self.assertIn("op0_NumpyOpAdd1_p99", rows[0])
+
 
 class TestPipelineTransform(unittest.TestCase):
     """ This test has dependency on:
@@ -331,6 +364,43 @@ class TestPipelineTransform(unittest.TestCase):
         self.assertTrue(is_equal(data, ans))
 
 
+class TestPipelineTransformBatches(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.records = [{"x": np.array([idx, idx], dtype=np.float32)} for idx in range(10)]
+
+    def check_batches(self, batches):
+        self.assertEqual([len(batch["x"]) for batch in batches], [4, 4, 2])
+        x = np.concatenate([batch["x"] for batch in batches])
+        y = np.concatenate([batch["y"] for batch in batches])
+        self.assertTrue(is_equal(x, np.repeat(np.arange(10, dtype=np.float32)[:, None], 2, axis=1)))
+        self.assertTrue(is_equal(y, x + 1))
+
+    def test_single_process(self):
+        pipeline = fe.Pipeline(ops=[NumpyOpAdd1(inputs="x", outputs="y")], num_process=0)
+        batches = list(pipeline.transform_batches(iter(self.records), mode="infer", batch_size=4))
+        self.check_batches(batches)
+
+    def test_multi_process(self):
+        pipeline = fe.Pipeline(ops=[NumpyOpAdd1(inputs="x", outputs="y")], num_process=2)
+        batches = list(pipeline.transform_batches(iter(self.records), mode="infer", batch_size=4, prefetch_factor=1))
+        self.check_batches(batches)
+
+    def test_bounded_prefetch(self):
+        consumed = []
+
+        def records():
+            for record in self.records:
+                consumed.append(record)
+                yield record
+
+        pipeline = fe.Pipeline(ops=[NumpyOpAdd1(inputs="x", outputs="y")], num_process=1)
+        batches = pipeline.transform_batches(records(), mode="infer", batch_size=2, prefetch_factor=2)
+        next(batches)
+        self.assertLessEqual(len(consumed), 4)
+        batches.close()
+
+
 class TestPipelineGetResults(unittest.TestCase):
     @classmethod
     def setUpClass(cls):
@@ -535,3 +605,178 @@ class TestPipelineGetLoader(unittest.TestCase):
 
         ans = {"x": torch.tensor([[[1, -1], [1, -1]], [[1, 1], [-1, -1]]], dtype=torch.float32)}
         self.assertTrue(is_equal(ans, result))
+
+    def test_pipeline_get_loader_torch_dataset_vectorize(self):
+        dataset = fe.dataset.NumpyDataset({"x": np.array([[1, 2, 3, 5], [0, 1, 1, 2]], dtype=np.float32)})
+        pipeline = fe.Pipeline(train_data=dataset,
+                               ops=[NumpyOpAdd1(inputs="x", outputs="x"), fe.op.numpyop.univariate.Minmax("x", "y")],
+                               batch_size=2,
+                               vectorize=True)
+        loader = pipeline.get_loader(mode="train", shuffle=False)
+        for idx, batch in enumerate(loader, start=1):
+            result = batch
+            if idx == 1:
+                break
+
+        ans = {
+            "x": torch.tensor([[2, 3, 4, 6], [1, 2, 2, 3]], dtype=torch.float32),
+            "y": torch.tensor([[0, 0.25, 0.5, 1], [0, 0.5, 0.5, 1]], dtype=torch.float32)
+        }
+        self.assertTrue(is_equal(ans, result))
+
+    def test_pipeline_get_loader_vectorize_subclass_override(self):
+        dataset = fe.dataset.NumpyDataset({"x": np.array([[1, 2, 3, 5], [0, 1, 1, 2]], dtype=np.float32)})
+        op = MinmaxPlus1("x", "y")
+        pipeline = fe.Pipeline(train_data=dataset, ops=op, batch_size=2, vectorize=True)
+        self.assertEqual(pipeline._split_batch_ops([op]), ([op], []))
+        batch = pipeline.get_loader(mode="train", shuffle=False).__iter__().__next__()
+        ans = torch.tensor([[1, 1.25, 1.5, 2], [1, 1.5, 1.5, 2]], dtype=torch.float32)
+        self.assertTrue(is_equal(ans, batch["y"]))
+
+    def test_pipeline_get_loader_persistent_workers(self):
+        op = NumpyOpAdd1(inputs="x", outputs="y")
+        pipeline = fe.Pipeline(train_data=self.sample_torch_dataset,
+                               ops=EpochScheduler({1: op, 3: NumpyOpAdd1(inputs="x", outputs="y")}),
+                               batch_size=2,
+                               persistent_workers=True)
+        loader1 = pipeline.get_loader(mode="train", epoch=1)
+        loader2 = pipeline.get_loader(mode="train", epoch=2)
+        loader3 = pipeline.get_loader(mode="train", epoch=3)
+        self.assertIs(loader1, loader2)
+        self.assertIsNot(loader2, loader3)
+
+    def test_pipeline_get_loader_cache(self):
+        cache = fe.util.SharedCache(memory_limit=2**20)
+        dataset = fe.dataset.NumpyDataset({"x": np.array([[1, 2, 3, 5], [0, 1, 1, 2]], dtype=np.float32)})
+        pipeline = fe.Pipeline(train_data=dataset,
+                               ops=[fe.op.numpyop.univariate.Minmax("x", "x"), NumpyOpAdd1(inputs="x", outputs="y")],
+                               batch_size=2,
+                               num_process=0,
+                               cache=cache)
+        for epoch in [1, 2]:
+            loader = pipeline.get_loader(mode="train", epoch=epoch, shuffle=False)
+            result = next(iter(loader))
+            ans = {
+                "x": torch.tensor([[0, 0.25, 0.5, 1], [0, 0.5, 0.5, 1]], dtype=torch.float32),
+                "y": torch.tensor([[1, 1.25, 1.5, 2], [1, 1.5, 1.5, 2]], dtype=torch.float32)
+            }
+            self.assertTrue(is_equal(ans, result))
+        self.assertEqual(cache.stats()["hits"], 2)
+        cache.close()
+
+    def test_pipeline_get_loader_cache_shared_between_pipelines(self):
+        cache = fe.util.SharedCache(memory_limit=2**20)
+        dataset = fe.dataset.NumpyDataset({"x": np.array([[1, 2, 3, 5], [0, 1, 1, 2]], dtype=np.float32)})
+        op = fe.op.numpyop.univariate.Minmax("x", "x")
+        for _ in range(2):
+            # Same dataset and op ids, but a different Pipeline must not see the other one's entries
+            pipeline = fe.Pipeline(train_data=dataset, ops=op, batch_size=2, num_process=0, cache=cache)
+            next(iter(pipeline.get_loader(mode="train", shuffle=False)))
+        self.assertEqual(cache.stats()["hits"], 0)
+        cache.close()
+
+    def test_pipeline_deterministic_ops_exact_type(self):
+        class RandomMinmax(fe.op.numpyop.univariate.Minmax):
+            def forward(self, data, state):
+                return [elem * np.random.rand() for elem in super().forward(data, state)]
+
+        ops = [fe.op.numpyop.univariate.Minmax("x", "x"), RandomMinmax("x", "x")]
+        self.assertEqual(fe.Pipeline._get_num_deterministic_ops(ops), 1)
+
+    def test_pipeline_get_loader_output_keys(self):
+        dataset = fe.dataset.NumpyDataset({"x": np.array([[1, 2], [3, 4]], dtype=np.float32), "z": np.ones((2, 2))})
+        unused_op = NumpyOpAdd1(inputs="x", outputs="w")
+        pipeline = fe.Pipeline(train_data=dataset,
+                               ops=[NumpyOpAdd1(inputs="x", outputs="y"), unused_op],
+                               batch_size=2,
+                               num_process=0)
+        loader = pipeline.get_loader(mode="train", shuffle=False, output_keys={"y"})
+        self.assertNotIn(unused_op, loader.dataset.ops)
+        result = next(iter(loader))
+        ans = {"y": torch.tensor([[2, 3], [4, 5]], dtype=torch.float32)}
+        self.assertTrue(is_equal(ans, result))
+
+    def test_pipeline_get_loader_world_size(self):
+        dataset = fe.dataset.NumpyDataset({"x": np.arange(9)})
+        results = []
+        for rank in range(2):
+            pipeline = fe.Pipeline(train_data=dataset, batch_size=2, world_size=2, rank=rank, num_process=0)
+            loader = pipeline.get_loader(mode="train", epoch=3)
+            results.append([batch["x"].numpy().tolist() for batch in loader])
+        self.assertEqual(len(results[0]), len(results[1]))
+        samples = [x for rank_batches in results for batch in rank_batches for x in batch]
+        self.assertEqual(len(samples), 10)  # One sample is repeated so that both ranks get 5 samples
+        self.assertEqual(set(samples), set(range(9)))
+
+    def test_pipeline_get_loader_bucket_key(self):
+        dataset = fe.dataset.NumpyDataset({"x": [np.ones(length) for length in [1, 9, 2, 8, 3, 7]]})
+        pipeline = fe.Pipeline(train_data=dataset, batch_size=2, pad_value=0, bucket_key="x", num_process=0)
+        loader = pipeline.get_loader(mode="train", shuffle=False)
+        shapes = [tuple(batch["x"].shape) for batch in loader]
+        self.assertEqual(shapes, [(2, 2), (2, 7), (2, 9)])
+
+    def test_pipeline_get_loader_max_tokens(self):
+        dataset = fe.dataset.NumpyDataset({"x": [np.ones(length) for length in [1, 1, 1, 1, 8, 8]]})
+        pipeline = fe.Pipeline(train_data=dataset, pad_value=0, bucket_key="x", max_tokens=8, num_process=0)
+        loader = pipeline.get_loader(mode="train", shuffle=False)
+        shapes = [tuple(batch["x"].shape) for batch in loader]
+        self.assertEqual(shapes, [(4, 1), (1, 8), (1, 8)])
+
+
+class TestPipelineAutoTune(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.sample_torch_dataset = get_sample_torch_dataset()
+
+    def test_pipeline_tune_slow_network(self):
+        pipeline = fe.Pipeline(train_data=self.sample_torch_dataset, batch_size=2, num_process=8, auto_tune=True)
+        pipeline.tune(mode="train", epoch=1, step_time=100.0)
+        self.assertEqual(pipeline.num_process, 1)
+        self.assertGreaterEqual(pipeline.prefetch_factor, 2)
+
+    def test_pipeline_tune_fast_network(self):
+        pipeline = fe.Pipeline(train_data=self.sample_torch_dataset, batch_size=2, num_process=1, auto_tune=True)
+        pipeline.tune(mode="train", epoch=1, step_time=1e-9)
+        self.assertEqual(pipeline.num_process, os.cpu_count())
+
+    def test_pipeline_adjust(self):
+        pipeline = fe.Pipeline(train_data=self.sample_torch_dataset, batch_size=2, num_process=1, auto_tune=True)
+        pipeline.adjust(mode="train", wait_fraction=0.0)
+        self.assertEqual(pipeline.num_process, 1)
+        pipeline.adjust(mode="train", wait_fraction=0.5)
+        self.assertEqual(pipeline.num_process, min(2, os.cpu_count()))
+
+    def test_pipeline_adjust_removes_idle_workers(self):
+        pipeline = fe.Pipeline(train_data=self.sample_torch_dataset, batch_size=2, num_process=8, auto_tune=True)
+        pipeline.tune(mode="train", epoch=1, step_time=1e-9)
+        pipeline.adjust(mode="train", wait_fraction=0.0, step_time=100.0)
+        self.assertEqual(pipeline.num_process, 1)
+        pipeline.adjust(mode="train", wait_fraction=0.03, step_time=1e-9)  # Neither starved nor idle
+        self.assertEqual(pipeline.num_process, 1)
+
+
+class TestPipelineToTfDataset(unittest.TestCase):
+    def test_pipeline_to_tf_dataset(self):
+        dataset = fe.dataset.NumpyDataset({"x": np.array([[0], [1], [2], [3]], dtype=np.float32)})
+        pipeline = fe.Pipeline(train_data=dataset,
+                               ops=NumpyOpAdd1(inputs="x", outputs="y"),
+                               batch_size=2,
+                               tf_native=True)
+        loader = pipeline.to_tf_dataset(pipeline.get_loader(mode="train", shuffle=False))
+        self.assertIsInstance(loader, tf.data.Dataset)
+        batch = next(iter(loader))
+        self.assertTrue(is_equal(batch["x"].numpy(), np.array([[0], [1]], dtype=np.float32)))
+        self.assertTrue(is_equal(batch["y"].numpy(), np.array([[1], [2]], dtype=np.float32)))
+
+    def test_pipeline_to_tf_dataset_pad(self):
+        dataset = fe.dataset.NumpyDataset({"x": [np.ones((2, 1), dtype=np.float32), np.ones((1, 2), dtype=np.float32)]})
+        pipeline = fe.Pipeline(train_data=dataset, pad_value=-1, batch_size=2, tf_native=True)
+        loader = pipeline.to_tf_dataset(pipeline.get_loader(mode="train", shuffle=False))
+        batch = next(iter(loader))
+        ans = np.array([[[1, -1], [1, -1]], [[1, 1], [-1, -1]]], dtype=np.float32)
+        self.assertTrue(is_equal(batch["x"].numpy(), ans))
+
+    def test_pipeline_to_tf_dataset_custom_collate(self):
+        dataset = fe.dataset.NumpyDataset({"x": np.array([[0], [1], [2], [3]], dtype=np.float32)})
+        pipeline = fe.Pipeline(train_data=dataset, batch_size=2, collate_fn=lambda x: x, tf_native=True)
+        self.assertIsNone(pipeline.to_tf_dataset(pipeline.get_loader(mode="train")))
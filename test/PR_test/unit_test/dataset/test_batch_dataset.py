@@ -13,6 +13,7 @@
 # limitations under the License.
 # ==============================================================================
 import unittest
+from unittest import mock
 
 import numpy as np
 import tensorflow as tf
@@ -26,6 +27,17 @@ def inputs():
         yield {'x': np.random.rand(16), 'y': np.random.randint(16)}
 
 
+class _LegacyGenerator:
+    """A numpy.random.Generator restricted to the API of numpy 1.18 (the newest version supported by TF 2.3)."""
+    def __init__(self, seed):
+        self.rng = np.random.Generator(np.random.PCG64(seed))
+
+    def __getattr__(self, name):
+        if name == "permuted":  # Added in numpy 1.20
+            raise AttributeError(name)
+        return getattr(self.rng, name)
+
+
 class TestBatchDataset(unittest.TestCase):
     def test_dataset(self):
         ds1 = GeneratorDataset(generator=inputs(), samples_per_epoch=10)
@@ -34,9 +46,55 @@ class TestBatchDataset(unittest.TestCase):
 
         self.assertEqual(len(unpaired_ds), 5)
 
+    def test_summary_forwards_arguments(self):
+        cached = fe.dataset.CachedDataset(fe.dataset.NumpyDataset({"x": np.arange(100) % 7}))
+        generated = GeneratorDataset(generator=inputs(), samples_per_epoch=10)
+        batch_ds = fe.dataset.BatchDataset(datasets=[cached, generated], num_samples=[2, 2])
+        summary = batch_ds.summary(approximate=True, sample_size=10)
+        self.assertIn("num_unique_values", summary.keys["x"].estimated)
+        self.assertIn("y", summary.keys)
+        summary = batch_ds.summary(approximate=False)
+        self.assertEqual(summary.keys["x"].num_unique_values, 7)
+        self.assertIsNone(summary.keys["x"].estimated)
+
     def test_split(self):
         (x_train, y_train), _ = tf.keras.datasets.mnist.load_data()
         train_data = fe.dataset.NumpyDataset({"x": x_train, "y": y_train})
         train_data.split(0.1)
 
         self.assertEqual(len(train_data), 54000)
+
+    def test_seeded_index_maps(self):
+        ds1 = fe.dataset.NumpyDataset({"x": np.arange(10)})
+        ds2 = fe.dataset.NumpyDataset({"x": np.arange(10)})
+        batch_ds = fe.dataset.BatchDataset(datasets=[ds1, ds2], num_samples=[2, 2])
+        batch_ds.reset_index_maps(seed=5)
+        maps = batch_ds.index_maps
+        batch_ds.reset_index_maps(seed=5)
+        for expected, actual in zip(maps, batch_ds.index_maps):
+            np.testing.assert_array_equal(expected, actual)
+
+    def test_index_maps_are_permutations(self):
+        ds1 = fe.dataset.NumpyDataset({"x": np.arange(10)})
+        ds2 = fe.dataset.NumpyDataset({"x": np.arange(4)})
+        batch_ds = fe.dataset.BatchDataset(datasets=[ds1, ds2], num_samples=[2, 2])
+        self.assertEqual(len(batch_ds.index_maps[1]), 12)
+        for repeat in batch_ds.index_maps[1].reshape(3, 4):
+            self.assertEqual(sorted(repeat.tolist()), [0, 1, 2, 3])
+
+    def test_index_maps_legacy_numpy(self):
+        ds1 = fe.dataset.NumpyDataset({"x": np.arange(10)})
+        ds2 = fe.dataset.NumpyDataset({"x": np.arange(4)})
+        with mock.patch("numpy.random.default_rng", new=_LegacyGenerator):
+            batch_ds = fe.dataset.BatchDataset(datasets=[ds1, ds2], num_samples=[2, 2])
+            batch_ds.reset_index_maps(seed=5)
+        for repeat in batch_ds.index_maps[1].reshape(3, 4):
+            self.assertEqual(sorted(repeat.tolist()), [0, 1, 2, 3])
+
+    def test_batch_contents(self):
+        ds1 = fe.dataset.NumpyDataset({"x": np.arange(10)})
+        ds2 = fe.dataset.NumpyDataset({"x": np.arange(10, 20)})
+        batch_ds = fe.dataset.BatchDataset(datasets=[ds1, ds2], num_samples=[2, 3])
+        values = [item["x"] for item in batch_ds[0]]
+        self.assertEqual(len(values), 5)
+        self.assertEqual(len([val for val in values if val < 10]), 2)
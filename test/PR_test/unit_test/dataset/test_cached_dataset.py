@@ -0,0 +1,85 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+import tempfile
+import unittest
+
+import numpy as np
+
+import fastestimator as fe
+
+
+class TestCachedDataset(unittest.TestCase):
+    def setUp(self):
+        self.x = np.arange(100, dtype=np.float32).reshape((10, 10))
+        self.y = np.array([0, 1] * 5)
+        self.source = fe.dataset.NumpyDataset({"x": self.x, "y": self.y})
+
+    def test_hits_and_misses(self):
+        ds = fe.dataset.CachedDataset(self.source)
+        for _ in range(2):
+            for idx in range(10):
+                np.testing.assert_array_equal(ds[idx]["x"], self.x[idx])
+                self.assertEqual(ds[idx]["y"], self.y[idx])
+        stats = ds.stats()
+        self.assertEqual(stats["misses"], 10)
+        self.assertEqual(stats["hits"], 30)
+
+    def test_consistent_return_type(self):
+        ds = fe.dataset.CachedDataset(self.source)
+        for _ in range(2):  # A miss, then a hit
+            data = ds[0]
+            self.assertIsInstance(data, fe.util.CopyOnWriteDict)
+            data["x"][0] = -1
+            np.testing.assert_array_equal(self.x[0], np.arange(10, dtype=np.float32))
+        np.testing.assert_array_equal(ds[0]["x"], self.x[0])
+
+    def test_eviction_and_spill(self):
+        with tempfile.TemporaryDirectory() as disk_dir:
+            ds = fe.dataset.CachedDataset(self.source, memory_limit=200, disk_limit=2**20, disk_dir=disk_dir)
+            for idx in range(10):
+                ds[idx]
+            for idx in range(10):
+                np.testing.assert_array_equal(ds[idx]["x"], self.x[idx])
+            stats = ds.stats()
+            self.assertLessEqual(stats["memory_bytes"], 200)
+            self.assertGreater(stats["disk_bytes"], 0)
+            self.assertEqual(stats["hits"], 10)
+
+    def test_split(self):
+        ds = fe.dataset.CachedDataset(self.source)
+        np.testing.assert_array_equal(ds[0]["x"], self.x[0])
+        ds2 = ds.split([0, 5])
+        self.assertIsInstance(ds2, fe.dataset.CachedDataset)
+        self.assertEqual(len(ds), 8)
+        self.assertEqual(len(ds2), 2)
+        np.testing.assert_array_equal(ds[0]["x"], self.x[1])
+        np.testing.assert_array_equal(ds2[1]["x"], self.x[5])
+        self.assertIs(ds.cache, ds2.cache)
+
+    def test_summary(self):
+        ds = fe.dataset.CachedDataset(self.source)
+        summary = ds.summary()
+        self.assertEqual(summary.num_instances, 10)
+        self.assertEqual(summary.keys["x"].shape, [10])
+        self.assertEqual(summary.keys["y"].num_unique_values, 2)
+
+    def test_pipeline(self):
+        ds = fe.dataset.CachedDataset(self.source)
+        pipeline = fe.Pipeline(train_data=ds, batch_size=5, num_process=2)
+        for _ in range(2):
+            values = sorted(y for batch in pipeline.get_loader(mode="train") for y in batch["y"].numpy().tolist())
+            self.assertEqual(values, sorted(self.y.tolist()))
+        self.assertEqual(ds.stats()["misses"], 10)
+        self.assertEqual(ds.stats()["hits"], 10)
@@ -16,6 +16,7 @@ import os
 import tempfile
 import unittest
 
+import numpy as np
 import pandas as pd
 
 import fastestimator as fe
@@ -32,3 +33,46 @@ class TestCSVDataset(unittest.TestCase):
         dataset = fe.dataset.CSVDataset(file_path=os.path.join(tmpdirname, 'data.csv'))
 
         self.assertEqual(len(dataset), 4)
+
+    def test_lazy_dataset(self):
+        tmpdirname = tempfile.mkdtemp()
+        file_path = os.path.join(tmpdirname, 'data.csv')
+        with open(file_path, 'w') as f:
+            f.write('x,y,z\na1.txt,0,0.5\n\n"b1\n,txt",1,\nb2.txt,1,1.5\n')
+
+        dataset = fe.dataset.CSVDataset(file_path=file_path, lazy=True)
+
+        self.assertEqual(len(dataset), 3)
+        self.assertEqual(dataset.parent_path, tmpdirname)
+        self.assertEqual(dataset[1]['x'], 'b1\n,txt')
+        self.assertIsInstance(dataset[1]['y'], np.int64)
+        self.assertTrue(np.isnan(dataset[1]['z']))
+        self.assertEqual(dataset[2]['z'], 1.5)
+        np.testing.assert_array_equal(dataset['y'], [0, 1, 1])
+
+    def test_lazy_columns(self):
+        tmpdirname = tempfile.mkdtemp()
+        df = pd.DataFrame(data={'x': ['a1.txt', 'a2.txt', 'b1.txt', 'b2.txt'], 'y': [0, 0, 1, 1]})
+        df.to_csv(os.path.join(tmpdirname, 'data.csv'), index=False)
+
+        dataset = fe.dataset.CSVDataset(file_path=os.path.join(tmpdirname, 'data.csv'), lazy=True, columns=['y'])
+
+        self.assertEqual(dataset[0], {'y': 0})
+        dataset['y'] = [5, 6, 7, 8]
+        self.assertEqual(dataset[3], {'y': 8})
+
+    def test_lazy_split_and_summary(self):
+        tmpdirname = tempfile.mkdtemp()
+        df = pd.DataFrame(data={'x': ['a1.txt', 'a2.txt', 'b1.txt', 'b2.txt'], 'y': [0, 0, 1, 1]})
+        df.to_csv(os.path.join(tmpdirname, 'data.csv'), index=False)
+
+        dataset = fe.dataset.CSVDataset(file_path=os.path.join(tmpdirname, 'data.csv'), lazy=True)
+        summary = dataset.summary()
+        self.assertEqual(summary.num_instances, 4)
+        self.assertEqual(summary.keys['y'].num_unique_values, 2)
+
+        dataset2 = dataset.split([1, 2])
+        self.assertEqual(len(dataset), 2)
+        self.assertEqual([dataset[i]['x'] for i in range(2)], ['a1.txt', 'b2.txt'])
+        self.assertEqual([dataset2[i]['x'] for i in range(2)], ['a2.txt', 'b1.txt'])
+        self.assertEqual(dataset2.parent_path, tmpdirname)
@@ -35,3 +35,15 @@ class TestDirDataset(unittest.TestCase):
         dataset = fe.dataset.DirDataset(root_dir=tmpdirname)
 
         self.assertEqual(len(dataset), 4)
+
+    def test_manifest(self):
+        with tempfile.TemporaryDirectory() as tmpdirname, tempfile.TemporaryDirectory() as manifest_dir:
+            for name in ["b.txt", "a.txt", "c.png"]:
+                open(os.path.join(tmpdirname, name), "x").close()
+            manifest = os.path.join(manifest_dir, "manifest.json")
+            dataset = fe.dataset.DirDataset(root_dir=tmpdirname, file_extension=".txt", manifest=manifest)
+            self.assertTrue(os.path.exists(manifest))
+            dataset2 = fe.dataset.DirDataset(root_dir=tmpdirname, file_extension=".txt", manifest=manifest)
+            self.assertEqual([dataset[i]["x"] for i in range(2)], [os.path.join(tmpdirname, "a.txt"),
+                                                                   os.path.join(tmpdirname, "b.txt")])
+            self.assertEqual([dataset2[i]["x"] for i in range(2)], [dataset[i]["x"] for i in range(2)])
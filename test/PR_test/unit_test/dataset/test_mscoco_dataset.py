@@ -0,0 +1,133 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from fastestimator.dataset.data.mscoco import MSCOCODataset
+
+
+def _annotation(ann_id, image_id, bbox, category_id=1, iscrowd=0):
+    x, y, w, h = bbox
+    return {
+        "id": ann_id,
+        "image_id": image_id,
+        "bbox": bbox,
+        "area": w * h,
+        "category_id": category_id,
+        "iscrowd": iscrowd,
+        "segmentation": [[x, y, x + w, y, x + w, y + h, x, y + h]]
+    }
+
+
+class TestMSCOCODataset(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        root = cls.tmp_dir.name
+        cls.image_dir = os.path.join(root, "images")
+        os.makedirs(cls.image_dir)
+        image_ids = [1, 2, 3, 4]
+        for image_id in image_ids:
+            open(os.path.join(cls.image_dir, "{:012d}.jpg".format(image_id)), "x").close()
+        images = [{"id": image_id, "height": 10, "width": 10, "file_name": "{:012d}.jpg".format(image_id)}
+                  for image_id in image_ids]
+        instances = {
+            "images": images,
+            "categories": [{"id": 1, "name": "a"}, {"id": 2, "name": "b"}],
+            "annotations": [
+                _annotation(10, 1, [1.0, 1.0, 4.0, 4.0], category_id=2),
+                _annotation(11, 1, [0.0, 0.0, 0.5, 0.5]),  # Too small
+                _annotation(12, 2, [2.0, 2.0, 3.0, 3.0], iscrowd=1),  # Crowd annotations are ignored
+                _annotation(13, 3, [0.0, 0.0, 2.0, 3.0])
+            ]
+        }
+        captions = {
+            "images": images,
+            "annotations": [{"id": 20, "image_id": 1, "caption": "one"}, {"id": 21, "image_id": 4, "caption": "four"}]
+        }
+        cls.annotation_file = os.path.join(root, "instances.json")
+        cls.caption_file = os.path.join(root, "captions.json")
+        with open(cls.annotation_file, 'w') as file:
+            json.dump(instances, file)
+        with open(cls.caption_file, 'w') as file:
+            json.dump(captions, file)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+
+    def _dataset(self, index_dir, **kwargs):
+        return MSCOCODataset(self.image_dir, self.annotation_file, self.caption_file, index_dir=index_dir, **kwargs)
+
+    def test_bboxes_and_masks(self):
+        with tempfile.TemporaryDirectory() as index_dir:
+            ds = self._dataset(index_dir, include_masks=True)
+            ids = [ds[idx]["image_id"] for idx in range(len(ds))]
+            # Only images 1 and 3 have usable boxes, so the others are replaced by one of them
+            self.assertTrue(set(ids) <= {1, 3})
+            item = [ds[idx] for idx in range(len(ds)) if ds[idx]["image_id"] == 1][0]
+            self.assertEqual(item["bbox"], [(1.0, 1.0, 4.0, 4.0, 2)])
+            self.assertEqual(len(item["mask"]), 1)
+            self.assertEqual(item["mask"][0].shape, (10, 10))
+            self.assertEqual(item["mask"][0].dtype, np.uint8)
+            self.assertGreater(item["mask"][0].sum(), 0)
+
+    def test_captions(self):
+        with tempfile.TemporaryDirectory() as index_dir:
+            ds = self._dataset(index_dir, include_bboxes=False, include_captions=True)
+            captions = {ds[idx]["image_id"]: ds[idx]["caption"] for idx in range(len(ds))}
+            self.assertEqual(captions, {1: ["one"], 4: ["four"]})
+
+    def test_index_reuse(self):
+        with tempfile.TemporaryDirectory() as index_dir:
+            self._dataset(index_dir)
+            meta_path = os.path.join(index_dir, "meta.json")
+            mtime = os.stat(meta_path).st_mtime_ns
+            ds = self._dataset(index_dir)
+            self.assertEqual(os.stat(meta_path).st_mtime_ns, mtime)
+            self.assertIn(ds[0]["image_id"], {1, 3})
+
+    def test_split(self):
+        with tempfile.TemporaryDirectory() as index_dir:
+            ds = self._dataset(index_dir, include_bboxes=False, include_captions=True)
+            ds2 = ds.split([0, 1])
+            for dataset in (ds, ds2):
+                for idx in range(len(dataset)):
+                    self.assertTrue(dataset[idx]["caption"])
+
+    def test_read_only_default_location(self):
+        with tempfile.TemporaryDirectory() as home:
+            with mock.patch("fastestimator.dataset.data.mscoco._is_writable", return_value=False), \
+                    mock.patch("pathlib.Path.home", return_value=home):
+                ds = MSCOCODataset(self.image_dir, self.annotation_file, self.caption_file)
+            self.assertFalse(os.path.exists(os.path.splitext(self.annotation_file)[0] + "_index"))
+            self.assertTrue(os.listdir(os.path.join(home, "fastestimator_data", "MSCOCO_index")))
+            self.assertIn(ds[0]["image_id"], {1, 3})
+
+    def test_rebuild_replaces_arrays(self):
+        with tempfile.TemporaryDirectory() as index_dir:
+            self._dataset(index_dir)
+            ds = self._dataset(index_dir, include_masks=True)
+            with open(os.path.join(index_dir, "meta.json")) as file:
+                meta = json.load(file)
+            # The outdated arrays are cleaned up, and no temporary files are left behind
+            self.assertEqual(sorted(os.listdir(index_dir)), sorted(["meta.json", meta["directory"]]))
+            item = [ds[idx] for idx in range(len(ds)) if ds[idx]["image_id"] == 1][0]
+            self.assertEqual(len(item["mask"]), 1)
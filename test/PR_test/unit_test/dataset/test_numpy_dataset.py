@@ -14,6 +14,7 @@
 # ==============================================================================
 import unittest
 
+import numpy as np
 import tensorflow as tf
 
 import fastestimator as fe
@@ -25,3 +26,59 @@ class TestNumpyDataset(unittest.TestCase):
         train_data = fe.dataset.NumpyDataset({"x": x_train, "y": y_train})
 
         self.assertEqual(len(train_data), 60000)
+
+    def test_row_view(self):
+        ds = fe.dataset.NumpyDataset({"x": np.arange(10).reshape(5, 2), "y": ["a", "b", "c", "d", "e"]})
+        self.assertEqual(ds[1]["y"], "b")
+        np.testing.assert_array_equal(ds[1]["x"], [2, 3])
+        ds[1]["x"] = np.array([7, 7])
+        np.testing.assert_array_equal(ds[1]["x"], [7, 7])
+
+    def test_input_not_modified(self):
+        x = np.zeros((5, 2))
+        ds = fe.dataset.NumpyDataset({"x": x})
+        ds[0]["x"] = np.ones(2)
+        np.testing.assert_array_equal(ds[0]["x"], [1, 1])
+        np.testing.assert_array_equal(x, np.zeros((5, 2)))
+
+    def test_column_access(self):
+        ds = fe.dataset.NumpyDataset({"x": np.arange(10).reshape(5, 2), "y": np.arange(5)})
+        np.testing.assert_array_equal(ds["x"], np.arange(10).reshape(5, 2))
+        ds["y"] = np.arange(5) * 2
+        self.assertEqual(ds[4]["y"], 8)
+
+    def test_split(self):
+        ds = fe.dataset.NumpyDataset({"x": np.arange(10), "y": list(range(10))})
+        ds2 = ds.split([1, 3, 5])
+        self.assertEqual(len(ds), 7)
+        self.assertEqual(len(ds2), 3)
+        self.assertEqual(ds2[1]["x"], 3)
+        self.assertEqual(ds2[2]["y"], 5)
+        self.assertEqual(ds[1]["x"], 2)
+        self.assertEqual(ds[1]["y"], 2)
+
+    def test_summary(self):
+        ds = fe.dataset.NumpyDataset({"x": np.array([0, 1, 1, 2]), "y": ["a", "a", "b", "a"]})
+        summary = ds.summary()
+        self.assertEqual(summary.num_instances, 4)
+        self.assertEqual(summary.keys["x"].num_unique_values, 3)
+        self.assertEqual(summary.keys["y"].num_unique_values, 2)
+        self.assertIsNone(summary.keys["x"].estimated)
+
+    def test_approximate_summary(self):
+        ds = fe.dataset.NumpyDataset({
+            "x": np.arange(20000) % 5000, "y": [str(i % 300) for i in range(20000)], "z": np.ones((20000, 3))
+        })
+        summary = ds.summary(approximate=True, sample_size=50)
+        self.assertEqual(summary.num_instances, 20000)
+        self.assertAlmostEqual(summary.keys["x"].num_unique_values, 5000, delta=250)
+        self.assertAlmostEqual(summary.keys["y"].num_unique_values, 300, delta=15)
+        self.assertEqual(summary.keys["z"].shape, [3])
+        self.assertEqual(summary.keys["x"].estimated, ["shape", "dtype", "num_unique_values"])
+        self.assertEqual(summary.keys["z"].estimated, ["shape", "dtype"])
+
+    def test_approximate_summary_time_budget(self):
+        ds = fe.dataset.NumpyDataset({"y": [str(i) for i in range(100000)]})
+        summary = ds.summary(approximate=True, time_budget=0)
+        self.assertLess(summary.keys["y"].num_unique_values, 50000)
+        self.assertIn("num_unique_values", summary.keys["y"].estimated)
@@ -0,0 +1,97 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+import fastestimator as fe
+from fastestimator.op.numpyop.univariate import Minmax
+
+
+class TestRecordDataset(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.x = np.arange(200, dtype=np.float32).reshape((20, 10))
+        cls.y = np.array([0, 1, 2, 3] * 5)
+        cls.source = fe.dataset.NumpyDataset({"x": cls.x, "y": cls.y, "name": ["a"] * 20})
+
+    def test_round_trip(self):
+        with tempfile.TemporaryDirectory() as save_dir:
+            ds = fe.dataset.RecordDataset.write(source=self.source, save_dir=save_dir, shard_size=256)
+            shard_dir = os.path.join(save_dir, os.path.dirname(ds.shards[0]))
+            self.assertGreater(len([f for f in os.listdir(shard_dir) if f.endswith(".fer")]), 1)
+            ds = fe.dataset.RecordDataset(save_dir)
+            self.assertEqual(len(ds), 20)
+            for idx in range(20):
+                np.testing.assert_array_equal(ds[idx]["x"], self.x[idx])
+                self.assertEqual(ds[idx]["y"], self.y[idx])
+                self.assertEqual(ds[idx]["name"], "a")
+            self.assertFalse(ds[3]["x"].flags.writeable)
+
+    def test_overwrite(self):
+        with tempfile.TemporaryDirectory() as save_dir:
+            fe.dataset.RecordDataset.write(source=self.source, save_dir=save_dir)
+            source = fe.dataset.NumpyDataset({"x": self.x[:5] + 1})
+            ds = fe.dataset.RecordDataset.write(source=source, save_dir=save_dir)
+            self.assertEqual(len(ds), 5)
+            np.testing.assert_array_equal(ds[0]["x"], self.x[0] + 1)
+            # Only the new records and their metadata remain
+            self.assertEqual(len(os.listdir(save_dir)), 2)
+
+    def test_interrupted_write(self):
+        class FailingDataset(fe.dataset.NumpyDataset):
+            def __getitem__(self, index):
+                if index == 10:
+                    raise KeyboardInterrupt
+                return super().__getitem__(index)
+
+        with tempfile.TemporaryDirectory() as save_dir:
+            fe.dataset.RecordDataset.write(source=self.source, save_dir=save_dir)
+            contents = sorted(os.listdir(save_dir))
+            with self.assertRaises(KeyboardInterrupt):
+                fe.dataset.RecordDataset.write(source=FailingDataset({"x": self.x}), save_dir=save_dir)
+            # The previous records are untouched, and no partial files are left behind
+            self.assertEqual(sorted(os.listdir(save_dir)), contents)
+            ds = fe.dataset.RecordDataset(save_dir)
+            self.assertEqual(len(ds), 20)
+            self.assertEqual(ds[0]["name"], "a")
+
+    def test_split(self):
+        with tempfile.TemporaryDirectory() as save_dir:
+            ds = fe.dataset.RecordDataset.write(source=self.source, save_dir=save_dir)
+            ds2 = ds.split([0, 5, 7])
+            self.assertEqual(len(ds), 17)
+            self.assertEqual(len(ds2), 3)
+            np.testing.assert_array_equal(ds2[1]["x"], self.x[5])
+            np.testing.assert_array_equal(ds[0]["x"], self.x[1])
+
+    def test_summary(self):
+        with tempfile.TemporaryDirectory() as save_dir:
+            ds = fe.dataset.RecordDataset.write(source=self.source, save_dir=save_dir)
+            summary = ds.summary()
+            self.assertEqual(summary.num_instances, 20)
+            self.assertEqual(summary.keys["x"].shape, [10])
+            self.assertEqual(summary.keys["x"].dtype, "float32")
+            self.assertEqual(summary.keys["y"].num_unique_values, 4)
+            self.assertEqual(summary.keys["name"].num_unique_values, 1)
+
+    def test_pipeline_prefix(self):
+        pipeline = fe.Pipeline(train_data=self.source, ops=[Minmax(inputs="x", outputs="x")])
+        with tempfile.TemporaryDirectory() as save_dir:
+            ds = fe.dataset.RecordDataset.write(source=pipeline, save_dir=save_dir)
+            self.assertEqual(ds[0]["x"].max(), 1.0)
+            self.assertEqual(ds[0]["x"].min(), 0.0)
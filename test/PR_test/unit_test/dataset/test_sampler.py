@@ -0,0 +1,61 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+import unittest
+
+import numpy as np
+
+import fastestimator as fe
+
+
+class TestLengthBucketSampler(unittest.TestCase):
+    def test_sorted_batches(self):
+        sampler = fe.dataset.LengthBucketSampler(lengths=[5, 100, 7, 98], batch_size=2, shuffle=False)
+        self.assertEqual(list(sampler), [[0, 2], [3, 1]])
+
+    def test_shuffle_covers_all_samples(self):
+        lengths = np.random.randint(1, 100, size=1000)
+        sampler = fe.dataset.LengthBucketSampler(lengths=lengths, batch_size=32)
+        for _ in range(2):
+            batches = list(sampler)
+            self.assertEqual(sorted(idx for batch in batches for idx in batch), list(range(1000)))
+
+    def test_max_tokens(self):
+        lengths = np.random.randint(1, 100, size=1000)
+        sampler = fe.dataset.LengthBucketSampler(lengths=lengths, max_tokens=500)
+        batches = list(sampler)
+        self.assertEqual(sum(len(batch) for batch in batches), 1000)
+        for batch in batches:
+            self.assertLessEqual(len(batch) * max(lengths[batch]), 500)
+
+    def test_oversized_sample(self):
+        sampler = fe.dataset.LengthBucketSampler(lengths=[1, 50, 1], max_tokens=10, shuffle=False)
+        self.assertEqual(list(sampler), [[0, 2], [1]])
+
+    def test_drop_last(self):
+        sampler = fe.dataset.LengthBucketSampler(lengths=np.arange(10), batch_size=4, shuffle=False, drop_last=True)
+        self.assertEqual(len(sampler), 2)
+
+    def test_replicas(self):
+        lengths = np.random.randint(1, 100, size=103)
+        samplers = [
+            fe.dataset.LengthBucketSampler(lengths=lengths, batch_size=4, num_replicas=3, rank=rank, seed=7)
+            for rank in range(3)
+        ]
+        for sampler in samplers:
+            sampler.set_epoch(2)
+        batches = [list(sampler) for sampler in samplers]
+        self.assertEqual(len({len(rank_batches) for rank_batches in batches}), 1)
+        indices = [idx for rank_batches in batches for batch in rank_batches for idx in batch]
+        self.assertEqual(set(indices), set(range(103)))
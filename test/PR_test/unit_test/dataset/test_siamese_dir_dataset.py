@@ -42,3 +42,37 @@ class TestSiameseDirDataset(unittest.TestCase):
         dataset = fe.dataset.SiameseDirDataset(root_dir=tmpdirname)
 
         self.assertEqual(len(dataset), 4)
+
+    def test_pairs(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            for clazz, size in [("a", 3), ("b", 2), ("c", 4)]:
+                os.makedirs(os.path.join(tmpdirname, clazz))
+                for idx in range(size):
+                    open(os.path.join(tmpdirname, clazz, "{}{}.txt".format(clazz, idx)), "x").close()
+            dataset = fe.dataset.SiameseDirDataset(root_dir=tmpdirname)
+            for _ in range(200):
+                index = np.random.randint(len(dataset))
+                item = dataset[index]
+                left_class = os.path.basename(os.path.dirname(item["x_a"]))
+                right_class = os.path.basename(os.path.dirname(item["x_b"]))
+                if item["y"] == 1:
+                    self.assertEqual(left_class, right_class)
+                    self.assertNotEqual(item["x_a"], item["x_b"])
+                else:
+                    self.assertNotEqual(left_class, right_class)
+
+    def test_one_shot_trial(self):
+        with tempfile.TemporaryDirectory() as tmpdirname:
+            for clazz in ["a", "b", "c"]:
+                os.makedirs(os.path.join(tmpdirname, clazz))
+                for idx in range(2):
+                    open(os.path.join(tmpdirname, clazz, "{}{}.txt".format(clazz, idx)), "x").close()
+            dataset = fe.dataset.SiameseDirDataset(root_dir=tmpdirname)
+            dataset2 = dataset.split([0])
+            self.assertEqual(len(dataset), 4)
+            l1, l2 = dataset.one_shot_trial(2)
+            self.assertEqual(len(set(l1)), 1)
+            self.assertEqual(os.path.dirname(l1[0]), os.path.dirname(l2[0]))
+            self.assertNotEqual(l1[0], l2[0])
+            self.assertNotEqual(os.path.dirname(l1[0]), os.path.dirname(l2[1]))
+            self.assertEqual(os.path.basename(os.path.dirname(dataset2[0]["x_b"])), "a")
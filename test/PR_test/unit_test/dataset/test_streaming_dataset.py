@@ -0,0 +1,74 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import fastestimator as fe
+
+
+def count_to_ten():
+    for idx in range(10):
+        yield {"x": np.array([idx]), "y": idx}
+
+
+def count_to_ten_sharded(shard, num_shards):
+    for idx in range(shard, 10, num_shards):
+        yield {"x": np.array([idx]), "y": idx}
+
+
+class TestStreamingDataset(unittest.TestCase):
+    def test_stream_order(self):
+        ds = fe.dataset.StreamingDataset(count_to_ten, samples_per_epoch=15)
+        self.assertEqual(len(ds), 15)
+        values = [ds[idx]["y"] for idx in range(15)]
+        self.assertEqual(values, list(range(10)) + list(range(5)))
+
+    def test_rank_sharding(self):
+        for source, sharded in [(count_to_ten, False), (count_to_ten_sharded, True)]:
+            ds = fe.dataset.StreamingDataset(source, samples_per_epoch=5, sharded_source=sharded, world_size=2, rank=1)
+            self.assertEqual([ds[idx]["y"] for idx in range(5)], [1, 3, 5, 7, 9])
+
+    def test_shuffle_buffer(self):
+        ds = fe.dataset.StreamingDataset(count_to_ten, samples_per_epoch=10, shuffle_buffer=5)
+        values = [ds[idx]["y"] for idx in range(10)]
+        self.assertEqual(len(values), 10)
+        self.assertTrue(set(values).issubset(set(range(10))))
+
+    def test_threaded_access(self):
+        for shuffle_buffer in [0, 5]:
+            ds = fe.dataset.StreamingDataset(count_to_ten, samples_per_epoch=1000, shuffle_buffer=shuffle_buffer)
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                values = list(pool.map(lambda idx: ds[idx]["y"], range(1000)))
+            self.assertEqual(len(values), 1000)
+            if not shuffle_buffer:
+                # Every sample of the stream is read exactly once per pass, regardless of which thread read it
+                self.assertEqual(sorted(values), sorted(list(range(10)) * 100))
+            else:
+                self.assertTrue(set(values).issubset(set(range(10))))
+
+    def test_summary(self):
+        ds = fe.dataset.StreamingDataset(count_to_ten, samples_per_epoch=100)
+        summary = ds.summary()
+        self.assertEqual(summary.num_instances, 100)
+        self.assertEqual(summary.keys["x"].shape, [1])
+        self.assertEqual(summary.keys["y"].dtype, "int")
+
+    def test_pipeline(self):
+        ds = fe.dataset.StreamingDataset(count_to_ten, samples_per_epoch=10)
+        pipeline = fe.Pipeline(train_data=ds, batch_size=5, num_process=2)
+        values = sorted(y for batch in pipeline.get_loader(mode="train") for y in batch["y"].numpy().tolist())
+        self.assertEqual(values, list(range(10)))
@@ -16,8 +16,9 @@ import unittest
 
 import numpy as np
 
-from fastestimator.op.numpyop.meta import Fuse
-from fastestimator.op.numpyop.univariate import Minmax
+from fastestimator.op.numpyop.meta import Fuse, OneOf, Sometimes
+from fastestimator.op.numpyop.multivariate import HorizontalFlip, VerticalFlip
+from fastestimator.op.numpyop.univariate import InvertImg, Minmax
 
 
 class TestFuse(unittest.TestCase):
@@ -41,3 +42,44 @@ class TestFuse(unittest.TestCase):
             self.assertEqual(type(output), list)
         with self.subTest('Check output image shape'):
             self.assertEqual(output[0].shape, self.output_shape)
+
+
+class TestFuseAlbumentations(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.image = np.random.randint(256, size=(10, 12, 3), dtype=np.uint8)
+        cls.mask = np.random.randint(2, size=(10, 12), dtype=np.uint8)
+        cls.bboxes = [(1.0, 2.0, 3.0, 4.0, 7)]
+
+    def test_fused_ops(self):
+        ops = [
+            InvertImg(inputs="x", outputs="x"),
+            HorizontalFlip(image_in="x", bbox_in="y", bbox_params="coco"),
+            OneOf(VerticalFlip(image_in="x", bbox_in="y", bbox_params="coco"),
+                  VerticalFlip(image_in="x", bbox_in="y", bbox_params="coco")),
+            Sometimes(InvertImg(inputs="x", outputs="x"), prob=0.0)
+        ]
+        for fuse_albumentations in (True, False):
+            with self.subTest(fuse_albumentations=fuse_albumentations):
+                fuse = Fuse(ops, fuse_albumentations=fuse_albumentations)
+                self.assertEqual(len(fuse.fused_ops), 1 if fuse_albumentations else 4)
+                image, bboxes = fuse.forward(data=[self.image, self.bboxes], state={"mode": "train"})
+                np.testing.assert_array_equal(image, (255 - self.image)[::-1, ::-1])
+                np.testing.assert_allclose(np.array(bboxes), [[8.0, 4.0, 3.0, 4.0, 7]])
+
+    def test_incompatible_keys(self):
+        # The second flip must not be applied to the mask, so it cannot share a Compose with the first
+        fuse = Fuse([
+            InvertImg(inputs="x", outputs="x"),
+            HorizontalFlip(image_in="x", mask_in="m"),
+            HorizontalFlip(image_in="x"),
+            InvertImg(inputs="x", outputs="x")
+        ])
+        self.assertEqual(len(fuse.fused_ops), 2)
+        image, mask = fuse.forward(data=[self.image, self.mask], state={"mode": "train"})
+        np.testing.assert_array_equal(image, self.image)
+        np.testing.assert_array_equal(mask, self.mask[:, ::-1])
+
+    def test_non_albumentation_ops(self):
+        fuse = Fuse([InvertImg(inputs="x", outputs="x"), Minmax(inputs="x", outputs="x")])
+        self.assertEqual(len(fuse.fused_ops), 2)
@@ -37,3 +37,8 @@ class TestMinmax(unittest.TestCase):
         op = Minmax(inputs='x', outputs='x')
         data = op.forward(data=self.multi_input, state={})
         self.assertTrue(is_equal(data, self.multi_output))
+
+    def test_batch_input(self):
+        op = Minmax(inputs='x', outputs='x')
+        data = op.forward_batch(data=[np.array([[1, 2, 3, 5], [2, 2, 2, 2]])], state={})
+        self.assertTrue(is_equal(data, [np.array([[0, 0.25, 0.5, 1], [0, 0, 0, 0]])]))
@@ -0,0 +1,85 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from fastestimator.test.unittest_util import is_equal
+from fastestimator.util.cache_util import SharedCache, _CacheTier, read_entry, write_entry
+
+
+class TestEntry(unittest.TestCase):
+    def test_round_trip(self):
+        data = {"x": np.arange(6, dtype=np.float32).reshape((2, 3)), "y": np.array(5), "z": "hello", "w": [1, 2]}
+        path = os.path.join(tempfile.mkdtemp(), "entry")
+        with open(path, "wb") as file:
+            size = write_entry(file, data)
+        self.assertEqual(size, os.path.getsize(path))
+        result = read_entry(path)
+        self.assertTrue(is_equal(result, data))
+        self.assertFalse(result["x"].flags.writeable)
+
+    def test_missing_entry(self):
+        self.assertIsNone(read_entry(os.path.join(tempfile.mkdtemp(), "entry")))
+
+
+class TestSharedCache(unittest.TestCase):
+    def test_put_get(self):
+        cache = SharedCache(memory_limit=2**20)
+        cache.put("a", {"x": np.ones((2, 2)), "y": "label"})
+        self.assertTrue(is_equal(cache.get("a"), {"x": np.ones((2, 2)), "y": "label"}))
+        self.assertIsNone(cache.get("b"))
+        stats = cache.stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        cache.close()
+
+    def test_eviction_with_disk_tier(self):
+        cache = SharedCache(memory_limit=1500, disk_limit=1200)
+        for i in range(5):
+            cache.put(str(i), {"x": np.full((100, ), i, dtype=np.float32)})
+            time.sleep(0.01)  # Make sure that the modification times are distinct
+        self.assertIsNone(cache.get("0"))
+        for i in range(1, 5):
+            self.assertEqual(cache.get(str(i))["x"][0], i)
+        self.assertEqual(cache.stats()["evictions"], 4)
+        cache.close()
+
+    def test_close(self):
+        cache = SharedCache(memory_limit=2**20)
+        cache.put("a", {"x": np.ones((2, 2))})
+        cache.close()
+        self.assertFalse(os.path.exists(cache.memory.directory))
+
+    def test_write_failure_is_skipped(self):
+        cache = SharedCache(memory_limit=2**20)
+        with mock.patch.object(_CacheTier, "write", side_effect=OSError(28, "No space left on device")):
+            cache.put("a", {"x": np.ones((2, 2))})
+            cache.put("b", {"x": np.ones((2, 2))})
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["memory_bytes"], 0)
+        self.assertEqual(os.listdir(cache.memory.directory), [])
+        cache.put("a", {"x": np.ones((2, 2))})
+        self.assertTrue(is_equal(cache.get("a"), {"x": np.ones((2, 2))}))
+        cache.close()
+
+    def test_default_memory_limit(self):
+        cache = SharedCache()
+        self.assertLessEqual(cache.memory.limit, 2**30)
+        cache.close()
@@ -0,0 +1,61 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import fastestimator as fe
+from fastestimator.util import dir_util
+
+
+class TestScanDir(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = self.tmp_dir.name
+        for path in ["r.png", ".hidden.png", "a/x.png", "a/b/y.png", "c/z.png", "c/q.txt"]:
+            os.makedirs(os.path.join(self.root, os.path.dirname(path)), exist_ok=True)
+            open(os.path.join(self.root, path), "x").close()
+        self.manifest_dir = tempfile.TemporaryDirectory()
+        self.manifest = os.path.join(self.manifest_dir.name, "manifest.json")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+        self.manifest_dir.cleanup()
+
+    def test_scan(self):
+        listing = fe.util.scan_dir(self.root, file_extension=".png", num_threads=2)
+        self.assertEqual(listing, {"": ["r.png"], "a": ["x.png"], os.path.join("a", "b"): ["y.png"], "c": ["z.png"]})
+
+    def test_non_recursive(self):
+        self.assertEqual(fe.util.scan_dir(self.root, file_extension=".png", recursive=False), {"": ["r.png"]})
+
+    def test_manifest_reuse(self):
+        listing = fe.util.scan_dir(self.root, file_extension=".png", manifest=self.manifest)
+        self.assertTrue(os.path.exists(self.manifest))
+        with patch.object(dir_util, "_list_dir", side_effect=AssertionError("directory should not be listed")):
+            self.assertEqual(fe.util.scan_dir(self.root, file_extension=".png", manifest=self.manifest), listing)
+
+    def test_manifest_invalidation(self):
+        fe.util.scan_dir(self.root, file_extension=".png", manifest=self.manifest)
+        # Changing the arguments invalidates the manifest
+        self.assertIn("q.txt", fe.util.scan_dir(self.root, manifest=self.manifest)["c"])
+        # Changing the directory contents invalidates the manifest
+        fe.util.scan_dir(self.root, file_extension=".png", manifest=self.manifest)
+        os.remove(os.path.join(self.root, "c", "z.png"))
+        open(os.path.join(self.root, "a", "b", "w.png"), "x").close()
+        listing = fe.util.scan_dir(self.root, file_extension=".png", manifest=self.manifest)
+        self.assertNotIn("c", listing)
+        self.assertEqual(listing[os.path.join("a", "b")], ["w.png", "y.png"])
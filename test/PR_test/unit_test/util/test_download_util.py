@@ -0,0 +1,157 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+import hashlib
+import os
+import tarfile
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import fastestimator as fe
+
+FILES = {"/a.bin": os.urandom(300000), "/b.bin": os.urandom(200000), "/flaky.bin": os.urandom(100000)}
+
+
+class _RangeHandler(BaseHTTPRequestHandler):
+    """Serve FILES, supporting range requests. The first request for /flaky.bin is cut off halfway through."""
+    flaky_failures = 0
+
+    def do_GET(self):
+        content = FILES.get(self.path)
+        if content is None:
+            self.send_error(404)
+            return
+        start = 0
+        if "Range" in self.headers:
+            start = int(self.headers["Range"].split("=")[1].rstrip("-"))
+            if start >= len(content):
+                self.send_error(416)
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", "bytes {}-{}/{}".format(start, len(content) - 1, len(content)))
+        else:
+            self.send_response(200)
+        body = content[start:]
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.path == "/flaky.bin" and _RangeHandler.flaky_failures == 0:
+            _RangeHandler.flaky_failures += 1
+            body = body[:len(body) // 2]
+            self.close_connection = True
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestDownloadFiles(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _RangeHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.url = "http://127.0.0.1:{}".format(cls.server.server_address[1])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        _RangeHandler.flaky_failures = 0
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _read(self, name):
+        with open(os.path.join(self.tmp_dir.name, name), 'rb') as file:
+            return file.read()
+
+    def test_download(self):
+        names = ["a.bin", "b.bin"]
+        checksums = ["sha256:" + hashlib.sha256(FILES["/" + name]).hexdigest() for name in names]
+        paths = fe.util.download_files(["{}/{}".format(self.url, name) for name in names],
+                                       [os.path.join(self.tmp_dir.name, name) for name in names],
+                                       checksums=checksums,
+                                       num_threads=2,
+                                       verbose=False)
+        for name, path in zip(names, paths):
+            self.assertEqual(self._read(name), FILES["/" + name])
+        self.assertEqual(sorted(os.listdir(self.tmp_dir.name)), names)
+
+    def test_resume(self):
+        path = fe.util.download_file(self.url + "/flaky.bin",
+                                     os.path.join(self.tmp_dir.name, "flaky.bin"),
+                                     checksum="md5:" + hashlib.md5(FILES["/flaky.bin"]).hexdigest(),
+                                     verbose=False)
+        self.assertEqual(_RangeHandler.flaky_failures, 1)
+        self.assertEqual(self._read(os.path.basename(path)), FILES["/flaky.bin"])
+
+    def test_interrupted_download_is_not_complete(self):
+        path = os.path.join(self.tmp_dir.name, "flaky.bin")
+        with self.assertRaises(IOError):
+            fe.util.download_file(self.url + "/flaky.bin", path, retries=0, verbose=False)
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(os.path.getsize(path + ".part"), len(FILES["/flaky.bin"]) // 2)
+
+    def test_checksum_mismatch(self):
+        path = os.path.join(self.tmp_dir.name, "a.bin")
+        with self.assertRaises(ValueError):
+            fe.util.download_file(self.url + "/a.bin", path, checksum="sha256:" + "0" * 64, verbose=False)
+        self.assertEqual(os.listdir(self.tmp_dir.name), [])
+
+    def test_existing_file(self):
+        path = os.path.join(self.tmp_dir.name, "a.bin")
+        with open(path, 'wb') as file:
+            file.write(b"local")
+        fe.util.download_file(self.url + "/a.bin", path, verbose=False)
+        self.assertEqual(self._read("a.bin"), b"local")
+        # A file which does not match its checksum is replaced
+        fe.util.download_file(self.url + "/a.bin",
+                              path,
+                              checksum=hashlib.sha256(FILES["/a.bin"]).hexdigest(),
+                              verbose=False)
+        self.assertEqual(self._read("a.bin"), FILES["/a.bin"])
+
+    def test_bandwidth_limit(self):
+        start = time.perf_counter()
+        fe.util.download_file(self.url + "/b.bin",
+                              os.path.join(self.tmp_dir.name, "b.bin"),
+                              max_bytes_per_sec=1000000,
+                              chunk_size=10000,
+                              verbose=False)
+        self.assertGreater(time.perf_counter() - start, 0.15)
+
+
+class TestExtractArchives(unittest.TestCase):
+    def test_extract(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            archives = []
+            for idx in range(3):
+                src = os.path.join(tmp_dir, "src{}".format(idx))
+                os.makedirs(os.path.join(src, "images"))
+                with open(os.path.join(src, "images", "{}.txt".format(idx)), 'w') as file:
+                    file.write(str(idx))
+                archive = os.path.join(tmp_dir, "archive{}.tar.gz".format(idx))
+                with tarfile.open(archive, "w:gz") as tar:
+                    tar.add(os.path.join(src, "images"), arcname="images")
+                archives.append(archive)
+            dest = os.path.join(tmp_dir, "dest")
+            fe.util.extract_archives(archives, dest, num_threads=3, verbose=False)
+            self.assertEqual(os.listdir(dest), ["images"])
+            self.assertEqual(sorted(os.listdir(os.path.join(dest, "images"))), ["0.txt", "1.txt", "2.txt"])
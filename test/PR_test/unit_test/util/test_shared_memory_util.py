@@ -0,0 +1,75 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+import unittest
+
+import numpy as np
+import torch
+from torch.utils.data import DataLoader
+
+from fastestimator.util.shared_memory_util import SharedMemoryCollator, detach_batch, uses_shared_memory
+
+
+class TestSharedMemoryCollator(unittest.TestCase):
+    def test_collate_list(self):
+        collator = SharedMemoryCollator(num_slabs=2)
+        batch = collator([{
+            "x": np.ones((2, 2), dtype=np.float32), "y": 1
+        }, {
+            "x": np.zeros((2, 2), dtype=np.float32), "y": 0
+        }])
+        self.assertIsInstance(batch["x"], torch.Tensor)
+        self.assertTrue(batch["x"].is_shared())
+        self.assertEqual(batch["x"].shape, (2, 2, 2))
+        self.assertTrue(np.array_equal(batch["y"].numpy(), np.array([1, 0])))
+
+    def test_collate_reuses_slabs(self):
+        collator = SharedMemoryCollator(num_slabs=2)
+        data = [{"x": np.ones((4, ), dtype=np.float32)} for _ in range(3)]
+        first = collator(data)["x"]
+        collator(data)
+        third = collator(data[:2])["x"]
+        self.assertEqual(first.storage().data_ptr(), third.storage().data_ptr())
+        self.assertEqual(third.shape, (2, 4))
+
+    def test_collate_pad(self):
+        collator = SharedMemoryCollator(num_slabs=2, pad_value=-1)
+        batch = collator([{"x": np.ones((1, ), dtype=np.int64)}, {"x": np.ones((3, ), dtype=np.int64)}])
+        self.assertTrue(np.array_equal(batch["x"].numpy(), np.array([[1, -1, -1], [1, 1, 1]])))
+
+    def test_collate_strings(self):
+        collator = SharedMemoryCollator(num_slabs=2)
+        batch = collator([{"x": "a"}, {"x": "b"}])
+        self.assertEqual(batch["x"], ["a", "b"])
+
+    def test_collate_pre_batched(self):
+        collator = SharedMemoryCollator(num_slabs=2)
+        batch = collator({"x": np.arange(6).reshape((2, 3))})
+        self.assertTrue(batch["x"].is_shared())
+        self.assertTrue(np.array_equal(batch["x"].numpy(), np.arange(6).reshape((2, 3))))
+
+
+class TestDetachBatch(unittest.TestCase):
+    def test_detach_survives_recycling(self):
+        collator = SharedMemoryCollator(num_slabs=1)
+        batch = detach_batch(collator([{"x": np.ones((2, ), dtype=np.float32), "y": 1}]), keys={"x"})
+        collator([{"x": np.zeros((2, ), dtype=np.float32), "y": 0}])
+        self.assertTrue(np.array_equal(batch["x"].numpy(), np.ones((1, 2))))
+        self.assertFalse(batch["x"].is_shared())
+        self.assertTrue(batch["y"].is_shared())
+
+    def test_uses_shared_memory(self):
+        data = [{"x": np.ones((2, ), dtype=np.float32)} for _ in range(4)]
+        self.assertTrue(uses_shared_memory(DataLoader(data, batch_size=2, collate_fn=SharedMemoryCollator(2))))
+        self.assertFalse(uses_shared_memory(DataLoader(data, batch_size=2)))
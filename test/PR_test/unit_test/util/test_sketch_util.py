@@ -0,0 +1,42 @@
+# Copyright 2021 The FastEstimator Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# ==============================================================================
+import unittest
+
+import numpy as np
+
+import fastestimator as fe
+
+
+class TestHyperLogLog(unittest.TestCase):
+    def test_small_cardinality(self):
+        hll = fe.util.HyperLogLog()
+        hll.add(["a", "b", "a", "c"])
+        self.assertEqual(hll.count(), 3)
+
+    def test_empty(self):
+        self.assertEqual(fe.util.HyperLogLog().count(), 0)
+
+    def test_large_cardinality(self):
+        hll = fe.util.HyperLogLog()
+        hll.add_array(np.arange(1000000) % 200000)
+        self.assertAlmostEqual(hll.count(), 200000, delta=200000 * 0.03)
+
+    def test_merge(self):
+        hll1 = fe.util.HyperLogLog()
+        hll2 = fe.util.HyperLogLog()
+        hll1.add(str(i) for i in range(5000))
+        hll2.add(str(i) for i in range(2500, 7500))
+        hll1.merge(hll2)
+        self.assertAlmostEqual(hll1.count(), 7500, delta=7500 * 0.03)
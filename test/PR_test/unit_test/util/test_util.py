@@ -422,6 +422,64 @@ class TestDefaultKeyDict(unittest.TestCase):
         self.assertEqual(self.test_dict["c"], "hello")
 
 
+class TestCopyOnWriteDict(unittest.TestCase):
+    def setUp(self):
+        self.base = {"x": np.ones((2, 2)), "y": [1, 2], "z": "hello"}
+
+    def test_copy_on_write_dict_read_copies(self):
+        data = fe.util.CopyOnWriteDict(self.base)
+        self.assertFalse(np.shares_memory(data["x"], self.base["x"]))
+        self.assertIs(data["x"], data["x"])
+
+    def test_copy_on_write_dict_in_place_write(self):
+        data = fe.util.CopyOnWriteDict(self.base)
+        data["x"][0, 0] = 5
+        data["x"] -= 1
+        self.assertEqual(data["x"][0, 0], 4)
+        self.assertTrue(is_equal(self.base["x"], np.ones((2, 2))))
+
+    def test_copy_on_write_dict_to_dict(self):
+        data = fe.util.CopyOnWriteDict(self.base)
+        data["w"] = np.zeros((2, ))
+        result = data.to_dict(keys={"x", "w", "v"})
+        self.assertEqual(list(result.keys()), ["w", "x"])
+        self.assertTrue(np.shares_memory(result["x"], self.base["x"]))
+        self.assertFalse(result["x"].flags.writeable)
+        self.assertTrue(self.base["x"].flags.writeable)
+        self.assertTrue(result["w"].flags.writeable)
+
+    def test_copy_on_write_dict_write(self):
+        data = fe.util.CopyOnWriteDict(self.base)
+        data["x"] = data["x"] + 1
+        data["w"] = 5
+        self.assertTrue(is_equal(data["x"], np.ones((2, 2)) + 1))
+        self.assertTrue(is_equal(self.base["x"], np.ones((2, 2))))
+        self.assertEqual(set(data.keys()), {"w", "x", "y", "z"})
+        self.assertNotIn("w", self.base)
+
+    def test_copy_on_write_dict_mutable_value(self):
+        data = fe.util.CopyOnWriteDict(self.base)
+        data["y"].append(3)
+        self.assertEqual(data["y"], [1, 2, 3])
+        self.assertEqual(self.base["y"], [1, 2])
+
+    def test_copy_on_write_dict_delete(self):
+        data = fe.util.CopyOnWriteDict(self.base)
+        del data["z"]
+        self.assertNotIn("z", data)
+        self.assertEqual(len(data), 2)
+        self.assertIn("z", self.base)
+        with self.assertRaises(KeyError):
+            del data["z"]
+
+    def test_copy_on_write_dict_nested(self):
+        data = fe.util.CopyOnWriteDict(fe.util.CopyOnWriteDict(self.base))
+        result = data.to_dict()
+        self.assertTrue(np.shares_memory(result["x"], self.base["x"]))
+        data["x"][0, 0] = 5
+        self.assertTrue(is_equal(self.base["x"], np.ones((2, 2))))
+
+
 class TestGetNumDevices(unittest.TestCase):
     def test_get_num_devices(self):
         x = fe.util.get_num_devices()